@@ -5,6 +5,7 @@ from ckeditor_uploader.widgets import CKEditorUploadingWidget
 from django import forms  # Import forms
 from django.contrib import admin
 
+from . import response_cache
 from .models import (
     Achievement,
     Certification,
@@ -14,6 +15,9 @@ from .models import (
     DailyVisitorCount,
     Experience,
     ExperiencePhoto,
+    IndexedDocument,
+    IndexJob,
+    IndexVersion,
     Project,
     ProjectImage,
     Publication,
@@ -23,13 +27,23 @@ from .models import (
 )
 
 
+class SortableAdmin(SortableAdminMixin, admin.ModelAdmin):
+    """Drag-and-drop ordering in the changelist, invalidating the cached API responses of the model."""
+
+    def _update_order(self, updated_items, extra_model_filters):
+        # The new order is written with bulk_update, which sends no post_save signal
+        updated = super()._update_order(updated_items, extra_model_filters)
+        response_cache.bump_version(self.model)
+        return updated
+
+
 class ProjectImageInline(admin.TabularInline):
     model = ProjectImage
     extra = 1  # Number of empty forms to display
 
 
 @admin.register(Project)
-class ProjectAdmin(SortableAdminMixin, admin.ModelAdmin):
+class ProjectAdmin(SortableAdmin):
     ordering_field_name = "display_order"
     list_display = ("title", "is_featured", "created_at")
     list_filter = ("is_featured", "tags")
@@ -56,7 +70,7 @@ class ExperienceAdminForm(forms.ModelForm):
 
 
 @admin.register(Experience)
-class ExperienceAdmin(SortableAdminMixin, admin.ModelAdmin):
+class ExperienceAdmin(SortableAdmin):
     # Use the custom form
     form = ExperienceAdminForm
 
@@ -110,7 +124,7 @@ class ChatSessionAdmin(admin.ModelAdmin):
 
 
 @admin.register(Publication)
-class PublicationAdmin(SortableAdminMixin, admin.ModelAdmin):
+class PublicationAdmin(SortableAdmin):
     ordering_field_name = "display_order"
     list_display = ("title", "authors", "conference", "published_date", "display_order")
     list_filter = ("published_date", "conference")
@@ -133,7 +147,7 @@ class PublicationAdmin(SortableAdminMixin, admin.ModelAdmin):
 
 
 @admin.register(Certification)
-class CertificationAdmin(SortableAdminMixin, admin.ModelAdmin):
+class CertificationAdmin(SortableAdmin):
     ordering_field_name = "display_order"
     list_display = ("name", "issuing_organization", "issue_date", "display_order")
     list_filter = ("issue_date", "issuing_organization")
@@ -156,7 +170,7 @@ class CertificationAdmin(SortableAdminMixin, admin.ModelAdmin):
 
 
 @admin.register(Achievement)
-class AchievementAdmin(SortableAdminMixin, admin.ModelAdmin):
+class AchievementAdmin(SortableAdmin):
     ordering_field_name = "display_order"
     list_display = ("title", "date", "display_order")
     list_filter = ("date",)
@@ -212,3 +226,50 @@ class DailyVisitorCountAdmin(admin.ModelAdmin):
 
     def has_delete_permission(self, request, obj=None):
         return False  # Prevent deletion from the admin
+
+
+@admin.register(IndexedDocument)
+class IndexedDocumentAdmin(admin.ModelAdmin):
+    """Read-only view of the knowledge-base index manifest (maintained by index_content)."""
+
+    list_display = ("doc_id", "collection", "embedding_model", "indexed_at")
+    list_filter = ("collection", "embedding_model")
+    search_fields = ("doc_id",)
+    readonly_fields = ("collection", "doc_id", "content_hash", "embedding_model", "indexed_at")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(IndexJob)
+class IndexJobAdmin(admin.ModelAdmin):
+    """Read-only view of the pending knowledge-base updates (drained by process_index_jobs)."""
+
+    list_display = ("doc_id", "action", "run_after", "attempts", "failed_at")
+    list_filter = ("action", ("failed_at", admin.EmptyFieldListFilter))
+    search_fields = ("doc_id",)
+    readonly_fields = ("doc_id", "action", "model", "object_id", "enqueued_at", "run_after", "attempts", "last_error", "failed_at")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(IndexVersion)
+class IndexVersionAdmin(admin.ModelAdmin):
+    """Read-only view of the knowledge-base collection versions (built and switched by index_content)."""
+
+    list_display = ("name", "base", "state", "created_at", "activated_at")
+    list_filter = ("base", "state")
+    readonly_fields = ("base", "name", "state", "created_at", "activated_at")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,194 @@
+# backend/api/chat_store.py
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ChatMessage, ChatSession
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = "chatbot:message-buffer"
+DEAD_LETTER_KEY = "chatbot:message-dead-letters"
+
+
+class RedisChatBuffer:
+    """
+    A FIFO buffer of pending chat messages in a Redis list, shared by all workers.
+
+    Records are only removed (``ack``) after they have been written, so a crash
+    between the write and the ack replays them on the next flush.
+    """
+
+    def __init__(self):
+        from django_redis import get_redis_connection
+
+        self.redis = get_redis_connection("default")
+
+    def append(self, record):
+        self.redis.rpush(BUFFER_KEY, json.dumps(record))
+
+    def peek(self, count):
+        return [json.loads(item) for item in self.redis.lrange(BUFFER_KEY, 0, count - 1)]
+
+    def ack(self, count):
+        self.redis.ltrim(BUFFER_KEY, count, -1)
+
+    def dead_letter(self, record):
+        self.redis.rpush(DEAD_LETTER_KEY, json.dumps(record))
+
+    def __len__(self):
+        return self.redis.llen(BUFFER_KEY)
+
+
+class LocalChatBuffer:
+    """An in-process buffer with the same interface, used when the cache backend is not Redis."""
+
+    def __init__(self):
+        self._records = deque()
+        self.dead_letters = []
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def peek(self, count):
+        with self._lock:
+            return [self._records[i] for i in range(min(count, len(self._records)))]
+
+    def ack(self, count):
+        with self._lock:
+            for _ in range(min(count, len(self._records))):
+                self._records.popleft()
+
+    def dead_letter(self, record):
+        with self._lock:
+            self.dead_letters.append(record)
+
+    def __len__(self):
+        return len(self._records)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """Returns the message buffer of this process, starting the local flusher when Redis is unavailable."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                if "django_redis" in settings.CACHES["default"]["BACKEND"]:
+                    _buffer = RedisChatBuffer()
+                else:
+                    _buffer = LocalChatBuffer()
+                    if settings.CHAT_FLUSH_INTERVAL > 0:
+                        threading.Thread(target=run_flusher, name="chat-flusher", daemon=True).start()
+    return _buffer
+
+
+def enqueue_message(session_id, sender, message):
+    """Appends a chat message to the write-behind buffer instead of inserting it during the request."""
+    get_buffer().append(
+        {
+            "id": str(uuid.uuid4()),
+            "session_id": str(session_id),
+            "sender": sender,
+            "message": message,
+            "created_at": timezone.now().isoformat(),
+        }
+    )
+
+
+def write_records(records):
+    """
+    Bulk-inserts buffered records, creating their sessions as needed.
+
+    Records carry their own primary keys and conflicts are ignored, so writing
+    the same records twice (an at-least-once replay) does not duplicate rows.
+    """
+    sessions = {}
+    for record in records:
+        sessions.setdefault(record["session_id"], parse_datetime(record["created_at"]))
+
+    with transaction.atomic():
+        ChatSession.objects.bulk_create(
+            [ChatSession(id=session_id, created_at=created_at) for session_id, created_at in sessions.items()],
+            ignore_conflicts=True,
+        )
+        ChatMessage.objects.bulk_create(
+            [
+                ChatMessage(
+                    id=record["id"],
+                    session_id=record["session_id"],
+                    sender=record["sender"],
+                    message=record["message"],
+                    created_at=parse_datetime(record["created_at"]),
+                )
+                for record in records
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def _write_one_by_one(records, buffer):
+    """Writes records individually, moving the ones that cannot be inserted to the dead-letter list."""
+    for record in records:
+        try:
+            write_records([record])
+        except (OperationalError, InterfaceError):
+            # The database is unavailable, not the record invalid: retry the batch on the next flush
+            raise
+        except Exception as e:
+            logger.error(f"Chat message {record.get('id')} cannot be written, moved to the dead-letter list: {e}")
+            buffer.dead_letter({**record, "error": str(e)})
+
+
+def flush(batch_size=None):
+    """
+    Writes buffered messages to the database in batches, oldest first.
+
+    A batch that fails is written record by record, and records that still
+    fail are moved to a dead-letter list, so one bad record cannot block the
+    buffer. Only one flusher should drain a buffer at a time. Returns the
+    number of messages processed.
+    """
+    batch_size = batch_size or settings.CHAT_FLUSH_BATCH_SIZE
+    buffer = get_buffer()
+    written = 0
+    while True:
+        records = buffer.peek(batch_size)
+        if not records:
+            return written
+        try:
+            write_records(records)
+        except (OperationalError, InterfaceError):
+            raise
+        except Exception as e:
+            logger.warning(f"Chat message batch of {len(records)} failed, writing it record by record: {e}")
+            _write_one_by_one(records, buffer)
+        buffer.ack(len(records))
+        written += len(records)
+
+
+def run_flusher(interval=None, batch_size=None):
+    """Flushes the buffer forever, every ``interval`` seconds."""
+    interval = interval or settings.CHAT_FLUSH_INTERVAL
+    while True:
+        try:
+            flush(batch_size)
+        except Exception as e:
+            logger.error(f"Chat message flush failed, will retry: {e}", exc_info=True)
+        finally:
+            close_old_connections()
+        time.sleep(interval)
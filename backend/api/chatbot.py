@@ -0,0 +1,293 @@
+# backend/api/chatbot.py
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from . import chat_store, clients, metrics, semantic_cache
+from .chromadb_utils import aembed_text, aquery_nodes
+from .models import Experience, Publication
+from .tokens import count_tokens, truncate_tokens
+
+logger = logging.getLogger(__name__)
+
+CHAT_MODEL = "gpt-4.1-mini"
+CHAT_MAX_TOKENS = 512
+CHAT_TEMPERATURE = 0.2
+SPECIAL_CONTEXT_KEY = "chatbot:special-context"
+
+
+def resolve_session_id(session_id):
+    """
+    Returns the chat session ID to use for a request, without touching the database.
+
+    A well-formed ID from the frontend is reused; otherwise a new one is issued.
+    The session row itself is created by the write-behind flusher.
+    """
+    if session_id:
+        try:
+            return uuid.UUID(str(session_id))
+        except ValueError:
+            # If frontend provides an invalid session ID, start a new one
+            pass
+    return uuid.uuid4()
+
+
+aenqueue_message = sync_to_async(chat_store.enqueue_message, thread_sensitive=False)
+
+
+def build_special_context():
+    """Builds the context sentences that are always injected into the prompt."""
+    special_context = []
+
+    # 1. Handle "Latest Experience"
+    latest_experience = Experience.objects.order_by("-is_current", "-start_date").first()
+    if latest_experience:
+        special_context.append(
+            f"Md Mushfiqur Rahman's most recent professional experience is as a {latest_experience.job_title} at {latest_experience.company_name}."
+        )
+
+    # 2. Handle "Publications" list
+    pub_titles = [f'"{title}"' for title in Publication.objects.values_list("title", flat=True)]
+    if pub_titles:
+        special_context.append(f"He has the following publications: {', '.join(pub_titles)}.")
+
+    return special_context
+
+
+def rebuild_special_context():
+    """Rebuilds the cached special context snapshot from the database and bumps its version."""
+    previous = cache.get(SPECIAL_CONTEXT_KEY)
+    snapshot = {
+        "version": (previous["version"] + 1) if previous else 1,
+        "sentences": build_special_context(),
+    }
+    cache.set(SPECIAL_CONTEXT_KEY, snapshot, timeout=None)
+    return snapshot
+
+
+def get_special_context():
+    """
+    Returns the special context sentences from the cached snapshot.
+
+    The snapshot is only rebuilt when an Experience or Publication changes (see
+    api.signals), so the chat hot path does no DB queries for it.
+    """
+    snapshot = cache.get(SPECIAL_CONTEXT_KEY)
+    if snapshot is None:
+        snapshot = rebuild_special_context()
+    return snapshot["sentences"]
+
+
+aget_special_context = sync_to_async(get_special_context)
+
+
+def pack_context(special_context, documents, budget=None):
+    """
+    Packs the context into a token budget and returns ``(context, stats)``.
+
+    The special context always goes first, then the retrieved documents in
+    relevance order. A document that does not fit is truncated to the space
+    left, or dropped when that space is too small to be useful.
+    """
+    budget = budget or settings.CHATBOT_CONTEXT_TOKEN_BUDGET
+    parts = list(special_context)
+    used = sum(count_tokens(part, CHAT_MODEL) for part in parts)
+    stats = {"documents_used": 0, "documents_truncated": 0, "documents_dropped": 0}
+
+    for document in documents:
+        remaining = budget - used
+        tokens = count_tokens(document, CHAT_MODEL)
+        if tokens <= remaining:
+            parts.append(document)
+            used += tokens
+            stats["documents_used"] += 1
+        elif remaining >= settings.CHATBOT_MIN_DOCUMENT_TOKENS:
+            parts.append(truncate_tokens(document, remaining, CHAT_MODEL))
+            used = budget
+            stats["documents_truncated"] += 1
+        else:
+            stats["documents_dropped"] += 1
+
+    stats["context_tokens"] = used
+    final_context = "\n\n".join(parts).strip()
+    if not final_context:
+        final_context = "No relevant information found in the knowledge base."
+    return final_context, stats
+
+
+def record_prompt_size(prompt, stats):
+    """Records the token counts of a prompt so prompt size can be tracked over time."""
+    prompt_tokens = count_tokens(prompt, CHAT_MODEL)
+    metrics.incr_many(
+        {
+            "chatbot.prompts": 1,
+            "chatbot.prompt_tokens": prompt_tokens,
+            "chatbot.context_tokens": stats["context_tokens"],
+            "chatbot.documents_truncated": stats["documents_truncated"],
+            "chatbot.documents_dropped": stats["documents_dropped"],
+        }
+    )
+    logger.info(f"Chatbot prompt: {prompt_tokens} tokens ({stats})")
+
+
+def get_prompt_stats():
+    """Returns the average prompt and context size of the chatbot requests."""
+    counters = metrics.get_counters(
+        "chatbot.prompts", "chatbot.prompt_tokens", "chatbot.context_tokens", "chatbot.documents_truncated", "chatbot.documents_dropped"
+    )
+    prompts = counters["chatbot.prompts"]
+    return {
+        "prompts": prompts,
+        "avg_prompt_tokens": metrics.ratio(counters["chatbot.prompt_tokens"], prompts),
+        "avg_context_tokens": metrics.ratio(counters["chatbot.context_tokens"], prompts),
+        "documents_truncated": counters["chatbot.documents_truncated"],
+        "documents_dropped": counters["chatbot.documents_dropped"],
+    }
+
+
+async def aprepare_answer(query):
+    """
+    Returns ``(cached_answer, prompt, embedding)`` for a query.
+
+    The query is embedded once; a close enough previously answered question
+    short-circuits with its cached answer. Otherwise the embedding is reused
+    for retrieval, while the DB context lookups run concurrently.
+    """
+    special_context_task = asyncio.ensure_future(aget_special_context())
+    try:
+        embedding = await aembed_text(query)
+        cached_answer = await semantic_cache.alookup(embedding)
+        if cached_answer is not None:
+            return cached_answer, None, embedding
+
+        results = await aquery_nodes(query, n_results=4, embedding=embedding)
+        documents = results["documents"][0] if results.get("documents") else []
+        prompt = await aprepare_prompt(query, await special_context_task, documents)
+        return None, prompt, embedding
+    finally:
+        special_context_task.cancel()  # No-op unless we returned a cached answer
+
+
+def build_prompt(query, context):
+    """Builds the LLM prompt, including the privacy guardrails."""
+    return (
+        f"You are a helpful AI assistant for Md Mushfiqur Rahman's personal portfolio website. "
+        f"Your tone should be professional, friendly, and concise. "
+        f"Answer the user's question based ONLY on the following context. "
+        f"If you are asked for a personal phone number, physical address, \
+        or any other private contact detail not explicitly listed in the context, \
+        you MUST politely refuse and state that the best way to connect is via the professional links like email or LinkedIn."
+        f"If the context doesn't contain the answer to a general question, \
+        state that you don't have that specific information and suggest they ask about his skills, projects, or experience.\n\n"
+        f"Do NOT answer anything that is not related to Md Mushfiqur Rahman's personal portfolio website and personal information.\n\n"
+        f"Use bullet points to answer the question when possible.\n\n"
+        f"---CONTEXT---\n{context}\n\n"
+        f"---QUESTION---\n{query}\n\n"
+        f"---ANSWER---\n"
+    )
+
+
+def prepare_prompt(query, special_context, documents):
+    """Packs the context into the token budget, builds the prompt and records its size."""
+    context, stats = pack_context(special_context, documents)
+    prompt = build_prompt(query, context)
+    record_prompt_size(prompt, stats)
+    return prompt
+
+
+# Tokenizing and the metrics writes block, so they run off the event loop
+aprepare_prompt = sync_to_async(prepare_prompt, thread_sensitive=False)
+
+
+def _completion_kwargs(prompt):
+    return {
+        "model": CHAT_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": CHAT_MAX_TOKENS,
+        "temperature": CHAT_TEMPERATURE,
+    }
+
+
+async def agenerate_answer(prompt):
+    """Calls the OpenAI API and returns the complete answer."""
+    completion = await clients.get_async_openai_client().chat.completions.create(**_completion_kwargs(prompt))
+    return completion.choices[0].message.content
+
+
+async def astream_answer(prompt):
+    """Calls the OpenAI API in streaming mode and yields the answer deltas as they arrive."""
+    stream = await clients.get_async_openai_client().chat.completions.create(stream=True, **_completion_kwargs(prompt))
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+async def answer_query(query, session_id):
+    """
+    Answers a chatbot query and returns ``(answer, session_id)``.
+
+    Both messages go to the write-behind buffer, so the only serial steps are
+    context gathering and the LLM call.
+    """
+    started_at = time.perf_counter()
+    session_id = resolve_session_id(session_id)
+    await aenqueue_message(session_id, "user", query)
+
+    answer, prompt, embedding = await aprepare_answer(query)
+    if answer is None:
+        answer = await agenerate_answer(prompt)
+        await semantic_cache.astore(embedding, answer, (time.perf_counter() - started_at) * 1000)
+
+    await aenqueue_message(session_id, "bot", answer)
+    return answer, session_id
+
+
+def sse_event(event, data):
+    """Formats a single Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def astream_chat_events(query, session_id):
+    """
+    Yields the Server-Sent Events for a streamed chatbot answer.
+
+    The first frame carries the session ID, followed by one ``delta`` frame per
+    OpenAI token chunk and a final ``done`` frame. The full answer is saved as a
+    single bot message once the stream ends.
+    """
+    started_at = time.perf_counter()
+    session_id = resolve_session_id(session_id)
+    prepare_task = asyncio.ensure_future(aprepare_answer(query))
+
+    parts = []
+    try:
+        # Saved before the first frame, so a client disconnecting right after it keeps its message
+        await aenqueue_message(session_id, "user", query)
+        yield sse_event("session", {"session_id": str(session_id)})
+
+        cached_answer, prompt, embedding = await prepare_task
+        if cached_answer is not None:
+            parts.append(cached_answer)
+            yield sse_event("delta", {"content": cached_answer})
+        else:
+            async for delta in astream_answer(prompt):
+                parts.append(delta)
+                yield sse_event("delta", {"content": delta})
+            await semantic_cache.astore(embedding, "".join(parts), (time.perf_counter() - started_at) * 1000)
+        yield sse_event("done", {"session_id": str(session_id)})
+    except Exception as e:
+        logger.error(f"Chatbot streaming error: {e}", exc_info=True)
+        yield sse_event("error", {"error": "An internal error occurred while processing your request."})
+    finally:
+        prepare_task.cancel()
+        await asyncio.gather(prepare_task, return_exceptions=True)
+        # Save whatever was generated, even if the client disconnected mid-stream
+        if parts:
+            await aenqueue_message(session_id, "bot", "".join(parts))
@@ -1,66 +1,243 @@
 # backend/api/chromadb_utils.py
 
-import os
+import asyncio
+import logging
+import random
+import time
 
-import chromadb
+import openai
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from openai import OpenAI
+
+from . import clients, embedding_cache, embeddings, index_versions, metrics, vector_store
+from .documents import Document, split_document
+from .tokens import count_tokens
+
+logger = logging.getLogger(__name__)
 
 # --- Configuration ---
 CHROMA_COLLECTION = "portfolio_knowledge"
-# Use the Docker service name for inter-container communication by default,
-# but allow overriding via environment variables for CI/CD.
-CHROMA_HOST = os.environ.get("CHROMA_HOST", "chromadb")
-CHROMA_PORT = int(os.environ.get("CHROMA_PORT", 8000))
 
 
 def get_chroma_client():
-    """Returns a ChromaDB HTTP client."""
-    return chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+    """Returns the pooled ChromaDB HTTP client of this process."""
+    return clients.get_chroma_client()
+
+
+def get_base_collection_name():
+    """Each embedding backend has its own vector space, so non-OpenAI backends get their own collection."""
+    if settings.EMBEDDING_BACKEND == "openai":
+        return CHROMA_COLLECTION
+    return f"{CHROMA_COLLECTION}_{settings.EMBEDDING_BACKEND}"
+
+
+def get_collection_name():
+    """Name of the active version of the main collection (see api/index_versions.py)."""
+    return index_versions.get_active_name(get_base_collection_name())
+
+
+def get_collection(name=None):
+    """Gets or creates a collection (by default the active main one) of the configured vector store; handles are cached per process."""
+    name = name or get_collection_name()
+    if settings.VECTOR_STORE_BACKEND == "local":
+        return vector_store.get_local_collection(name)
+    return clients.get_collection(name)
+
+
+def drop_collection(name):
+    """Deletes a collection of the configured vector store."""
+    if settings.VECTOR_STORE_BACKEND == "local":
+        vector_store.drop_local_collection(name)
+    else:
+        clients.drop_collection(name)
+
 
+def warm_up():
+    """Opens the client connection pools and the collection ahead of the first request; failures are only logged."""
+    clients.warm_up()
+    try:
+        get_collection().count()
+    except Exception as e:
+        logger.warning(f"Vector store warm-up failed: {e}")
 
-def get_collection():
-    """Gets or creates the main ChromaDB collection."""
-    client = get_chroma_client()
-    return client.get_or_create_collection(CHROMA_COLLECTION)
+    if settings.EMBEDDING_BACKEND != "openai":
+        try:
+            # Loads the local model (and runs its first, slowest inference) before traffic arrives
+            embeddings.get_provider().embed(["warm-up"])
+        except Exception as e:
+            logger.warning(f"Embedding model warm-up failed: {e}")
 
 
-def embed_text(text):
-    """Generates an embedding for the given text using OpenAI."""
+def embed_text(text, telemetry=None):
+    """
+    Generates an embedding for the given text with the configured provider, reusing cached vectors.
+    Returns ``None`` on failure, which is also recorded in ``telemetry`` (an ``IndexTelemetry``) when given.
+    """
+    provider = embeddings.get_provider()
+    cached = embedding_cache.lookup(provider.name, text)
+    if cached is not None:
+        return cached
     try:
-        # Ensure OPENAI_API_KEY is set, especially for CI environments
-        api_key = settings.OPENAI_API_KEY
-        if not api_key:
-            print("Warning: OPENAI_API_KEY is not set. Embedding will fail.")
+        embedding = provider.embed([text])[0]
+        embedding_cache.store(provider.name, text, embedding)
+        return embedding
+    except Exception as e:
+        logger.exception(f"Error generating embedding: {e}")
+        metrics.incr("embeddings.failures")
+        if telemetry is not None:
+            telemetry.record_failure("embed", [], e)
+        return None
+
+
+def embed_texts(texts, max_retries=0, stats=None):
+    """
+    Batch counterpart of ``embed_text``: cached vectors are reused and all misses
+    are embedded with a single provider call. Returns ``None`` if that call fails.
+
+    Rate-limited (429) calls are retried up to ``max_retries`` times with
+    exponential backoff and full jitter, on top of the client's own retries.
+    A ``stats`` dict receives the indexes of the texts sent to the provider
+    (``"embedded"``) and, on failure, the ``"error"``.
+    """
+    provider = embeddings.get_provider()
+    vectors = [embedding_cache.lookup(provider.name, text) for text in texts]
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    stats = {} if stats is None else stats
+    stats["embedded"] = missing
+    if not missing:
+        return vectors
+
+    attempt = 0
+    while True:
+        try:
+            embedded = provider.embed([texts[i] for i in missing])
+            break
+        except openai.RateLimitError as e:
+            if attempt >= max_retries:
+                logger.exception(f"Error generating embeddings for a batch of {len(missing)} texts, still rate limited: {e}")
+                stats["error"] = e
+                metrics.incr("embeddings.failures")
+                return None
+            time.sleep(random.uniform(0, min(settings.EMBEDDING_RETRY_MAX_DELAY, settings.EMBEDDING_RETRY_BASE_DELAY * 2**attempt)))
+            attempt += 1
+        except Exception as e:
+            logger.exception(f"Error generating embeddings for a batch of {len(missing)} texts: {e}")
+            stats["error"] = e
+            metrics.incr("embeddings.failures")
             return None
-        client = OpenAI(api_key=api_key)
-        resp = client.embeddings.create(input=[text], model="text-embedding-3-small")
-        return resp.data[0].embedding
+
+    for i, embedding in zip(missing, embedded):
+        vectors[i] = embedding
+        embedding_cache.store(provider.name, texts[i], embedding)
+    return vectors
+
+
+async def aembed_text(text, telemetry=None):
+    """Async counterpart of ``embed_text`` for the ASGI request path."""
+    provider = embeddings.get_provider()
+    cached = await sync_to_async(embedding_cache.lookup, thread_sensitive=False)(provider.name, text)
+    if cached is not None:
+        return cached
+    try:
+        embedding = (await provider.aembed([text]))[0]
+        await sync_to_async(embedding_cache.store, thread_sensitive=False)(provider.name, text, embedding)
+        return embedding
     except Exception as e:
-        print(f"Error generating embedding: {e}")
+        logger.exception(f"Error generating embedding: {e}")
+        # A Redis round trip, kept off the event loop like the cache I/O above
+        await sync_to_async(metrics.incr, thread_sensitive=False)("embeddings.failures")
+        if telemetry is not None:
+            telemetry.record_failure("embed", [], e)
         return None
 
 
 def add_or_update_node(doc_id, content, metadata):
-    """Adds a new node or updates an existing one in ChromaDB."""
-    collection = get_collection()
-    embedding = embed_text(content)
-    if embedding:
-        collection.upsert(ids=[doc_id], embeddings=[embedding], documents=[content], metadatas=[metadata])
+    """Adds a new node or replaces an existing one (and all of its chunks) in ChromaDB. Returns whether it was written."""
+    if upsert_nodes([Document(doc_id, content, metadata)]):
         print(f"Successfully upserted node: {doc_id}")
+        return True
+    return False
+
+
+def upsert_nodes(documents):
+    """Chunks and embeds ``(doc_id, content, metadata)`` documents in one batch and writes their chunks. Returns the number of documents written."""
+    if not documents:
+        return 0
+    chunks = chunk_documents(documents)
+    vectors = embed_texts([chunk.content for chunk in chunks])
+    if not vectors:
+        return 0
+    return write_nodes(chunks, vectors)
+
+
+def chunk_documents(documents):
+    """Splits documents into the chunks that are actually embedded and stored."""
+    return [chunk for document in documents for chunk in split_document(Document(*document))]
+
+
+def write_nodes(chunks, vectors, collection=None):
+    """
+    Writes embedded chunks with a single upsert, then drops the chunks their parent
+    documents no longer have (after a document shrank) with a single delete.
+    """
+    collection = collection or get_collection()
+    doc_ids, contents, metadatas = zip(*chunks)
+    collection.upsert(ids=list(doc_ids), embeddings=vectors, documents=list(contents), metadatas=list(metadatas))
+
+    chunk_counts = {metadata["parent_id"]: metadata["chunks"] for metadata in metadatas}
+    stale = [{"$and": [{"parent_id": parent_id}, {"chunk": {"$gte": count}}]} for parent_id, count in chunk_counts.items()]
+    collection.delete(where=stale[0] if len(stale) == 1 else {"$or": stale})
+    return len(chunk_counts)
+
+
+def batch_documents(documents, max_count=None, max_tokens=None):
+    """
+    Groups documents into batches of at most ``max_count`` documents and
+    ``max_tokens`` content tokens (a single larger document gets a batch of its own).
+    """
+    max_count = max_count or settings.EMBEDDING_BATCH_SIZE
+    max_tokens = max_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+    batch, batch_tokens = [], 0
+    for document in documents:
+        tokens = count_tokens(document[1], embeddings.OPENAI_EMBEDDING_MODEL)
+        if batch and (len(batch) >= max_count or batch_tokens + tokens > max_tokens):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(document)
+        batch_tokens += tokens
+    if batch:
+        yield batch
 
 
 def delete_node(doc_id):
-    """Deletes a node from ChromaDB by its ID."""
+    """Deletes a node, i.e. all of its chunks, from ChromaDB by its ID."""
     collection = get_collection()
     try:
-        collection.delete(ids=[doc_id])
+        collection.delete(where={"parent_id": doc_id})
         print(f"Successfully deleted node: {doc_id}")
     except Exception as e:
         # ChromaDB can raise an error if the ID doesn't exist, which is fine.
         print(f"Could not delete node {doc_id} (it may not exist): {e}")
 
 
+def delete_nodes(doc_ids):
+    """Deletes several nodes, with all of their chunks, in a single call."""
+    delete_nodes_where({"parent_id": {"$in": list(doc_ids)}})
+
+
+def delete_nodes_of_type(doc_type, exclude_id=None):
+    """Deletes every node of a content type (e.g. "resume"), optionally except the one with model id ``exclude_id``."""
+    where = {"type": doc_type}
+    if exclude_id is not None:
+        where = {"$and": [where, {"id": {"$ne": str(exclude_id)}}]}
+    delete_nodes_where(where)
+
+
+def delete_nodes_where(where):
+    """Deletes all chunks whose metadata matches a Chroma ``where`` filter, in a single call."""
+    get_collection().delete(where=where)
+
+
 def query_nodes(query, n_results=4):
     """Queries the collection for the most relevant nodes."""
     collection = get_collection()
@@ -69,3 +246,20 @@ def query_nodes(query, n_results=4):
         return {"documents": [[]]}  # Return empty structure on embedding failure
     results = collection.query(query_embeddings=[embedding], n_results=n_results)
     return results
+
+
+async def aquery_nodes(query, n_results=4, embedding=None):
+    """
+    Async counterpart of ``query_nodes``.
+
+    The embedding request (skipped when ``embedding`` is already known) and the
+    collection lookup run concurrently; the Chroma HTTP client is synchronous,
+    so its calls are moved off the event loop.
+    """
+    if embedding is None:
+        embedding, collection = await asyncio.gather(aembed_text(query), asyncio.to_thread(get_collection))
+    else:
+        collection = await asyncio.to_thread(get_collection)
+    if not embedding:
+        return {"documents": [[]]}  # Return empty structure on embedding failure
+    return await asyncio.to_thread(collection.query, query_embeddings=[embedding], n_results=n_results)
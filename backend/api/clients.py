@@ -0,0 +1,206 @@
+# backend/api/clients.py
+
+import asyncio
+import logging
+import os
+import threading
+import weakref
+
+import chromadb
+import httpx
+from chromadb.config import Settings as ChromaSettings
+from django.conf import settings
+from openai import AsyncOpenAI, OpenAI
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Use the Docker service name for inter-container communication by default,
+# but allow overriding via environment variables for CI/CD.
+CHROMA_HOST = os.environ.get("CHROMA_HOST", "chromadb")
+CHROMA_PORT = int(os.environ.get("CHROMA_PORT", 8000))
+
+_lock = threading.RLock()
+_clients = {}
+_async_openai_clients = weakref.WeakKeyDictionary()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """A pooled ``requests`` adapter that applies a default timeout to every request."""
+
+    def __init__(self, timeout, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def _httpx_options():
+    return {
+        "timeout": httpx.Timeout(settings.OPENAI_TIMEOUT, connect=settings.OPENAI_CONNECT_TIMEOUT),
+        "limits": httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_CONNECTIONS,
+        ),
+    }
+
+
+def _get_or_build(name, builder):
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = builder()
+    return client
+
+
+def _build_openai_client():
+    return OpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        max_retries=settings.OPENAI_MAX_RETRIES,
+        http_client=httpx.Client(**_httpx_options()),
+    )
+
+
+def _build_chroma_client():
+    client = chromadb.HttpClient(
+        host=CHROMA_HOST,
+        port=CHROMA_PORT,
+        settings=ChromaSettings(anonymized_telemetry=False),
+    )
+    # The Chroma 0.4 HTTP client keeps a requests.Session; give it a bounded keep-alive pool and timeouts.
+    session = getattr(client, "_session", None)
+    if session is not None:
+        adapter = TimeoutHTTPAdapter(
+            timeout=(settings.CHROMA_CONNECT_TIMEOUT, settings.CHROMA_TIMEOUT),
+            pool_connections=settings.CHROMA_POOL_SIZE,
+            pool_maxsize=settings.CHROMA_POOL_SIZE,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+    return client
+
+
+def get_openai_client():
+    """Returns the process-wide OpenAI client with a keep-alive connection pool."""
+    return _get_or_build("openai", _build_openai_client)
+
+
+async def _close_with_loop(client):
+    """
+    Closes ``client`` when its event loop shuts down.
+
+    An event loop has no close callback, but ``asyncio.run`` (and so uvicorn and
+    ``async_to_sync``) finalizes the async generators still alive on the loop
+    before closing it: this one closes the client's connections on its own loop
+    and forgets the client.
+    """
+    try:
+        yield
+    finally:
+        _async_openai_clients.pop(asyncio.get_running_loop(), None)
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Could not close the AsyncOpenAI client: {e}")
+
+
+def get_async_openai_client():
+    """
+    Returns the AsyncOpenAI client for the running event loop.
+
+    Async connection pools are bound to the loop that created them, so one
+    client is kept per loop and closed with it. Under the uvicorn workers a
+    single loop serves every request, so its pool is reused (and warmed up at
+    startup, see ``awarm_up``); under WSGI (e.g. runserver) each ``async_to_sync``
+    call runs its own loop, so a client only lives for one request.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _async_openai_clients.get(loop)
+    if entry is None:
+        client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            http_client=httpx.AsyncClient(**_httpx_options()),
+        )
+        closer = _close_with_loop(client)
+        # Starting the generator registers it with the loop, which only keeps a weak reference to it
+        asyncio.ensure_future(anext(closer))
+        entry = _async_openai_clients[loop] = (client, closer)
+    return entry[0]
+
+
+def get_chroma_client():
+    """Returns the process-wide ChromaDB HTTP client."""
+    return _get_or_build("chroma", _build_chroma_client)
+
+
+def get_collection(name):
+    """Returns the cached handle of a ChromaDB collection, creating the collection on first use."""
+    return _get_or_build(f"collection:{name}", lambda: get_chroma_client().get_or_create_collection(name))
+
+
+def drop_collection(name):
+    """Deletes a ChromaDB collection, if it exists, and forgets its cached handle."""
+    with _lock:
+        _clients.pop(f"collection:{name}", None)
+    try:
+        get_chroma_client().delete_collection(name)
+    except Exception as e:
+        # The server also answers with an error for a collection that does not exist
+        logger.warning(f"Could not delete ChromaDB collection {name}: {e}")
+
+
+def reset():
+    """
+    Drops every cached client so they are rebuilt lazily on next use.
+
+    Runs automatically in forked children, since sockets must not be shared
+    between the gunicorn master and its workers.
+    """
+    global _lock
+    _lock = threading.RLock()
+    _clients.clear()
+    _async_openai_clients.clear()
+
+
+def warm_up():
+    """
+    Builds the OpenAI and ChromaDB clients and opens their connections ahead of the first request.
+
+    Meant to be called once per worker at boot. Failures are logged and never
+    raised, so a slow dependency cannot keep a worker from starting. The
+    AsyncOpenAI client belongs to the event loop serving requests, which does
+    not run yet at that point: see ``awarm_up``.
+    """
+    if settings.OPENAI_API_KEY:
+        try:
+            get_openai_client().models.list()
+        except Exception as e:
+            logger.warning(f"OpenAI warm-up failed: {e}")
+    if settings.VECTOR_STORE_BACKEND != "local":
+        try:
+            get_chroma_client().heartbeat()
+        except Exception as e:
+            logger.warning(f"ChromaDB warm-up failed: {e}")
+
+
+async def awarm_up():
+    """
+    Builds the AsyncOpenAI client of the running event loop and opens its connections.
+
+    Runs at ASGI lifespan startup (see core/asgi.py), on the loop that then serves
+    requests. Failures are logged and never raised, like in ``warm_up``.
+    """
+    if settings.OPENAI_API_KEY:
+        try:
+            await get_async_openai_client().models.list()
+        except Exception as e:
+            logger.warning(f"Async OpenAI warm-up failed: {e}")
+
+
+os.register_at_fork(after_in_child=reset)
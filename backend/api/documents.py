@@ -0,0 +1,239 @@
+# backend/api/documents.py
+
+import functools
+import os
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+
+from .tokens import count_tokens
+from .utils import clean_html, extract_pdf_text
+
+CHUNK_ID = "{doc_id}#chunk-{index}"
+
+
+class Document(NamedTuple):
+    """A knowledge-base entry, in the argument order of ``add_or_update_node``."""
+
+    doc_id: str
+    content: str
+    metadata: dict
+
+
+def get_doc_id(instance):
+    """Generates a unique document ID for a model instance."""
+    return f"{instance.__class__.__name__.lower()}-{instance.id}"
+
+
+def get_metadata(instance, title_field="title", url_path=None):
+    """Generates metadata for a model instance."""
+    title = getattr(instance, title_field, None) or getattr(instance, "name", "Untitled")
+    return {
+        "type": instance.__class__.__name__.lower(),
+        "title": str(title),
+        "id": str(instance.id),
+        "url": f"/{url_path}/{instance.id}/" if url_path else "",
+    }
+
+
+# --- Static Content ---
+
+# About Me Content (taken from your About.tsx)
+ABOUT_ME_TEXT = """
+Hello! I'm Md Mushfiqur Rahman, a full-stack data scientist with around 3 years of professional experience. \
+I strive to tackle real-world challenges using my technical expertise in Data Science. \
+I thrive in environments where research work is valued alongside routine tasks, \
+constantly motivated to learn and stay updated with the latest tools and technologies in the ever-evolving data-driven world. \
+Currently, I serve as an AI/ML Team Lead, focusing on designing and implementing advanced Machine Learning and Generative AI systems. \
+My work involves leading the development of innovative AI solutions, \
+including architecting and deploying complex agentic AI systems and solutions built upon Large Language Models (LLMs). \
+I contribute to system design and ensure the smooth execution and deployment of AI-powered projects. \
+My core areas of interest include Statistics, Data Science, Machine Learning, Deep Learning, Generative AI, and Cryptocurrency. \
+I possess a solid understanding of various machine learning and deep learning algorithms, \
+always making an effort to keep pace with new tools and technologies in the AI domain. \
+I believe in "Learning is Surviving!" – a philosophy that guides my proactive approach to continuous professional development. \
+As an active learner, I constantly keep myself updated with AI trends and innovations by reading LinkedIn posts from top AI figures. \
+I participate in Kaggle contests and maintain a strong presence on LinkedIn and GitHub, \
+alongside conducting research work utilizing my knowledge in machine learning and deep learning. \
+I think like a Software Engineer and work like a Data Scientist, with a particular passion for collecting and analyzing datasets. \
+I am very passionate about my work, adhering strictly to schedules to ensure projects are completed before deadlines.
+I believe in ultimate professionalism in my work ethic.
+"""
+
+# Skills Content (matches the frontend)
+SKILLS = [
+    "Python",
+    "SQL",
+    "Go",
+    "HTML / CSS",
+    "C / C++",
+    "Flask / FastAPI / Streamlit",
+    "Django",
+    "React",
+    "Scikit-learn",
+    "TensorFlow",
+    "PyTorch",
+    "Keras",
+    "Langchain",
+    "LangGraph",
+    "Exploratory Data Analysis",
+    "Natural Language Processing (NLP)",
+    "Computer Vision",
+    "Statistics",
+    "Supervised ML",
+    "Unsupervised ML",
+    "Generative AI",
+    "Time-Series Forecasting",
+    "Hypothesis Testing",
+    "MLOps",
+    "MLflow",
+    "DVC",
+    "Airflow",
+    "AWS",
+    "Docker",
+    "Git & GitHub",
+    "CI/CD (GitHub Actions, CircleCI)",
+    "Nginx",
+    "Monitoring (Prometheus, Grafana)",
+    "Caching (Redis)",
+    "n8n",
+    "Web-scrapping (BeautifulSoup, Selenium)",
+]
+
+CONTACT_INFO_TEXT = """
+Contact Information for Md Mushfiqur Rahman:
+- Email: mushfiqur.rahman.robin@gmail.com
+- LinkedIn: https://linkedin.com/in/mushfiqur--rahman
+- GitHub: https://github.com/Mushfiqur-Rahman-Robin
+He can be reached for collaborations, inquiries, or general contact through these professional channels.
+"""
+
+
+def static_documents():
+    """Returns the knowledge-base entries that are not backed by a model."""
+    return [
+        Document("static-about-me", f"About Md Mushfiqur Rahman: {ABOUT_ME_TEXT}", {"type": "about", "title": "About Md Mushfiqur Rahman"}),
+        Document("static-skills", f"Md Mushfiqur Rahman's skills include: {', '.join(SKILLS)}.", {"type": "skills", "title": "Skills"}),
+        Document("static-contact-info", CONTACT_INFO_TEXT, {"type": "contact", "title": "Contact Information"}),
+    ]
+
+
+# --- Model Content ---
+
+
+def document_source(instance):
+    """
+    Collects what the document of a model instance is built from.
+
+    Returns a picklable ``(kind, doc_id, metadata, fields)`` tuple, so the
+    expensive text extraction in ``render_document`` can run in another process.
+    """
+    kind = instance._meta.model_name
+    if kind == "project":
+        fields = {"title": instance.title, "description": instance.description}
+        metadata = get_metadata(instance, url_path="projects")
+    elif kind == "experience":
+        fields = {"company_name": instance.company_name, "job_title": instance.job_title, "work_details": instance.work_details}
+        metadata = get_metadata(instance, title_field="company_name", url_path="experience")
+    elif kind == "certification":
+        fields = {"name": instance.name, "issuing_organization": instance.issuing_organization}
+        metadata = get_metadata(instance, title_field="name", url_path="certifications")
+    elif kind == "publication":
+        fields = {"title": instance.title, "authors": instance.authors, "conference": instance.conference}
+        metadata = get_metadata(instance, url_path="publications")
+    elif kind == "achievement":
+        fields = {"title": instance.title, "description": instance.description}
+        metadata = get_metadata(instance, url_path="achievements")
+    elif kind == "resume":
+        fields = {
+            "pdf_path": get_resume_path(instance),
+            "pdf_options": {
+                "cache_dir": settings.PDF_TEXT_CACHE_DIR,
+                "cache_max_bytes": settings.PDF_TEXT_CACHE_MAX_BYTES,
+                "workers": settings.PDF_EXTRACT_WORKERS,
+                "parallel_min_pages": settings.PDF_EXTRACT_PARALLEL_PAGES,
+            },
+        }
+        metadata = get_metadata(instance, url_path="resume")
+    else:
+        raise TypeError(f"{instance.__class__.__name__} is not indexed in the knowledge base.")
+    return kind, get_doc_id(instance), metadata, fields
+
+
+def render_document(kind, doc_id, metadata, fields):
+    """
+    Builds a document from the output of ``document_source``.
+
+    Needs neither the database nor the app registry. Returns ``None`` when
+    there is nothing to index (e.g. a resume whose PDF is missing or has no text).
+    """
+    if kind == "project":
+        # The description is a RichTextUploadingField, so clean the HTML
+        content = f"Project Title: {fields['title']}\nDescription: {clean_html(fields['description'])}"
+    elif kind == "experience":
+        # work_details stores HTML from CKEditor
+        content = f"Experience at {fields['company_name']} as {fields['job_title']}\nDetails: {clean_html(fields['work_details'])}"
+    elif kind == "certification":
+        content = f"Certification: {fields['name']}\nIssued by: {fields['issuing_organization']}"
+    elif kind == "publication":
+        content = f"Publication: {fields['title']}\nAuthors: {fields['authors']}\nConference: {fields['conference']}"
+    elif kind == "achievement":
+        content = f"Achievement: {fields['title']}\nDescription: {fields['description']}"
+    else:
+        content = extract_pdf_text(fields["pdf_path"], **fields["pdf_options"]) if os.path.exists(fields["pdf_path"]) else ""
+    return Document(doc_id, content, metadata) if content else None
+
+
+def render_document_timed(kind, doc_id, metadata, fields):
+    """``render_document``, also returning the seconds the text extraction took."""
+    started = time.perf_counter()
+    document = render_document(kind, doc_id, metadata, fields)
+    return document, time.perf_counter() - started
+
+
+def build_document(instance):
+    """Builds the knowledge-base entry of a model instance, or ``None`` if it has nothing to index."""
+    return render_document(*document_source(instance))
+
+
+def get_resume_path(resume):
+    return os.path.join(settings.MEDIA_ROOT, resume.pdf_file.name)
+
+
+# --- Chunking ---
+
+
+@functools.lru_cache(maxsize=None)
+def get_splitter(chunk_size, chunk_overlap):
+    # Imported here so extraction worker processes, which never chunk, do not load them
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from .embeddings import OPENAI_EMBEDDING_MODEL
+
+    # Sizes are in embedding-model tokens
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=lambda text: count_tokens(text, OPENAI_EMBEDDING_MODEL),
+    )
+
+
+def split_document(document):
+    """
+    Splits a document into chunks of at most ``INDEX_CHUNK_SIZE`` tokens.
+
+    Every document yields at least one chunk. Chunks get the ids
+    ``{doc_id}#chunk-{i}`` and carry the parent metadata plus ``parent_id``,
+    ``chunk`` (the index) and ``chunks`` (the count), so all chunks of a parent
+    can be found and replaced with a single ``where`` filter.
+    """
+    texts = get_splitter(settings.INDEX_CHUNK_SIZE, settings.INDEX_CHUNK_OVERLAP).split_text(document.content) or [document.content]
+    return [
+        Document(
+            CHUNK_ID.format(doc_id=document.doc_id, index=index),
+            text,
+            {**document.metadata, "parent_id": document.doc_id, "chunk": index, "chunks": len(texts)},
+        )
+        for index, text in enumerate(texts)
+    ]
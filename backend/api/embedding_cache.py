@@ -0,0 +1,120 @@
+# backend/api/embedding_cache.py
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LocalLRUCache:
+    """A thread-safe in-process LRU cache that evicts by the total size of its values in bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self.current_bytes -= len(self._data.pop(key))
+            self._data[key] = value
+            self.current_bytes += len(value)
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+
+local_cache = LocalLRUCache(settings.EMBEDDING_CACHE_LOCAL_MAX_BYTES)
+
+
+def make_key(model, text):
+    """Builds the cache key for an embedding from the model name and a hash of the text."""
+    return f"embedding:{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+def _to_bytes(embedding):
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def _from_bytes(value):
+    return np.frombuffer(value, dtype=np.float32).tolist()
+
+
+def lookup(model, text):
+    """
+    Returns the cached embedding for ``text``, or ``None``.
+
+    The in-process LRU is checked first, then the shared Redis store; Redis hits
+    are promoted into the local tier. Hit and miss counts are buffered in process
+    memory, so a local hit makes no network call.
+    """
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    key = make_key(model, text)
+    value = local_cache.get(key)
+    if value is not None:
+        metrics.incr_buffered("embedding_cache.local_hits")
+        return _from_bytes(value)
+
+    try:
+        value = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Embedding cache lookup failed: {e}")
+        value = None
+    if value is not None:
+        local_cache.set(key, value)
+        metrics.incr_buffered("embedding_cache.shared_hits")
+        return _from_bytes(value)
+
+    metrics.incr_buffered("embedding_cache.misses")
+    return None
+
+
+def store(model, text, embedding):
+    """Stores an embedding in both tiers as compact float32 bytes."""
+    if not settings.EMBEDDING_CACHE_ENABLED or not embedding:
+        return
+    key = make_key(model, text)
+    value = _to_bytes(embedding)
+    local_cache.set(key, value)
+    try:
+        cache.set(key, value, timeout=settings.EMBEDDING_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Embedding cache store failed: {e}")
+
+
+def get_stats():
+    """Returns the hit and miss counters of both cache tiers."""
+    counters = metrics.get_counters("embedding_cache.local_hits", "embedding_cache.shared_hits", "embedding_cache.misses")
+    hits = counters["embedding_cache.local_hits"] + counters["embedding_cache.shared_hits"]
+    return {
+        "local_hits": counters["embedding_cache.local_hits"],
+        "shared_hits": counters["embedding_cache.shared_hits"],
+        "misses": counters["embedding_cache.misses"],
+        "hit_rate": metrics.ratio(hits, hits + counters["embedding_cache.misses"]),
+        "local_size_bytes": local_cache.current_bytes,
+    }
@@ -0,0 +1,146 @@
+# backend/api/embeddings.py
+
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from . import clients
+
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+class EmbeddingProvider(ABC):
+    """
+    Turns texts into embedding vectors.
+
+    ``name`` identifies the embedding space (it keys the embedding cache), so
+    two providers must only share a name if their vectors are interchangeable.
+    """
+
+    name = None
+
+    @abstractmethod
+    def embed(self, texts):
+        """Returns one embedding (a list of floats) per text, in order."""
+
+    async def aembed(self, texts):
+        """Async counterpart of ``embed``; runs it in a worker thread by default."""
+        return await asyncio.to_thread(self.embed, texts)
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """Embeddings from the OpenAI API, through the pooled clients."""
+
+    def __init__(self, model=OPENAI_EMBEDDING_MODEL):
+        self.model = self.name = model
+
+    def _check_api_key(self):
+        # Ensure OPENAI_API_KEY is set, especially for CI environments
+        if not settings.OPENAI_API_KEY:
+            raise RuntimeError("OPENAI_API_KEY is not set.")
+
+    def embed(self, texts):
+        self._check_api_key()
+        resp = clients.get_openai_client().embeddings.create(input=list(texts), model=self.model)
+        return [item.embedding for item in resp.data]
+
+    async def aembed(self, texts):
+        self._check_api_key()
+        resp = await clients.get_async_openai_client().embeddings.create(input=list(texts), model=self.model)
+        return [item.embedding for item in resp.data]
+
+
+class ONNXEmbeddingProvider(EmbeddingProvider):
+    """
+    Embeddings from a local sentence-embedding model run by onnxruntime on CPU.
+
+    ``model_path`` is a directory holding ``model.onnx`` and the matching
+    Hugging Face ``tokenizer.json`` (e.g. an export of all-MiniLM-L6-v2).
+    Token embeddings are mean-pooled over the attention mask and L2-normalized.
+    The model is loaded on first use, once per process.
+    """
+
+    def __init__(self, model_path, threads=1, batch_size=32, max_length=256):
+        self.model_path = Path(model_path)
+        self.name = f"onnx:{self.model_path.name}"
+        self.threads = threads
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self._session = None
+        self._tokenizer = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import onnxruntime
+                    from tokenizers import Tokenizer
+
+                    tokenizer = Tokenizer.from_file(str(self.model_path / "tokenizer.json"))
+                    tokenizer.enable_truncation(max_length=self.max_length)
+                    tokenizer.enable_padding()
+
+                    options = onnxruntime.SessionOptions()
+                    options.intra_op_num_threads = self.threads
+                    options.inter_op_num_threads = 1
+                    self._tokenizer = tokenizer
+                    self._session = onnxruntime.InferenceSession(
+                        str(self.model_path / "model.onnx"), sess_options=options, providers=["CPUExecutionProvider"]
+                    )
+        return self._session, self._tokenizer
+
+    def _embed_batch(self, session, tokenizer, texts):
+        encodings = tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask, "token_type_ids": np.zeros_like(input_ids)}
+        feed = {model_input.name: inputs[model_input.name] for model_input in session.get_inputs()}
+
+        output = session.run(None, feed)[0]
+        if output.ndim == 3:
+            # Token embeddings: mean-pool over the real (non-padding) tokens
+            mask = attention_mask[..., np.newaxis].astype(np.float32)
+            output = (output * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return output / np.clip(norms, 1e-12, None)
+
+    def embed(self, texts):
+        session, tokenizer = self._load()
+        texts = list(texts)
+        vectors = [self._embed_batch(session, tokenizer, texts[i : i + self.batch_size]) for i in range(0, len(texts), self.batch_size)]
+        return np.concatenate(vectors).astype(np.float32).tolist() if vectors else []
+
+
+def build_provider(backend):
+    """Builds the embedding provider for a backend name ("openai" or "onnx")."""
+    if backend == "openai":
+        return OpenAIEmbeddingProvider()
+    if backend == "onnx":
+        return ONNXEmbeddingProvider(
+            settings.EMBEDDING_ONNX_MODEL_PATH,
+            threads=settings.EMBEDDING_ONNX_THREADS,
+            batch_size=settings.EMBEDDING_ONNX_BATCH_SIZE,
+            max_length=settings.EMBEDDING_ONNX_MAX_LENGTH,
+        )
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider():
+    """Returns the process-wide provider of the configured ``EMBEDDING_BACKEND``."""
+    backend = settings.EMBEDDING_BACKEND
+    provider = _providers.get(backend)
+    if provider is None:
+        with _providers_lock:
+            provider = _providers.get(backend)
+            if provider is None:
+                provider = _providers[backend] = build_provider(backend)
+    return provider
@@ -0,0 +1,186 @@
+# backend/api/index_jobs.py
+
+import functools
+import logging
+import operator
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import index_manifest, semantic_cache
+from .chromadb_utils import delete_nodes, delete_nodes_of_type, write_nodes
+from .documents import document_source, get_doc_id, render_document_timed
+from .index_telemetry import IndexTelemetry
+from .indexing import EmbeddingPipeline
+from .models import IndexJob, Resume
+
+logger = logging.getLogger(__name__)
+
+SYNC = "sync"
+DELETE = "delete"
+
+
+def enqueue(doc_id, action, model="", object_id=""):
+    """
+    Queues the index job of a document, or re-arms its pending job.
+
+    Jobs are unique per document: saving the same object again within
+    ``INDEX_JOB_DEBOUNCE`` seconds replaces the action and pushes the run back,
+    so a burst of saves is indexed once.
+    """
+    now = timezone.now()
+    IndexJob.objects.bulk_create(
+        [
+            IndexJob(
+                doc_id=doc_id,
+                action=action,
+                model=model,
+                object_id=object_id,
+                enqueued_at=now,
+                run_after=now + timedelta(seconds=settings.INDEX_JOB_DEBOUNCE),
+                attempts=0,
+                last_error="",
+                failed_at=None,
+            )
+        ],
+        update_conflicts=True,
+        unique_fields=["doc_id"],
+        update_fields=["action", "model", "object_id", "enqueued_at", "run_after", "attempts", "last_error", "failed_at"],
+    )
+
+
+def enqueue_sync(instance):
+    """Queues the re-indexing of a saved instance once the current transaction commits."""
+    transaction.on_commit(functools.partial(enqueue, get_doc_id(instance), SYNC, instance._meta.label_lower, str(instance.pk)))
+
+
+def enqueue_delete(instance):
+    """Queues the removal of a deleted instance from the knowledge base once the current transaction commits."""
+    transaction.on_commit(functools.partial(enqueue, get_doc_id(instance), DELETE))
+
+
+def _load_documents(jobs, telemetry):
+    """Builds the documents of sync jobs; jobs whose instance is gone (or has nothing to index) become deletions."""
+    documents, deleted = [], []
+    by_model = {}
+    for job in jobs:
+        by_model.setdefault(job.model, []).append(job)
+    for label, model_jobs in by_model.items():
+        instances = {str(pk): instance for pk, instance in apps.get_model(label).objects.in_bulk([job.object_id for job in model_jobs]).items()}
+        for job in model_jobs:
+            document, seconds = render_document_timed(*document_source(instances[job.object_id])) if job.object_id in instances else (None, 0)
+            if document:
+                telemetry.record_extraction(document, seconds)
+                documents.append(document)
+            else:
+                deleted.append(job.doc_id)
+    return documents, deleted
+
+
+def _run(jobs, telemetry):
+    """Runs a batch of jobs: all syncs are embedded with one request and written with one upsert, all deletions with one delete."""
+    documents, deleted = _load_documents([job for job in jobs if job.action == SYNC], telemetry)
+    deleted += [job.doc_id for job in jobs if job.action == DELETE]
+    if documents:
+        _, chunks, vectors = EmbeddingPipeline(1, telemetry).embed(documents)
+        if not vectors:
+            error = next((failure["error"] for failure in reversed(telemetry.failures) if failure["stage"] == "embed"), "no embeddings returned")
+            raise RuntimeError(f"Could not embed {len(documents)} documents: {error}")
+        started = time.perf_counter()
+        write_nodes(chunks, vectors)
+        index_manifest.record(documents)
+        telemetry.record_write(documents, time.perf_counter() - started)
+    if deleted:
+        delete_nodes(deleted)
+        index_manifest.forget(deleted)
+    written = {document.doc_id for document in documents}
+    resume_jobs = [job for job in jobs if job.doc_id in written and job.model == Resume._meta.label_lower]
+    if resume_jobs:
+        # Only the latest saved resume is indexed: once it is written, drop all others with one
+        # filtered delete (a resume with nothing to index must not remove the indexed one)
+        latest = resume_jobs[-1]
+        delete_nodes_of_type("resume", exclude_id=latest.object_id)
+        index_manifest.forget(doc_id for doc_id in index_manifest.load() if doc_id.startswith("resume-") and doc_id != latest.doc_id)
+
+
+def _reschedule(job, error):
+    """Retries a failed job with exponential backoff, or gives up on it after ``INDEX_JOB_MAX_ATTEMPTS``."""
+    attempts = job.attempts + 1
+    delay = min(settings.INDEX_JOB_RETRY_MAX_DELAY, settings.INDEX_JOB_DEBOUNCE * 2**attempts)
+    failed_at = timezone.now() if attempts >= settings.INDEX_JOB_MAX_ATTEMPTS else None
+    if failed_at:
+        logger.error(f"Index job {job.doc_id} failed {attempts} times, giving up: {error}")
+    # A job re-armed by a save while it ran keeps its fresh state
+    IndexJob.objects.filter(pk=job.pk, enqueued_at=job.enqueued_at).update(
+        attempts=attempts, last_error=str(error), run_after=timezone.now() + timedelta(seconds=delay), failed_at=failed_at
+    )
+
+
+def process(batch_size=None):
+    """
+    Runs one batch of due index jobs: all syncs are embedded with one request and
+    written with one upsert, all deletions with one delete.
+
+    Only one worker should drain the queue at a time. When the batch fails, its
+    jobs are retried one by one so a bad document only holds back its own job;
+    failed jobs are retried with exponential backoff, and given up on (kept with
+    their last error) after ``INDEX_JOB_MAX_ATTEMPTS``. Timings, tokens and
+    failures are added to the ``index_jobs`` indexing counters. Returns the
+    number of jobs completed.
+    """
+    batch_size = batch_size or settings.INDEX_JOB_BATCH_SIZE
+    jobs = list(IndexJob.objects.filter(run_after__lte=timezone.now(), failed_at__isnull=True)[:batch_size])
+    if not jobs:
+        return 0
+
+    telemetry = IndexTelemetry("index_jobs")
+    errors = {}
+    try:
+        _run(jobs, telemetry)
+    except Exception as e:
+        logger.error(f"Index batch of {len(jobs)} jobs failed: {e}", exc_info=True)
+        if len(jobs) == 1:
+            errors[jobs[0].pk] = e
+        else:
+            # Only the outcome of the retries is reported
+            telemetry = IndexTelemetry("index_jobs")
+            for job in jobs:
+                try:
+                    _run([job], telemetry)
+                except Exception as job_error:
+                    logger.error(f"Index job {job.doc_id} failed: {job_error}")
+                    errors[job.pk] = job_error
+
+    for job in jobs:
+        if job.pk in errors:
+            if not any(job.doc_id in failure["doc_ids"] for failure in telemetry.failures):
+                telemetry.record_failure("write", [job.doc_id], errors[job.pk])
+            _reschedule(job, errors[job.pk])
+    telemetry.publish()
+
+    done = [job for job in jobs if job.pk not in errors]
+    if done:
+        # Answers cached before the knowledge base changed may now be wrong
+        semantic_cache.invalidate()
+        # Jobs re-armed by a save while this batch ran are kept for the next run
+        IndexJob.objects.filter(functools.reduce(operator.or_, (Q(pk=job.pk, enqueued_at=job.enqueued_at) for job in done))).delete()
+    return len(done)
+
+
+def run_worker(interval=None, batch_size=None):
+    """Processes due index jobs forever, polling every ``interval`` seconds when the queue is idle."""
+    interval = interval or settings.INDEX_JOB_INTERVAL
+    while True:
+        try:
+            while process(batch_size):
+                pass
+        except Exception as e:
+            logger.error(f"Index job worker failed, will retry: {e}", exc_info=True)
+        finally:
+            close_old_connections()
+        time.sleep(interval)
@@ -0,0 +1,51 @@
+# backend/api/index_manifest.py
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import embeddings
+from .chromadb_utils import get_collection_name
+from .models import IndexedDocument
+
+
+def content_hash(document):
+    """Hashes everything that ends up in the collection for a document: its content, metadata and chunking."""
+    chunking = [settings.INDEX_CHUNK_SIZE, settings.INDEX_CHUNK_OVERLAP]
+    payload = json.dumps([document.content, document.metadata, chunking], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load(collection=None):
+    """Returns ``{doc_id: (content_hash, embedding_model)}`` for a collection (by default the active one)."""
+    entries = IndexedDocument.objects.filter(collection=collection or get_collection_name()).values_list("doc_id", "content_hash", "embedding_model")
+    return {doc_id: (digest, model) for doc_id, digest, model in entries}
+
+
+def is_current(entry, document):
+    """Whether a manifest entry matches the document as it would be indexed now."""
+    return entry == (content_hash(document), embeddings.get_provider().name)
+
+
+def record(documents, collection=None):
+    """Records documents as indexed with the current embedding provider."""
+    collection, model, now = collection or get_collection_name(), embeddings.get_provider().name, timezone.now()
+    IndexedDocument.objects.bulk_create(
+        [
+            IndexedDocument(collection=collection, doc_id=document.doc_id, content_hash=content_hash(document), embedding_model=model, indexed_at=now)
+            for document in documents
+        ],
+        update_conflicts=True,
+        unique_fields=["collection", "doc_id"],
+        update_fields=["content_hash", "embedding_model", "indexed_at"],
+    )
+
+
+def forget(doc_ids=None, collection=None):
+    """Drops the manifest entries of ``doc_ids``, or of the whole collection."""
+    entries = IndexedDocument.objects.filter(collection=collection or get_collection_name())
+    if doc_ids is not None:
+        entries = entries.filter(doc_id__in=list(doc_ids))
+    entries.delete()
@@ -0,0 +1,144 @@
+# backend/api/index_telemetry.py
+
+import logging
+import threading
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Estimated USD per million input tokens; local models are free
+EMBEDDING_PRICES_PER_MILLION = {
+    "text-embedding-3-small": 0.02,
+    "text-embedding-3-large": 0.13,
+    "text-embedding-ada-002": 0.10,
+}
+
+# Indexing paths with shared counters: the index_content command and the signal-driven index jobs
+PATHS = ("index_content", "index_jobs")
+COUNTERS = ("runs", "documents", "chunks", "tokens", "billed_tokens", "cost_microusd", "failures", "extract_ms", "embed_ms", "write_ms")
+
+
+def estimate_cost(model, tokens):
+    """Estimated embedding cost in USD of ``tokens`` input tokens of ``model``."""
+    return tokens * EMBEDDING_PRICES_PER_MILLION.get(model, 0.0) / 1_000_000
+
+
+class IndexTelemetry:
+    """
+    Collects the timings, token counts and failures of one indexing run, per document.
+
+    Batch-level embedding and write times are attributed to the documents of the
+    batch in proportion to their tokens. Safe to use from the embedding threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.documents = {}
+        self.models = {}
+        self.failures = []
+        self._lock = threading.Lock()
+
+    def _document(self, document):
+        entry = self.documents.get(document.doc_id)
+        if entry is None:
+            entry = self.documents[document.doc_id] = {
+                "type": document.metadata.get("type", ""),
+                "chunks": 0,
+                "tokens": 0,
+                "extract_ms": 0.0,
+                "embed_ms": 0.0,
+                "write_ms": 0.0,
+            }
+        return entry
+
+    def _spread(self, batch, stage, seconds):
+        entries = [self._document(document) for document in batch]
+        weights = [entry["tokens"] or 1 for entry in entries]
+        for entry, weight in zip(entries, weights):
+            entry[stage] += seconds * 1000 * weight / sum(weights)
+
+    def record_extraction(self, document, seconds):
+        with self._lock:
+            self._document(document)["extract_ms"] += seconds * 1000
+
+    def record_embedding(self, model, batch, chunks, chunk_tokens, billed_tokens, seconds):
+        """Records an embedded batch: ``chunk_tokens`` per chunk, of which ``billed_tokens`` were sent to the provider (cache misses)."""
+        parents = {document.doc_id: document for document in batch}
+        with self._lock:
+            for chunk, tokens in zip(chunks, chunk_tokens):
+                entry = self._document(parents[chunk.metadata["parent_id"]])
+                entry["chunks"] += 1
+                entry["tokens"] += tokens
+            usage = self.models.setdefault(model, {"tokens": 0, "billed_tokens": 0})
+            usage["tokens"] += sum(chunk_tokens)
+            usage["billed_tokens"] += billed_tokens
+            self._spread(batch, "embed_ms", seconds)
+
+    def record_write(self, batch, seconds):
+        with self._lock:
+            self._spread(batch, "write_ms", seconds)
+
+    def record_failure(self, stage, doc_ids, error):
+        with self._lock:
+            self.failures.append({"stage": stage, "doc_ids": list(doc_ids), "error": str(error)})
+        logger.error(f"Indexing {stage} failed for {len(doc_ids)} document(s): {error}")
+
+    def summary(self, top=10):
+        """Returns the run totals, per-model usage and cost, failures, and the slowest and largest documents."""
+        with self._lock:
+            documents = [{"doc_id": doc_id, **entry} for doc_id, entry in self.documents.items()]
+            models = {
+                model: {**usage, "estimated_cost_usd": round(estimate_cost(model, usage["billed_tokens"]), 6)} for model, usage in self.models.items()
+            }
+            failures = list(self.failures)
+        for document in documents:
+            document["total_ms"] = document["extract_ms"] + document["embed_ms"] + document["write_ms"]
+            for stage in ("extract_ms", "embed_ms", "write_ms", "total_ms"):
+                document[stage] = round(document[stage], 2)
+        return {
+            "path": self.path,
+            "documents": len(documents),
+            "chunks": sum(document["chunks"] for document in documents),
+            "tokens": sum(usage["tokens"] for usage in models.values()),
+            "estimated_cost_usd": round(sum(usage["estimated_cost_usd"] for usage in models.values()), 6),
+            "timings_ms": {stage: round(sum(document[stage] for document in documents), 2) for stage in ("extract_ms", "embed_ms", "write_ms")},
+            "models": models,
+            "failures": failures,
+            "slowest": sorted(documents, key=lambda document: document["total_ms"], reverse=True)[:top],
+            "largest": sorted(documents, key=lambda document: document["tokens"], reverse=True)[:top],
+        }
+
+    def publish(self):
+        """Adds the run to the shared counters of its path (see ``get_stats``)."""
+        summary = self.summary()
+        counters = {
+            "runs": 1,
+            "documents": summary["documents"],
+            "chunks": summary["chunks"],
+            "tokens": summary["tokens"],
+            "billed_tokens": sum(usage["billed_tokens"] for usage in summary["models"].values()),
+            "cost_microusd": round(summary["estimated_cost_usd"] * 1_000_000),
+            "failures": len(summary["failures"]),
+            **{stage: round(value) for stage, value in summary["timings_ms"].items()},
+        }
+        for name, value in counters.items():
+            if value:
+                metrics.incr(f"indexing.{self.path}.{name}", value)
+        return summary
+
+
+def get_stats():
+    """Returns the cumulative indexing counters of each path, with averages per document, and the embedding failures of all paths."""
+    stats = {"embedding_failures": metrics.get_counters("embeddings.failures")["embeddings.failures"]}
+    for path in PATHS:
+        counters = metrics.get_counters(*(f"indexing.{path}.{name}" for name in COUNTERS))
+        values = {name: counters[f"indexing.{path}.{name}"] for name in COUNTERS}
+        documents = values["documents"]
+        stats[path] = {
+            **{name: value for name, value in values.items() if name != "cost_microusd"},
+            "estimated_cost_usd": values["cost_microusd"] / 1_000_000,
+            "avg_ms_per_document": metrics.ratio(values["extract_ms"] + values["embed_ms"] + values["write_ms"], documents),
+            "avg_tokens_per_document": metrics.ratio(values["tokens"], documents),
+        }
+    return stats
@@ -0,0 +1,118 @@
+# backend/api/index_versions.py
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import IndexVersion
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_KEY = "index_versions:active:{base}"
+
+# base -> (active collection name, monotonic time it was read)
+_active_names = {}
+
+
+def get_active_name(base):
+    """
+    Returns the name of the collection readers and writers of ``base`` should use.
+
+    The pointer is read from the shared cache (falling back to the database) at
+    most every ``INDEX_VERSION_CHECK_INTERVAL`` seconds per process. Before the
+    first versioned rebuild, the active collection is ``base`` itself.
+    """
+    cached = _active_names.get(base)
+    if cached and time.monotonic() - cached[1] < settings.INDEX_VERSION_CHECK_INTERVAL:
+        return cached[0]
+
+    key = ACTIVE_KEY.format(base=base)
+    try:
+        name = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Index version lookup failed: {e}")
+        name = None
+    if name is None:
+        name = IndexVersion.objects.filter(base=base, state="active").values_list("name", flat=True).first() or base
+        try:
+            cache.set(key, name, timeout=None)
+        except Exception as e:
+            logger.warning(f"Index version caching failed: {e}")
+    _active_names[base] = (name, time.monotonic())
+    return name
+
+
+def _publish(base, name):
+    """Points every process at ``name``: the shared cache at once, other processes' local copies within the check interval."""
+    try:
+        cache.set(ACTIVE_KEY.format(base=base), name, timeout=None)
+    except Exception as e:
+        logger.warning(f"Index version publishing failed: {e}")
+    _active_names.pop(base, None)
+
+
+def create_version(base):
+    """Registers a new, empty version of ``base`` to build into."""
+    return IndexVersion.objects.create(base=base, name=f"{base}_v{timezone.now():%Y%m%d%H%M%S%f}")
+
+
+def activate(version):
+    """
+    Makes ``version`` the active collection of its base, retiring the previous one.
+
+    The switch is a single transaction; before the first versioned rebuild, the
+    unversioned ``base`` collection is registered as retired so it can be rolled back to.
+    """
+    with transaction.atomic():
+        previous = IndexVersion.objects.select_for_update().filter(base=version.base, state="active").first()
+        if previous is not None:
+            previous.state = "retired"
+            previous.save(update_fields=["state"])
+        elif version.name != version.base and not IndexVersion.objects.filter(name=version.base).exists():
+            IndexVersion.objects.create(base=version.base, name=version.base, state="retired")
+
+        version.state = "active"
+        version.activated_at = timezone.now()
+        version.save(update_fields=["state", "activated_at"])
+    _publish(version.base, version.name)
+    return previous
+
+
+def rollback(base):
+    """Re-activates the most recently active retired version of ``base``; returns it, or ``None`` if there is none."""
+    version = IndexVersion.objects.filter(base=base, state="retired").order_by(F("activated_at").desc(nulls_last=True), "-created_at").first()
+    if version is not None:
+        activate(version)
+    return version
+
+
+def discard(version):
+    """Drops a version that will not be activated (e.g. a failed build) with its collection."""
+    from . import index_manifest
+    from .chromadb_utils import drop_collection
+
+    drop_collection(version.name)
+    index_manifest.forget(collection=version.name)
+    version.delete()
+
+
+def collect_garbage(base, keep=None):
+    """
+    Drops all but the ``keep`` most recently active retired versions of ``base``
+    (default ``INDEX_VERSIONS_KEPT``), and builds abandoned before the last
+    activation. Returns the names of the dropped collections.
+    """
+    keep = settings.INDEX_VERSIONS_KEPT if keep is None else keep
+    versions = IndexVersion.objects.filter(base=base)
+    retired = list(versions.filter(state="retired").order_by(F("activated_at").desc(nulls_last=True), "-created_at"))[keep:]
+    active = versions.filter(state="active").first()
+    abandoned = list(versions.filter(state="building", created_at__lt=active.activated_at)) if active else []
+
+    for version in retired + abandoned:
+        discard(version)
+    return [version.name for version in retired + abandoned]
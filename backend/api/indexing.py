@@ -0,0 +1,147 @@
+# backend/api/indexing.py
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from . import embeddings
+from .chromadb_utils import chunk_documents, embed_texts
+from .documents import Document, document_source, render_document_timed
+from .tokens import count_tokens
+
+
+class TokenBucket:
+    """
+    A blocking token bucket holding up to ``per_minute`` tokens, refilled continuously.
+
+    ``acquire`` waits until enough tokens are available; requests larger than the
+    bucket are clamped to its size so they cannot wait forever.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                delay = (amount - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+def build_documents(sources, workers, telemetry=None):
+    """
+    Yields the documents of ``sources`` (model instances, or ready-made ``Document`` objects).
+
+    With more than one worker, text extraction (HTML cleaning, PDF parsing) runs
+    in a process pool; the fields are read from the instances here, so workers
+    need no database access or Django setup. At most ``2 * workers`` instances
+    are in flight, so a slow consumer holds back the producer instead of
+    buffering everything. Documents are yielded in completion order, and their
+    extraction time is recorded on ``telemetry``.
+    """
+
+    def extracted(document, seconds):
+        if document and telemetry:
+            telemetry.record_extraction(document, seconds)
+        return document
+
+    if workers <= 1:
+        for source in sources:
+            document = source if isinstance(source, Document) else extracted(*render_document_timed(*document_source(source)))
+            if document:
+                yield document
+        return
+
+    # Spawned, not forked: the parent holds open database/HTTP connections and may run threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        in_flight = set()
+        for source in sources:
+            if isinstance(source, Document):
+                yield source
+                continue
+            kind, doc_id, metadata, fields = document_source(source)
+            if kind == "resume":
+                # Already in a worker process: a PDF pool of its own would run workers * PDF_EXTRACT_WORKERS processes
+                fields["pdf_options"]["workers"] = 1
+            in_flight.add(pool.submit(render_document_timed, kind, doc_id, metadata, fields))
+            if len(in_flight) >= 2 * workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                yield from (document for document in (extracted(*future.result()) for future in done) if document)
+        for future in wait(in_flight).done:
+            document = extracted(*future.result())
+            if document:
+                yield document
+
+
+class EmbeddingPipeline:
+    """
+    Embeds batches of documents concurrently and hands them to a writer in the caller's thread.
+
+    Up to ``workers`` embedding requests run at once on a thread pool, under
+    request and token buckets matching the OpenAI quota (local backends are
+    not throttled). Rate-limited requests are retried with jitter. At most
+    ``2 * workers`` batches are in flight: the caller stops pulling new
+    batches until the writer has caught up. Writes stay in the calling thread
+    because they use its database connection. Token counts, embedding times
+    and failures are recorded on ``telemetry``.
+    """
+
+    def __init__(self, workers, telemetry=None):
+        self.workers = max(1, workers)
+        self.telemetry = telemetry
+        self.throttled = settings.EMBEDDING_BACKEND == "openai"
+        self.requests = TokenBucket(settings.EMBEDDING_REQUESTS_PER_MINUTE)
+        self.tokens = TokenBucket(settings.EMBEDDING_TOKENS_PER_MINUTE)
+
+    def embed(self, batch):
+        chunks = chunk_documents(batch)
+        texts = [chunk.content for chunk in chunks]
+        chunk_tokens = [count_tokens(text, embeddings.OPENAI_EMBEDDING_MODEL) for text in texts] if self.throttled or self.telemetry else []
+        if self.throttled:
+            self.requests.acquire()
+            self.tokens.acquire(sum(chunk_tokens))
+
+        started, stats = time.perf_counter(), {}
+        vectors = embed_texts(texts, max_retries=settings.EMBEDDING_RATE_LIMIT_RETRIES, stats=stats)
+        if self.telemetry:
+            record_embedding(self.telemetry, batch, chunks, chunk_tokens, vectors, stats, time.perf_counter() - started)
+        return batch, chunks, vectors
+
+    def run(self, batches, write):
+        """
+        Chunks and embeds every batch of documents and calls ``write(batch, chunks, vectors)``
+        for each; ``vectors`` is ``None`` on failure.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embed") as pool:
+            in_flight = set()
+            for batch in batches:
+                in_flight.add(pool.submit(self.embed, batch))
+                if len(in_flight) >= 2 * self.workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write(*future.result())
+            for future in wait(in_flight).done:
+                write(*future.result())
+
+
+def record_embedding(telemetry, batch, chunks, chunk_tokens, vectors, stats, seconds):
+    """Records the outcome of an ``embed_texts`` call with its ``stats`` on ``telemetry``."""
+    if vectors:
+        billed_tokens = sum(chunk_tokens[i] for i in stats["embedded"])
+        telemetry.record_embedding(embeddings.get_provider().name, batch, chunks, chunk_tokens, billed_tokens, seconds)
+    else:
+        telemetry.record_failure("embed", [document.doc_id for document in batch], stats.get("error", "no embeddings returned"))
@@ -0,0 +1,138 @@
+import statistics
+import time
+from pathlib import Path
+
+import chromadb
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from openai import OpenAI
+
+from api import clients
+from api.chromadb_utils import CHROMA_COLLECTION
+from api.embeddings import OPENAI_EMBEDDING_MODEL, build_provider
+from api.utils import _html_to_text, clean_html
+
+
+def clean_html_soup(html_content):
+    """The BeautifulSoup implementation ``clean_html`` replaced, kept as the reference for benchmarks and tests."""
+    soup = BeautifulSoup(html_content, "html.parser")
+    for script_or_style in soup(["script", "style"]):
+        script_or_style.decompose()
+    lines = (line.strip() for line in soup.get_text().splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return "\n".join(chunk for chunk in chunks if chunk)
+
+
+def rich_text_body(sections):
+    """A CKEditor-style body: headings, paragraphs with inline markup, lists, tables, embedded code and a stray style block."""
+    parts = ["<style>.highlight { color: red; }</style>"]
+    for i in range(sections):
+        parts.append(
+            f"<h2>Section {i}: Retrieval&nbsp;pipeline</h2>"
+            f"<p>The <strong>indexer</strong> splits documents into <em>overlapping</em> chunks &amp; embeds them "
+            f'in batches. See <a href="https://example.com/{i}">the design notes</a>.</p>'
+            "<ul><li>Chunk size: 400 tokens</li><li>Overlap: 60 tokens</li><li>Backend: ChromaDB</li></ul>"
+            '<pre><code class="language-python">def embed(texts):\n    if len(texts) &gt; 0:\n'
+            "        return client.embeddings.create(input=texts)\n</code></pre>"
+            "<table><tr><th>Metric</th><th>Value</th></tr><tr><td>p95</td><td>120 ms</td></tr></table>"
+            '<p><img src="/media/uploads/diagram.png" alt="diagram"><br>Figure&nbsp;1 &mdash; architecture</p>'
+        )
+    parts.append("<script>window.dataLayer = window.dataLayer || [];</script>")
+    return "".join(parts)
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the latency of the chatbot and indexing hot paths."
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", choices=["clients", "embeddings", "html"], help="What to benchmark.")
+        parser.add_argument("--iterations", type=int, default=20, help="Number of timed iterations per case.")
+        parser.add_argument(
+            "--with-openai",
+            action="store_true",
+            help="Also time OpenAI embedding requests (makes real, billed API calls).",
+        )
+        parser.add_argument("--batch-size", type=int, default=32, help="Number of texts per batch in the embeddings benchmark.")
+
+    def handle(self, *args, **options):
+        getattr(self, f"benchmark_{options['target']}")(options)
+
+    def timeit(self, label, func, iterations):
+        """Runs ``func`` once to warm up, then reports latency over ``iterations`` timed calls."""
+        func()
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(f"{label:<52} mean {statistics.mean(timings):8.2f} ms   p50 {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms")
+
+    def benchmark_clients(self, options):
+        """Per-request cost of building fresh clients (the old behaviour) versus the pooled clients."""
+        iterations = options["iterations"]
+
+        def fresh_chroma():
+            client = chromadb.HttpClient(host=clients.CHROMA_HOST, port=clients.CHROMA_PORT)
+            client.get_or_create_collection(CHROMA_COLLECTION).count()
+
+        def pooled_chroma():
+            clients.get_collection(CHROMA_COLLECTION).count()
+
+        self.stdout.write(self.style.NOTICE(f"ChromaDB collection round trip ({iterations} iterations)"))
+        self.timeit("before: new HttpClient + get_or_create_collection", fresh_chroma, iterations)
+        self.timeit("after: pooled client + cached collection", pooled_chroma, iterations)
+
+        if options["with_openai"]:
+            if not settings.OPENAI_API_KEY:
+                raise CommandError("OPENAI_API_KEY is not set.")
+
+            def fresh_openai():
+                OpenAI(api_key=settings.OPENAI_API_KEY).embeddings.create(input=["benchmark"], model=OPENAI_EMBEDDING_MODEL)
+
+            def pooled_openai():
+                clients.get_openai_client().embeddings.create(input=["benchmark"], model=OPENAI_EMBEDDING_MODEL)
+
+            self.stdout.write(self.style.NOTICE(f"\nOpenAI embedding request ({iterations} iterations)"))
+            self.timeit("before: new OpenAI client per request", fresh_openai, iterations)
+            self.timeit("after: pooled keep-alive client", pooled_openai, iterations)
+
+    def benchmark_embeddings(self, options):
+        """Latency of a single query embedding and of an indexing-sized batch, per embedding backend."""
+        iterations, batch_size = options["iterations"], options["batch_size"]
+        query = ["What machine learning projects has he worked on?"]
+        batch = [f"Project {i}: a Django and React application with a retrieval-augmented chatbot." for i in range(batch_size)]
+
+        backends = []
+        if options["with_openai"]:
+            if not settings.OPENAI_API_KEY:
+                raise CommandError("OPENAI_API_KEY is not set.")
+            backends.append("openai")
+        if Path(settings.EMBEDDING_ONNX_MODEL_PATH, "model.onnx").exists():
+            backends.append("onnx")
+        else:
+            self.stdout.write(self.style.WARNING(f"Skipping onnx: no model.onnx in {settings.EMBEDDING_ONNX_MODEL_PATH}"))
+        if not backends:
+            raise CommandError("No embedding backend to benchmark; pass --with-openai or install an ONNX model.")
+
+        for backend in backends:
+            provider = build_provider(backend)
+            self.stdout.write(self.style.NOTICE(f"\n{provider.name} ({iterations} iterations)"))
+            self.timeit("single query", lambda: provider.embed(query), iterations)
+            self.timeit(f"batch of {batch_size}", lambda: provider.embed(batch), iterations)
+
+    def benchmark_html(self, options):
+        """HTML-to-text extraction of rich-text bodies: BeautifulSoup versus the streaming extractor, cold and memoized."""
+        iterations = options["iterations"]
+        for label, sections in (("short", 1), ("typical", 8), ("long", 64)):
+            body = rich_text_body(sections)
+            if clean_html_soup(body) != _html_to_text(body):
+                raise CommandError(f"The extractors disagree on the {label} body.")
+            clean_html(body)
+
+            self.stdout.write(self.style.NOTICE(f"\n{label} body, {len(body) / 1024:.1f} KiB ({iterations} iterations)"))
+            self.timeit("before: BeautifulSoup tree + get_text", lambda: clean_html_soup(body), iterations)
+            self.timeit("after: streaming HTMLParser", lambda: _html_to_text(body), iterations)
+            self.timeit("after: memoized clean_html", lambda: clean_html(body), iterations)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api import chat_store
+
+
+class Command(BaseCommand):
+    help = "Writes buffered chatbot messages to the database with bulk inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Messages per bulk insert (default: CHAT_FLUSH_BATCH_SIZE).")
+        parser.add_argument("--loop", action="store_true", help="Keep flushing every --interval seconds instead of exiting.")
+        parser.add_argument("--interval", type=float, default=None, help="Seconds between flushes in --loop mode (default: CHAT_FLUSH_INTERVAL).")
+
+    def handle(self, *args, **options):
+        if options["loop"]:
+            self.stdout.write(self.style.SUCCESS("Flushing buffered chat messages continuously..."))
+            chat_store.run_flusher(options["interval"], options["batch_size"])
+        else:
+            written = chat_store.flush(options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"Flushed {written} chat messages."))
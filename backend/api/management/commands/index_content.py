@@ -1,13 +1,21 @@
+import json
 import os
+import sys
+import time
+from collections import Counter
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError, OutputWrapper
 
-from api.chromadb_utils import add_or_update_node, get_collection
-
-# Import all your models and utilities
+from api import embedding_cache, index_manifest, index_versions, semantic_cache
+from api.chromadb_utils import batch_documents, get_base_collection_name, get_collection, get_collection_name, write_nodes
+from api.documents import get_resume_path, static_documents
+from api.index_telemetry import IndexTelemetry
+from api.indexing import EmbeddingPipeline, build_documents
 from api.models import Achievement, Certification, Experience, Project, Publication, Resume
-from api.utils import clean_html, extract_pdf_text  # Import clean_html
+
+# Models whose every row is indexed; only the latest Resume is
+INDEXED_MODELS = (Project, Experience, Certification, Publication, Achievement)
 
 
 class Command(BaseCommand):
@@ -17,154 +25,230 @@ class Command(BaseCommand):
         parser.add_argument(
             "--reindex",
             action="store_true",
-            help="Clear the entire collection before indexing new content.",
+            help="Rebuild everything into a new collection version and switch to it once complete (the current one keeps serving).",
+        )
+        parser.add_argument(
+            "--rollback",
+            action="store_true",
+            help="Switch back to the previously active collection version.",
+        )
+        parser.add_argument(
+            "--keep-versions",
+            type=int,
+            default=settings.INDEX_VERSIONS_KEPT,
+            help="Retired collection versions to keep for rollback after a rebuild (default: INDEX_VERSIONS_KEPT).",
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only embed new or changed documents (per the index manifest) and delete orphaned ones.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what an incremental run would add, update and delete, without writing anything.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Maximum number of documents per embeddings request and upsert (default: EMBEDDING_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.INDEX_WORKERS,
+            help="Text extraction processes and concurrent embedding requests (1 runs everything in-process).",
+        )
+        parser.add_argument(
+            "--json",
+            metavar="PATH",
+            help="Also write the run summary (timings, tokens, cost, failures) as JSON to PATH, or to stdout with '-' (text output goes to stderr).",
         )
 
     def handle(self, *args, **options):
+        self.summary_out = self.stdout
+        if options["json"] == "-":
+            # stdout only carries the JSON summary, so it can be piped to a parser; the progress goes to stderr
+            self.stdout = OutputWrapper(options.get("stderr") or sys.stderr)
+        base = get_base_collection_name()
+        if options["rollback"]:
+            version = index_versions.rollback(base)
+            if version is None:
+                raise CommandError("There is no retired collection version to roll back to.")
+            semantic_cache.invalidate()
+            self.stdout.write(self.style.SUCCESS(f"Rolled back to collection {version.name}."))
+            # The restored version lacks every change indexed since it was retired
+            self.catch_up(args, options)
+            return
+
         self.stdout.write(self.style.SUCCESS("Starting content indexing..."))
-        collection = get_collection()
-
-        if options["reindex"]:
-            self.stdout.write(self.style.WARNING("Clearing existing collection..."))
-            # This is a bit of a workaround as Chroma's delete_collection is sometimes tricky.
-            # We'll get all items and delete them by ID.
-            existing_items = collection.get()
-            if existing_items and existing_items["ids"]:
-                collection.delete(ids=existing_items["ids"])
-            self.stdout.write(self.style.SUCCESS("Collection cleared."))
-
-        # --- 1. Index Static Content ---
-        self.stdout.write(self.style.NOTICE("Indexing static content..."))
-
-        # About Me Content (taken from your About.tsx)
-        about_me_text = """
-        Hello! I'm Md Mushfiqur Rahman, a full-stack data scientist with around 3 years of professional experience. \
-        I strive to tackle real-world challenges using my technical expertise in Data Science. \
-        I thrive in environments where research work is valued alongside routine tasks, \
-        constantly motivated to learn and stay updated with the latest tools and technologies in the ever-evolving data-driven world. \
-        Currently, I serve as an AI/ML Team Lead, focusing on designing and implementing advanced Machine Learning and Generative AI systems. \
-        My work involves leading the development of innovative AI solutions, \
-        including architecting and deploying complex agentic AI systems and solutions built upon Large Language Models (LLMs). \
-        I contribute to system design and ensure the smooth execution and deployment of AI-powered projects. \
-        My core areas of interest include Statistics, Data Science, Machine Learning, Deep Learning, Generative AI, and Cryptocurrency. \
-        I possess a solid understanding of various machine learning and deep learning algorithms, \
-        always making an effort to keep pace with new tools and technologies in the AI domain. \
-        I believe in "Learning is Surviving!" – a philosophy that guides my proactive approach to continuous professional development. \
-        As an active learner, I constantly keep myself updated with AI trends and innovations by reading LinkedIn posts from top AI figures. \
-        I participate in Kaggle contests and maintain a strong presence on LinkedIn and GitHub, \
-        alongside conducting research work utilizing my knowledge in machine learning and deep learning. \
-        I think like a Software Engineer and work like a Data Scientist, with a particular passion for collecting and analyzing datasets. \
-        I am very passionate about my work, adhering strictly to schedules to ensure projects are completed before deadlines.
-        I believe in ultimate professionalism in my work ethic.
-        """
-        add_or_update_node(
-            doc_id="static-about-me",
-            content=f"About Md Mushfiqur Rahman: {about_me_text}",
-            metadata={"type": "about", "title": "About Md Mushfiqur Rahman"},
+        started = time.perf_counter()
+        telemetry = IndexTelemetry("index_content")
+        dry_run = options["dry_run"]
+        incremental = options["incremental"] or dry_run
+
+        # A rebuild writes into a new, empty collection version while the active one keeps
+        # serving queries; it is switched to only once complete.
+        version = index_versions.create_version(base) if options["reindex"] and not dry_run else None
+        collection_name = version.name if version else get_collection_name()
+        collection = get_collection(collection_name)
+        if version:
+            self.stdout.write(self.style.WARNING(f"Building collection {version.name}; {get_collection_name()} keeps serving meanwhile."))
+
+        # In incremental mode, only documents that are new, changed (content, metadata or
+        # embedding model) or missing from the collection are embedded.
+        manifest = index_manifest.load(collection_name) if incremental else {}
+        stored_ids, legacy_ids = set(), []
+        if incremental:
+            # The collection holds chunks; map them back to their parent documents. Entries
+            # without a parent_id were written before chunking and are always replaced.
+            stored = collection.get(include=["metadatas"])
+            for chunk_id, metadata in zip(stored["ids"], stored["metadatas"]):
+                if metadata and metadata.get("parent_id"):
+                    stored_ids.add(metadata["parent_id"])
+                else:
+                    legacy_ids.append(chunk_id)
+        seen, changes = set(), {"new": [], "changed": [], "unchanged": []}
+
+        def pending_documents():
+            for document in build_documents(self.iter_sources(), options["workers"], telemetry):
+                seen.add(document.doc_id)
+                if not incremental:
+                    yield document
+                elif document.doc_id not in manifest and document.doc_id not in stored_ids:
+                    changes["new"].append(document.doc_id)
+                    yield document
+                elif document.doc_id in stored_ids and index_manifest.is_current(manifest.get(document.doc_id), document):
+                    changes["unchanged"].append(document.doc_id)
+                else:
+                    changes["changed"].append(document.doc_id)
+                    yield document
+
+        if dry_run:
+            for _ in pending_documents():
+                pass
+            orphans = sorted((manifest.keys() | stored_ids) - seen)
+            self.stdout.write(self.style.NOTICE("Dry run, nothing was written:"))
+            if legacy_ids:
+                self.stdout.write(f"  {len(legacy_ids)} unchunked legacy entries to replace")
+            for label, doc_ids in (("new", changes["new"]), ("changed", changes["changed"]), ("orphaned", orphans)):
+                self.stdout.write(f"  {len(doc_ids)} {label}" + (f": {', '.join(doc_ids)}" if doc_ids else ""))
+            self.stdout.write(f"  {len(changes['unchanged'])} unchanged")
+            return
+
+        # Extraction, embedding and writing are pipelined: documents are built in a process
+        # pool, chunked and embedded in batches (one request each) on a thread pool, and
+        # each embedded batch is written here with a single upsert.
+        indexed, batches, failed = Counter(), 0, 0
+
+        def write(batch, chunks, vectors):
+            nonlocal batches, failed
+            batches += 1
+            if vectors:
+                write_started = time.perf_counter()
+                write_nodes(chunks, vectors, collection)
+                index_manifest.record(batch, collection_name)
+                telemetry.record_write(batch, time.perf_counter() - write_started)
+                indexed.update(document.metadata["type"] for document in batch)
+            else:
+                failed += len(batch)
+                self.stdout.write(self.style.ERROR(f"Failed to index a batch of {len(batch)} documents: {', '.join(d.doc_id for d in batch)}"))
+
+        EmbeddingPipeline(options["workers"], telemetry).run(batch_documents(pending_documents(), max_count=options["batch_size"]), write)
+
+        for doc_type, count in indexed.items():
+            self.stdout.write(self.style.SUCCESS(f"Indexed {count} {doc_type} document(s)."))
+        if failed:
+            self.stdout.write(self.style.ERROR(f"{failed} document(s) could not be indexed."))
+
+        if incremental:
+            orphans = sorted((manifest.keys() | stored_ids) - seen)
+            if orphans:
+                collection.delete(where={"parent_id": {"$in": orphans}})
+                index_manifest.forget(orphans, collection=collection_name)
+            if legacy_ids:
+                collection.delete(ids=legacy_ids)
+            self.stdout.write(
+                f"Incremental: {len(changes['new'])} new, {len(changes['changed'])} changed, "
+                f"{len(changes['unchanged'])} unchanged, {len(orphans)} orphaned removed."
+            )
+
+        stats = embedding_cache.get_stats()
+        self.stdout.write(
+            f"Embedding cache: {stats['local_hits'] + stats['shared_hits']} hits "
+            f"({stats['local_hits']} local, {stats['shared_hits']} shared), {stats['misses']} misses."
         )
-        self.stdout.write(self.style.SUCCESS("Indexed 'About Me' content."))
-
-        # Skills Content (UPDATED to match frontend)
-        skills_list = [
-            "Python",
-            "SQL",
-            "Go",
-            "HTML / CSS",
-            "C / C++",
-            "Flask / FastAPI / Streamlit",
-            "Django",
-            "React",
-            "Scikit-learn",
-            "TensorFlow",
-            "PyTorch",
-            "Keras",
-            "Langchain",
-            "LangGraph",
-            "Exploratory Data Analysis",
-            "Natural Language Processing (NLP)",
-            "Computer Vision",
-            "Statistics",
-            "Supervised ML",
-            "Unsupervised ML",
-            "Generative AI",
-            "Time-Series Forecasting",
-            "Hypothesis Testing",
-            "MLOps",
-            "MLflow",
-            "DVC",
-            "Airflow",
-            "AWS",
-            "Docker",
-            "Git & GitHub",
-            "CI/CD (GitHub Actions, CircleCI)",
-            "Nginx",
-            "Monitoring (Prometheus, Grafana)",
-            "Caching (Redis)",
-            "n8n",
-            "Web-scrapping (BeautifulSoup, Selenium)",
-        ]
-        skills_text = f"Md Mushfiqur Rahman's skills include: {', '.join(skills_list)}."
-        add_or_update_node(doc_id="static-skills", content=skills_text, metadata={"type": "skills", "title": "Skills"})
-        self.stdout.write(self.style.SUCCESS("Indexed 'Skills' content."))
-
-        # NEW: Index Contact Information
-        contact_info_text = """
-        Contact Information for Md Mushfiqur Rahman:
-        - Email: mushfiqur.rahman.robin@gmail.com
-        - LinkedIn: https://linkedin.com/in/mushfiqur--rahman
-        - GitHub: https://github.com/Mushfiqur-Rahman-Robin
-        He can be reached for collaborations, inquiries, or general contact through these professional channels.
-        """
-        add_or_update_node(doc_id="static-contact-info", content=contact_info_text, metadata={"type": "contact", "title": "Contact Information"})
-        self.stdout.write(self.style.SUCCESS("Indexed 'Contact' content."))
-
-        # --- 2. Index Dynamic Content from Database ---
-        self.stdout.write(self.style.NOTICE("\nIndexing dynamic content from database..."))
-
-        # Index Projects (description is RichTextUploadingField, so clean it)
-        for project in Project.objects.all():
-            cleaned_description = clean_html(project.description)
-            content = f"Project Title: {project.title}\nDescription: {cleaned_description}"
-            add_or_update_node(f"project-{project.id}", content, {"type": "project", "title": project.title})
-        self.stdout.write(self.style.SUCCESS(f"Indexed {Project.objects.count()} projects."))
-
-        # Index Experiences (work_details now stores HTML, so clean it)
-        for exp in Experience.objects.all():
-            cleaned_work_details = clean_html(exp.work_details)
-            content = f"Experience at {exp.company_name} as {exp.job_title}\nDetails: {cleaned_work_details}"
-            add_or_update_node(f"experience-{exp.id}", content, {"type": "experience", "title": f"{exp.job_title} at {exp.company_name}"})
-        self.stdout.write(self.style.SUCCESS(f"Indexed {Experience.objects.count()} experiences."))
-
-        # Index Certifications
-        for cert in Certification.objects.all():
-            content = f"Certification: {cert.name}\nIssued by: {cert.issuing_organization}"
-            add_or_update_node(f"certification-{cert.id}", content, {"type": "certification", "title": cert.name})
-        self.stdout.write(self.style.SUCCESS(f"Indexed {Certification.objects.count()} certifications."))
-
-        # Index Publications
-        for pub in Publication.objects.all():
-            content = f"Publication: {pub.title}\nAuthors: {pub.authors}\nConference: {pub.conference}"
-            add_or_update_node(f"publication-{pub.id}", content, {"type": "publication", "title": pub.title})
-        self.stdout.write(self.style.SUCCESS(f"Indexed {Publication.objects.count()} publications."))
-
-        # Index Achievements
-        for ach in Achievement.objects.all():
-            content = f"Achievement: {ach.title}\nDescription: {ach.description}"
-            add_or_update_node(f"achievement-{ach.id}", content, {"type": "achievement", "title": ach.title})
-        self.stdout.write(self.style.SUCCESS(f"Indexed {Achievement.objects.count()} achievements."))
-
-        # Index latest Resume
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nContent indexing complete! {sum(indexed.values())} documents in {batches} batches, "
+                f"{elapsed:.2f}s ({sum(indexed.values()) / elapsed:.1f} docs/s, {options['workers']} workers)."
+            )
+        )
+        self.report(telemetry.publish(), options["json"])
+
+        if version:
+            self.switch_to(version, failed, options)
+            # Saves indexed into the previous version during the build are caught up incrementally
+            self.catch_up(args, options)
+
+    def report(self, summary, json_path):
+        """Prints the token usage, estimated cost and slowest documents of the run, and writes its JSON summary if asked to."""
+        for model, usage in summary["models"].items():
+            self.stdout.write(
+                f"{model}: {usage['tokens']} tokens ({usage['billed_tokens']} sent to the provider), estimated cost ${usage['estimated_cost_usd']:.6f}."
+            )
+        timings = summary["timings_ms"]
+        self.stdout.write(
+            f"Time spent: extraction {timings['extract_ms']:.0f} ms, embedding {timings['embed_ms']:.0f} ms, writes {timings['write_ms']:.0f} ms."
+        )
+        for document in summary["slowest"][:5]:
+            self.stdout.write(f"  slow: {document['doc_id']} {document['total_ms']:.0f} ms, {document['tokens']} tokens, {document['chunks']} chunk(s)")
+
+        if json_path == "-":
+            self.summary_out.write(json.dumps(summary))
+        elif json_path:
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+            self.stdout.write(f"Wrote the run summary to {json_path}.")
+
+    def switch_to(self, version, failed, options):
+        """Activates a freshly built collection version and drops the versions no longer kept for rollback."""
+        if failed:
+            index_versions.discard(version)
+            raise CommandError(f"Rebuild incomplete, discarded {version.name}; {get_collection_name()} is still active.")
+
+        previous = index_versions.activate(version)
+        # Answers cached before the switch were built from the previous collection
+        semantic_cache.invalidate()
+        self.stdout.write(self.style.SUCCESS(f"Switched to collection {version.name}" + (f" (previous: {previous.name})." if previous else ".")))
+        for name in index_versions.collect_garbage(version.base, options["keep_versions"]):
+            self.stdout.write(f"Dropped retired collection {name}.")
+
+    def catch_up(self, args, options):
+        """Runs an incremental pass into the newly active version once every process writes to it."""
+        # Other processes (e.g. the index job worker) resolve the active collection at most
+        # every INDEX_VERSION_CHECK_INTERVAL seconds; until then, they may still write to the previous one
+        wait = settings.INDEX_VERSION_CHECK_INTERVAL
+        if wait > 0:
+            self.stdout.write(f"Waiting {wait:.0f}s for other processes to switch collections...")
+            time.sleep(wait + 1)
+        self.stdout.write(self.style.NOTICE("\nCatching up with changes made to the previous collection..."))
+        self.handle(*args, **{**options, "rollback": False, "reindex": False, "incremental": True, "json": None})
+
+    def iter_sources(self):
+        """Yields the static documents, then every model instance to index, streaming the querysets."""
+        yield from static_documents()
+
+        for model in INDEXED_MODELS:
+            yield from model.objects.iterator()
+
+        # Only the latest resume is indexed
         latest_resume = Resume.objects.order_by("-uploaded_at").first()
-        if latest_resume:
-            pdf_path = os.path.join(settings.MEDIA_ROOT, latest_resume.pdf_file.name)
-            if os.path.exists(pdf_path):
-                content = extract_pdf_text(pdf_path)
-                if content:
-                    add_or_update_node(f"resume-{latest_resume.id}", content, {"type": "resume", "title": latest_resume.title})
-                    self.stdout.write(self.style.SUCCESS("Indexed latest resume."))
-            else:
-                self.stdout.write(self.style.WARNING(f"Resume PDF not found at path: {pdf_path}"))
-        else:
+        if latest_resume is None:
             self.stdout.write(self.style.WARNING("No resume found in database to index."))
-
-        self.stdout.write(self.style.SUCCESS("\nContent indexing complete!"))
+        elif not os.path.exists(get_resume_path(latest_resume)):
+            self.stdout.write(self.style.WARNING(f"Resume PDF not found at path: {get_resume_path(latest_resume)}"))
+        else:
+            yield latest_resume
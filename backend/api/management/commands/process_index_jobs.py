@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api import index_jobs
+
+
+class Command(BaseCommand):
+    help = "Applies queued knowledge-base updates (from content saves and deletes) to ChromaDB in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Jobs per batch (default: INDEX_JOB_BATCH_SIZE).")
+        parser.add_argument("--loop", action="store_true", help="Keep processing due jobs every --interval seconds instead of exiting.")
+        parser.add_argument("--interval", type=float, default=None, help="Seconds between polls in --loop mode (default: INDEX_JOB_INTERVAL).")
+
+    def handle(self, *args, **options):
+        if options["loop"]:
+            self.stdout.write(self.style.SUCCESS("Processing index jobs continuously..."))
+            index_jobs.run_worker(options["interval"], options["batch_size"])
+        else:
+            processed = 0
+            while batch := index_jobs.process(options["batch_size"]):
+                processed += batch
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} index jobs."))
@@ -0,0 +1,88 @@
+# backend/api/metrics.py
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+METRICS_PREFIX = "metrics"
+
+
+def _key(name):
+    return f"{METRICS_PREFIX}:{name}"
+
+
+def incr(name, amount=1):
+    """Atomically increments a shared counter. Failures are logged, never raised."""
+    incr_many({name: amount})
+
+
+def incr_many(amounts):
+    """
+    Atomically increments several shared counters, ``{name: amount}``. On Redis,
+    all increments go out in one pipelined round trip. Failures are logged, never raised.
+    """
+    try:
+        if "django_redis" in settings.CACHES["default"]["BACKEND"]:
+            from django_redis import get_redis_connection
+
+            # django-redis stores integers unpickled, so INCRBY works on the cache's own keys
+            pipeline = get_redis_connection("default").pipeline(transaction=False)
+            for name, amount in amounts.items():
+                pipeline.incrby(cache.make_key(_key(name)), int(amount))
+            pipeline.execute()
+        else:
+            for name, amount in amounts.items():
+                cache.add(_key(name), 0, timeout=None)
+                cache.incr(_key(name), int(amount))
+    except Exception as e:
+        logger.warning(f"Could not increment metrics {', '.join(amounts)}: {e}")
+
+
+_pending = {}
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def incr_buffered(name, amount=1):
+    """
+    Increments a shared counter in process memory, for hot paths that must not
+    wait on the cache. Pending amounts are written with one ``incr_many`` at most
+    every ``METRICS_FLUSH_INTERVAL`` seconds (and before counters are read).
+    """
+    with _pending_lock:
+        _pending[name] = _pending.get(name, 0) + amount
+        if time.monotonic() - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+    flush()
+
+
+def flush():
+    """Writes the pending amounts of ``incr_buffered`` to the shared counters."""
+    global _last_flush
+    with _pending_lock:
+        amounts = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if amounts:
+        incr_many(amounts)
+
+
+def get_counters(*names):
+    """Returns the current value of the given counters, including this process's pending increments."""
+    flush()
+    try:
+        values = cache.get_many([_key(name) for name in names])
+    except Exception as e:
+        logger.warning(f"Could not read metrics: {e}")
+        values = {}
+    return {name: values.get(_key(name), 0) for name in names}
+
+
+def ratio(numerator, denominator):
+    """Returns ``numerator / denominator`` rounded for display, or 0.0 when there is no data."""
+    return round(numerator / denominator, 4) if denominator else 0.0
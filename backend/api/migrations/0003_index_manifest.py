@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0002_chat_created_at_default"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndexedDocument",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("collection", models.CharField(max_length=100)),
+                ("doc_id", models.CharField(max_length=255)),
+                ("content_hash", models.CharField(max_length=64)),
+                ("embedding_model", models.CharField(max_length=100)),
+                ("indexed_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "verbose_name": "Indexed Document",
+                "verbose_name_plural": "Indexed Documents",
+                "ordering": ["collection", "doc_id"],
+                "constraints": [models.UniqueConstraint(fields=("collection", "doc_id"), name="unique_indexed_document")],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0003_index_manifest"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndexJob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("doc_id", models.CharField(max_length=255, unique=True)),
+                ("action", models.CharField(choices=[("sync", "Sync"), ("delete", "Delete")], max_length=6)),
+                ("model", models.CharField(blank=True, max_length=100)),
+                ("object_id", models.CharField(blank=True, max_length=64)),
+                ("enqueued_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("run_after", models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+            ],
+            options={
+                "verbose_name": "Index Job",
+                "verbose_name_plural": "Index Jobs",
+                "ordering": ["run_after"],
+            },
+        ),
+    ]
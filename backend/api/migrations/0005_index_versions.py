@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0004_index_jobs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndexVersion",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("base", models.CharField(max_length=100)),
+                ("name", models.CharField(max_length=100, unique=True)),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[("building", "Building"), ("active", "Active"), ("retired", "Retired")], default="building", max_length=8
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("activated_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Index Version",
+                "verbose_name_plural": "Index Versions",
+                "ordering": ["base", "-created_at"],
+                "constraints": [models.UniqueConstraint(condition=models.Q(("state", "active")), fields=("base",), name="unique_active_index_version")],
+            },
+        ),
+    ]
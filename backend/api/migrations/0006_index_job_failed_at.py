@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0005_index_versions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="indexjob",
+            name="failed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
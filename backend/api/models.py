@@ -2,6 +2,93 @@ import uuid
 
 from ckeditor_uploader.fields import RichTextUploadingField
 from django.db import models
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+
+class IndexedFieldsMixin:
+    """
+    Tracks the fields a model's chatbot knowledge-base document is built from.
+
+    Their values are snapshotted when an instance is loaded and after each
+    save, so ``indexed_fields_changed()`` tells whether a save changed the
+    indexed text (reordering or toggling a flag does not).
+    """
+
+    indexed_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._indexed_snapshot = instance._get_indexed_values()
+        return instance
+
+    def _get_indexed_values(self):
+        deferred = self.get_deferred_fields()
+        values = {}
+        for name in self.indexed_fields:
+            if name not in deferred:
+                value = getattr(self, name)
+                values[name] = value.name if isinstance(value, FieldFile) else value
+        return values
+
+    def indexed_fields_changed(self, update_fields=None):
+        """Whether any indexed field differs from the snapshot (always true for unsaved or partially loaded instances)."""
+        if update_fields is not None and not set(update_fields) & set(self.indexed_fields):
+            return False
+        snapshot = getattr(self, "_indexed_snapshot", None)
+        if snapshot is None or snapshot.keys() != set(self.indexed_fields):
+            return True
+        return snapshot != self._get_indexed_values()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._indexed_snapshot = self._get_indexed_values()
+
+
+class FileFieldsMixin:
+    """
+    Remembers the stored names of a model's file fields.
+
+    The names are snapshotted when an instance is loaded and after each save,
+    so ``get_replaced_files()`` can find the files a save replaces or clears
+    without reading the row again.
+    """
+
+    file_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._file_snapshot = instance._get_file_names()
+        return instance
+
+    def _get_file_names(self):
+        deferred = self.get_deferred_fields()
+        return {name: getattr(self, name).name or "" for name in self.file_fields if name not in deferred}
+
+    def get_replaced_files(self):
+        """Returns the previously stored files (as ``FieldFile`` objects) that differ from the current values."""
+        if self._state.adding:
+            return []
+        snapshot = getattr(self, "_file_snapshot", {})
+        missing = [name for name in self.file_fields if name not in snapshot]
+        if missing:
+            # Only for instances that were neither loaded nor saved here, or were loaded with deferred file fields
+            stored = type(self)._base_manager.filter(pk=self.pk).values_list(*missing).first() or ()
+            snapshot = {**snapshot, **dict(zip(missing, stored))}
+
+        replaced = []
+        for name in self.file_fields:
+            old_name = snapshot.get(name)
+            if old_name and old_name != getattr(self, name).name:
+                field = self._meta.get_field(name)
+                replaced.append(field.attr_class(self, field, old_name))
+        return replaced
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._file_snapshot = self._get_file_names()
 
 
 class Tag(models.Model):
@@ -15,7 +102,12 @@ class Tag(models.Model):
         return self.name
 
 
-class Project(models.Model):
+class Project(IndexedFieldsMixin, FileFieldsMixin, models.Model):
+    # Fields its knowledge-base document is built from (see api/documents.py)
+    indexed_fields = ("title", "description")
+    # Files removed from storage when replaced (see api/signals.py)
+    file_fields = ("image",)
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=200)
     description = RichTextUploadingField(help_text="Full project details, including text, images, and code snippets.")
@@ -40,7 +132,9 @@ class Project(models.Model):
 
 
 # New model for additional project images (gallery)
-class ProjectImage(models.Model):
+class ProjectImage(FileFieldsMixin, models.Model):
+    file_fields = ("image",)
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     project = models.ForeignKey(Project, related_name="gallery_images", on_delete=models.CASCADE)
     image = models.ImageField(upload_to="projects/gallery/")
@@ -56,7 +150,9 @@ class ProjectImage(models.Model):
         return f"{self.project.title} - {self.caption or self.image.name}"
 
 
-class Publication(models.Model):
+class Publication(IndexedFieldsMixin, models.Model):
+    indexed_fields = ("title", "authors", "conference")
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=300)
     authors = models.CharField(max_length=500)
@@ -74,7 +170,10 @@ class Publication(models.Model):
         return self.title
 
 
-class Certification(models.Model):
+class Certification(IndexedFieldsMixin, FileFieldsMixin, models.Model):
+    indexed_fields = ("name", "issuing_organization")
+    file_fields = ("image",)
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=200)
     issuing_organization = models.CharField(max_length=200)
@@ -92,7 +191,10 @@ class Certification(models.Model):
         return self.name
 
 
-class Achievement(models.Model):
+class Achievement(IndexedFieldsMixin, FileFieldsMixin, models.Model):
+    indexed_fields = ("title", "description")
+    file_fields = ("image",)
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=255)
     description = models.TextField()
@@ -125,7 +227,10 @@ class ContactMessage(models.Model):
         return f"Message from {self.name} ({self.email})"
 
 
-class Resume(models.Model):
+class Resume(IndexedFieldsMixin, FileFieldsMixin, models.Model):
+    indexed_fields = ("title", "pdf_file")
+    file_fields = ("pdf_file",)
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=200)
     pdf_file = models.FileField(upload_to="resumes/")
@@ -172,7 +277,9 @@ class DailyVisitorCount(models.Model):
         return f"{self.date.strftime('%Y-%m-%d')}: {self.count} visitors"
 
 
-class Experience(models.Model):
+class Experience(IndexedFieldsMixin, models.Model):
+    indexed_fields = ("company_name", "job_title", "work_details")
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     company_name = models.CharField(max_length=200)
     job_title = models.CharField(max_length=200, blank=True)  # Added for resume content
@@ -192,7 +299,9 @@ class Experience(models.Model):
         return f"{self.job_title} at {self.company_name}"
 
 
-class ExperiencePhoto(models.Model):
+class ExperiencePhoto(FileFieldsMixin, models.Model):
+    file_fields = ("image",)
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     experience = models.ForeignKey(Experience, related_name="photos", on_delete=models.CASCADE)
     image = models.ImageField(upload_to="experience/memories/")
@@ -212,7 +321,8 @@ class ChatSession(models.Model):
     """Represents a single, unique chat conversation."""
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: sessions are written behind the request and keep their original timestamp
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
@@ -234,7 +344,8 @@ class ChatMessage(models.Model):
     session = models.ForeignKey(ChatSession, related_name="messages", on_delete=models.CASCADE)
     sender = models.CharField(max_length=4, choices=SENDER_CHOICES)
     message = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: messages are written behind the request and keep their original timestamp
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ["created_at"]
@@ -243,3 +354,81 @@ class ChatMessage(models.Model):
 
     def __str__(self):
         return f"{self.get_sender_display()} message at {self.created_at.strftime('%H:%M')}"
+
+
+class IndexedDocument(models.Model):
+    """Manifest entry of a document in the chatbot knowledge base, used for incremental reindexing."""
+
+    collection = models.CharField(max_length=100)
+    doc_id = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64)
+    embedding_model = models.CharField(max_length=100)
+    indexed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["collection", "doc_id"]
+        constraints = [models.UniqueConstraint(fields=["collection", "doc_id"], name="unique_indexed_document")]
+        verbose_name = "Indexed Document"
+        verbose_name_plural = "Indexed Documents"
+
+    def __str__(self):
+        return f"{self.doc_id} in {self.collection}"
+
+
+class IndexJob(models.Model):
+    """A pending knowledge-base update of one document, written by the content signals and run by process_index_jobs."""
+
+    ACTION_CHOICES = (
+        ("sync", "Sync"),
+        ("delete", "Delete"),
+    )
+    doc_id = models.CharField(max_length=255, unique=True)
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    # Model label and primary key of the instance to re-index (sync jobs only)
+    model = models.CharField(max_length=100, blank=True)
+    object_id = models.CharField(max_length=64, blank=True)
+    # Every save re-arms the job: it runs once no save happened for the debounce window
+    enqueued_at = models.DateTimeField(default=timezone.now)
+    run_after = models.DateTimeField(default=timezone.now, db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Set when the job is given up on after INDEX_JOB_MAX_ATTEMPTS; the next save re-arms it
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["run_after"]
+        verbose_name = "Index Job"
+        verbose_name_plural = "Index Jobs"
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.doc_id}"
+
+
+class IndexVersion(models.Model):
+    """
+    A physical vector collection built for a logical knowledge-base collection.
+
+    ``index_content --reindex`` builds a new version and then activates it; readers
+    always use the active version, and retired ones are kept for rollback.
+    """
+
+    STATE_CHOICES = (
+        ("building", "Building"),
+        ("active", "Active"),
+        ("retired", "Retired"),
+    )
+    # Logical collection name (see chromadb_utils.get_base_collection_name)
+    base = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, unique=True)
+    state = models.CharField(max_length=8, choices=STATE_CHOICES, default="building")
+    created_at = models.DateTimeField(default=timezone.now)
+    activated_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["base", "-created_at"]
+        constraints = [models.UniqueConstraint(fields=["base"], condition=models.Q(state="active"), name="unique_active_index_version")]
+        verbose_name = "Index Version"
+        verbose_name_plural = "Index Versions"
+
+    def __str__(self):
+        return f"{self.name} ({self.get_state_display()})"
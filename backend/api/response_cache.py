@@ -0,0 +1,130 @@
+# backend/api/response_cache.py
+
+import functools
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "api_cache:version:{model}"
+CHANGED_KEY = "api_cache:changed:{model}"
+RESPONSE_KEY = "api_cache:{basename}:{digest}"
+
+
+def _new_version():
+    # A counter lost to eviction restarts from the clock, so it never repeats a version still in the cache
+    return time.time_ns()
+
+
+def get_stamps(models):
+    """
+    Returns the change stamps of ``models``: their version counters, and the time
+    (epoch seconds) of the latest change to any of them. Missing stamps are started now.
+    """
+    labels = [model._meta.label_lower for model in models]
+    version_keys = [VERSION_KEY.format(model=label) for label in labels]
+    changed_keys = [CHANGED_KEY.format(model=label) for label in labels]
+    stamps = cache.get_many(version_keys + changed_keys)
+    for key in version_keys + changed_keys:
+        if key not in stamps:
+            cache.add(key, _new_version() if key in version_keys else time.time(), timeout=None)
+            stamps[key] = cache.get(key)
+    return [stamps[key] for key in version_keys], max(stamps[key] for key in changed_keys)
+
+
+def bump_version(sender, **kwargs):
+    """
+    Signal receiver: invalidates every cached response built from ``sender`` once the
+    current transaction commits (a response cached before that would be built from the old rows).
+    """
+    transaction.on_commit(functools.partial(_bump, sender._meta.label_lower))
+
+
+def _bump(label):
+    try:
+        if not cache.add(VERSION_KEY.format(model=label), _new_version(), timeout=None):
+            cache.incr(VERSION_KEY.format(model=label))
+        # Last-Modified has a one-second resolution: every change must move it forward by at
+        # least a second, or a client revalidating with If-Modified-Since only would get a 304
+        changed_key = CHANGED_KEY.format(model=label)
+        cache.set(changed_key, max(time.time(), (cache.get(changed_key) or 0) + 1), timeout=None)
+    except Exception as e:
+        logger.warning(f"Could not invalidate API responses of {label}: {e}")
+
+
+class CachedResponseMixin:
+    """
+    Serves a viewset's list and detail responses from the change stamps of
+    ``cache_models`` (see ``bump_version`` in api/signals.py).
+
+    Responses carry an ETag built from the URL, the query parameters in
+    ``cache_query_params`` (sorted, blanks dropped) and the models' version
+    counters, and the time of their latest change as Last-Modified; matching
+    conditional requests get a 304 without a database query. Otherwise the
+    response data is cached under the same key for ``API_CACHE_TTL`` seconds,
+    until a change to any of the models makes it a miss.
+    """
+
+    cache_models = ()
+    cache_query_params = ("page", "page_size")
+
+    def get_cache_stamps(self, request):
+        """Returns a digest of the current content of the response, and its Last-Modified time."""
+        query = sorted((name, value) for name in self.cache_query_params for value in request.query_params.getlist(name) if value)
+        versions, changed_at = get_stamps(self.cache_models or (self.queryset.model,))
+        payload = json.dumps([request.build_absolute_uri(request.path), self.action, query, versions])
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest(), int(changed_at)
+
+    def cached_response(self, view, request, *args, **kwargs):
+        try:
+            digest, changed_at = self.get_cache_stamps(request)
+        except Exception as e:
+            logger.warning(f"API change stamp lookup failed: {e}")
+            return view(request, *args, **kwargs)
+
+        # The representation also depends on the negotiated renderer (JSON, browsable API)
+        etag = f'"{digest}-{request.accepted_renderer.format}"'
+        response = get_conditional_response(request._request, etag=etag, last_modified=changed_at)
+        if response is None:
+            response = self.cached_view(view, RESPONSE_KEY.format(basename=self.basename, digest=digest), request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(changed_at)
+            # Clients may keep the response but must revalidate it before each use
+            patch_cache_control(response, no_cache=True)
+            patch_vary_headers(response, ["Accept"])
+        return response
+
+    def cached_view(self, view, key, request, *args, **kwargs):
+        if not settings.API_CACHE_ENABLED:
+            return view(request, *args, **kwargs)
+        try:
+            data = cache.get(key)
+        except Exception as e:
+            logger.warning(f"API response cache lookup failed: {e}")
+            return view(request, *args, **kwargs)
+        if data is not None:
+            return Response(data)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            try:
+                cache.set(key, response.data, timeout=settings.API_CACHE_TTL)
+            except Exception as e:
+                logger.warning(f"API response cache store failed: {e}")
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
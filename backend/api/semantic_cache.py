@@ -0,0 +1,109 @@
+# backend/api/semantic_cache.py
+
+import logging
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "chatbot:semantic-cache:version"
+# Each answer is its own entry, numbered by an atomic counter, so concurrent stores never overwrite each other
+COUNT_KEY = "chatbot:semantic-cache:v{version}:count"
+ENTRY_KEY = "chatbot:semantic-cache:v{version}:entry:{number}"
+
+
+def _version():
+    return cache.get_or_set(VERSION_KEY, 1, timeout=None)
+
+
+def _normalize(embedding):
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _load_entries():
+    """Returns the latest ``SEMANTIC_CACHE_MAX_ENTRIES`` entries of the current version, oldest first."""
+    version = _version()
+    count = cache.get(COUNT_KEY.format(version=version)) or 0
+    keys = [ENTRY_KEY.format(version=version, number=number) for number in range(max(1, count - settings.SEMANTIC_CACHE_MAX_ENTRIES + 1), count + 1)]
+    entries = cache.get_many(keys) if keys else {}
+    return [entries[key] for key in keys if key in entries]
+
+
+def lookup(embedding):
+    """
+    Returns the cached answer for the closest previous question, or ``None``.
+
+    A cached question matches when its cosine distance to ``embedding`` is within
+    ``SEMANTIC_CACHE_MAX_DISTANCE``. Hits also record the latency they saved.
+    """
+    if not settings.SEMANTIC_CACHE_ENABLED or not embedding:
+        return None
+    try:
+        entries = _load_entries()
+    except Exception as e:
+        logger.warning(f"Semantic cache lookup failed: {e}")
+        return None
+
+    query = _normalize(embedding)
+    # Entries embedded with another model (a different size) cannot match
+    entries = [entry for entry in entries if len(entry["vector"]) == query.nbytes]
+    if entries:
+        matrix = np.frombuffer(b"".join(entry["vector"] for entry in entries), dtype=np.float32).reshape(len(entries), -1)
+        distances = 1.0 - matrix @ query
+        best = int(np.argmin(distances))
+        if distances[best] <= settings.SEMANTIC_CACHE_MAX_DISTANCE:
+            metrics.incr("semantic_cache.hits")
+            metrics.incr("semantic_cache.saved_latency_ms", entries[best]["latency_ms"])
+            return entries[best]["answer"]
+
+    metrics.incr("semantic_cache.misses")
+    return None
+
+
+def store(embedding, answer, latency_ms):
+    """Caches ``answer`` under the question embedding, evicting the oldest entries beyond the limit."""
+    if not settings.SEMANTIC_CACHE_ENABLED or not embedding or not answer:
+        return
+    try:
+        version = _version()
+        count_key = COUNT_KEY.format(version=version)
+        cache.add(count_key, 0, timeout=settings.SEMANTIC_CACHE_TTL)
+        number = cache.incr(count_key)
+        entry = {"vector": _normalize(embedding).tobytes(), "answer": answer, "latency_ms": int(latency_ms)}
+        cache.set(ENTRY_KEY.format(version=version, number=number), entry, timeout=settings.SEMANTIC_CACHE_TTL)
+        if number > settings.SEMANTIC_CACHE_MAX_ENTRIES:
+            cache.delete(ENTRY_KEY.format(version=version, number=number - settings.SEMANTIC_CACHE_MAX_ENTRIES))
+    except Exception as e:
+        logger.warning(f"Semantic cache store failed: {e}")
+
+
+def invalidate():
+    """Drops every cached answer by moving to a new cache version."""
+    try:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        cache.incr(VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Semantic cache invalidation failed: {e}")
+
+
+def get_stats():
+    """Returns the hit rate and the LLM latency saved by the semantic cache."""
+    counters = metrics.get_counters("semantic_cache.hits", "semantic_cache.misses", "semantic_cache.saved_latency_ms")
+    hits, misses = counters["semantic_cache.hits"], counters["semantic_cache.misses"]
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": metrics.ratio(hits, hits + misses),
+        "saved_latency_ms": counters["semantic_cache.saved_latency_ms"],
+    }
+
+
+alookup = sync_to_async(lookup, thread_sensitive=False)
+astore = sync_to_async(store, thread_sensitive=False)
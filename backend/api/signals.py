@@ -2,111 +2,144 @@
 
 import os
 
-from django.conf import settings
-from django.db.models.signals import post_delete, post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from .chromadb_utils import add_or_update_node, delete_node
-from .models import Achievement, Certification, Experience, ExperiencePhoto, Project, ProjectImage, Publication, Resume
-from .utils import clean_html, extract_pdf_text  # ADDED clean_html import
+from . import index_jobs, response_cache, semantic_cache
+from .chatbot import rebuild_special_context
+from .models import Achievement, Certification, Experience, ExperiencePhoto, Project, ProjectImage, Publication, Resume, Tag
 
+# --- Existing ChromaDB Signal Handlers ---
 
-def get_doc_id(instance):
-    """Generates a unique document ID for a model instance."""
-    return f"{instance.__class__.__name__.lower()}-{instance.id}"
 
+# Embedding and writing to ChromaDB happen in the process_index_jobs worker, not in the
+# admin request: the receivers only queue a (debounced) job once the save is committed.
 
-def get_metadata(instance, title_field="title", url_path=None):
-    """Generates metadata for a model instance."""
-    title = getattr(instance, title_field, None) or getattr(instance, "name", "Untitled")
-    return {
-        "type": instance.__class__.__name__.lower(),
-        "title": str(title),
-        "id": str(instance.id),
-        "url": f"/{url_path}/{instance.id}/" if url_path else "",
-    }
 
+def sync_document(instance, created=False, update_fields=None, **kwargs):
+    """
+    Queues the re-indexing of the knowledge-base entry of an instance, unless the
+    save left its indexed text unchanged (e.g. a drag-and-drop reorder in the admin).
+    """
+    if created or instance.indexed_fields_changed(update_fields):
+        index_jobs.enqueue_sync(instance)
 
-# --- Existing ChromaDB Signal Handlers ---
+
+def remove_document(instance):
+    """Queues the removal of the knowledge-base entry of an instance."""
+    index_jobs.enqueue_delete(instance)
 
 
 @receiver(post_save, sender=Project)
 def sync_project_chroma(sender, instance, **kwargs):
-    # Apply clean_html to project description (it's RichTextUploadingField, storing HTML)
-    cleaned_description = clean_html(instance.description)  # ADDED clean_html
-    content = f"Project Title: {instance.title}\nDescription: {cleaned_description}"
-    add_or_update_node(get_doc_id(instance), content, get_metadata(instance, url_path="projects"))
+    sync_document(instance, **kwargs)
 
 
 @receiver(post_delete, sender=Project)
 def delete_project_chroma(sender, instance, **kwargs):
-    delete_node(get_doc_id(instance))
+    remove_document(instance)
 
 
 @receiver(post_save, sender=Resume)
-def sync_resume_chroma(sender, instance, **kwargs):
-    # Delete all other resume nodes to ensure only the latest one is indexed
-    other_resumes = Resume.objects.exclude(pk=instance.pk)
-    for old_resume in other_resumes:
-        delete_node(get_doc_id(old_resume))
-
-    # Index the new/updated resume
-    pdf_path = os.path.join(settings.MEDIA_ROOT, instance.pdf_file.name)
-    if os.path.exists(pdf_path):
-        content = extract_pdf_text(pdf_path)
-        if content:
-            add_or_update_node(get_doc_id(instance), content, get_metadata(instance, url_path="resume"))
+def sync_resume_chroma(sender, instance, created=False, update_fields=None, **kwargs):
+    # Indexing a resume also drops all other resume nodes (with one filtered delete in
+    # index_jobs.process), so only the latest one is indexed
+    sync_document(instance, created, update_fields)
 
 
 @receiver(post_delete, sender=Resume)
 def delete_resume_chroma(sender, instance, **kwargs):
-    delete_node(get_doc_id(instance))
+    remove_document(instance)
 
 
 @receiver(post_save, sender=Certification)
 def sync_certification_chroma(sender, instance, **kwargs):
-    content = f"Certification: {instance.name}\nIssued by: {instance.issuing_organization}"
-    add_or_update_node(get_doc_id(instance), content, get_metadata(instance, title_field="name", url_path="certifications"))
+    sync_document(instance, **kwargs)
 
 
 @receiver(post_delete, sender=Certification)
 def delete_certification_chroma(sender, instance, **kwargs):
-    delete_node(get_doc_id(instance))
+    remove_document(instance)
 
 
 @receiver(post_save, sender=Publication)
 def sync_publication_chroma(sender, instance, **kwargs):
-    content = f"Publication: {instance.title}\nAuthors: {instance.authors}\nConference: {instance.conference}"
-    add_or_update_node(get_doc_id(instance), content, get_metadata(instance, url_path="publications"))
+    sync_document(instance, **kwargs)
 
 
 @receiver(post_delete, sender=Publication)
 def delete_publication_chroma(sender, instance, **kwargs):
-    delete_node(get_doc_id(instance))
+    remove_document(instance)
 
 
 @receiver(post_save, sender=Achievement)
 def sync_achievement_chroma(sender, instance, **kwargs):
-    content = f"Achievement: {instance.title}\nDescription: {instance.description}"
-    add_or_update_node(get_doc_id(instance), content, get_metadata(instance, url_path="achievements"))
+    sync_document(instance, **kwargs)
 
 
 @receiver(post_delete, sender=Achievement)
 def delete_achievement_chroma(sender, instance, **kwargs):
-    delete_node(get_doc_id(instance))
+    remove_document(instance)
 
 
 @receiver(post_save, sender=Experience)
 def sync_experience_chroma(sender, instance, **kwargs):
-    # Apply clean_html to experience work_details (which now stores HTML from CKEditor)
-    cleaned_work_details = clean_html(instance.work_details)  # ADDED clean_html
-    content = f"Experience at {instance.company_name} as {instance.job_title}\nDetails: {cleaned_work_details}"
-    add_or_update_node(get_doc_id(instance), content, get_metadata(instance, title_field="company_name", url_path="experience"))
+    sync_document(instance, **kwargs)
 
 
 @receiver(post_delete, sender=Experience)
 def delete_experience_chroma(sender, instance, **kwargs):
-    delete_node(get_doc_id(instance))
+    remove_document(instance)
+
+
+# --- Chatbot Semantic Cache Invalidation ---
+
+
+def invalidate_chatbot_answers(sender, instance, signal, created=False, update_fields=None, **kwargs):
+    """Drops cached chatbot answers whenever the content they were built from changes."""
+    # Saves that leave the indexed text alone keep the cache, except for the models the
+    # special context is built from (e.g. a new start date changes the latest experience)
+    if signal is post_save and not created and sender not in SPECIAL_CONTEXT_MODELS and not instance.indexed_fields_changed(update_fields):
+        return
+    semantic_cache.invalidate()
+
+
+SPECIAL_CONTEXT_MODELS = (Experience, Publication)
+
+for chatbot_content_model in (Project, Resume, Certification, Publication, Achievement, Experience):
+    post_save.connect(invalidate_chatbot_answers, sender=chatbot_content_model)
+    post_delete.connect(invalidate_chatbot_answers, sender=chatbot_content_model)
+
+
+# --- Chatbot Special Context Snapshot ---
+
+
+def refresh_special_context(sender, **kwargs):
+    """Rebuilds the cached latest-experience/publications context once the change is committed."""
+    transaction.on_commit(rebuild_special_context)
+
+
+for special_context_model in SPECIAL_CONTEXT_MODELS:
+    post_save.connect(refresh_special_context, sender=special_context_model)
+    post_delete.connect(refresh_special_context, sender=special_context_model)
+
+
+# --- API Response Cache Invalidation ---
+# Cached list/detail responses (api/response_cache.py) are keyed on per-model version
+# counters; bumping a counter makes every response built from that model a miss.
+# Queryset update()/bulk_update() do not send these signals: the drag-and-drop reorder of
+# the admin changelist bumps the counter itself (see SortableAdmin in api/admin.py).
+
+for api_model in (Project, ProjectImage, Tag, Publication, Certification, Achievement, Resume, Experience, ExperiencePhoto):
+    post_save.connect(response_cache.bump_version, sender=api_model)
+    post_delete.connect(response_cache.bump_version, sender=api_model)
+
+
+@receiver(m2m_changed, sender=Project.tags.through)
+def invalidate_project_tags(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        response_cache.bump_version(Project)
 
 
 # ============================================================================
@@ -175,69 +208,44 @@ def delete_resume_file(sender, instance, **kwargs):
 
 
 # --- On File Update (using pre_save) ---
+# The previous file names are remembered by FileFieldsMixin when the instance is loaded,
+# so these handlers do not query the database.
+
+
+def delete_replaced_files(instance):
+    """Deletes the stored files that the save of ``instance`` replaces or clears."""
+    for old_file in instance.get_replaced_files():
+        delete_file_if_exists(old_file)
+
+
 @receiver(pre_save, sender=Project)
 def delete_old_project_image_on_update(sender, instance, **kwargs):
     """Delete the old main image file when a new one is uploaded for Project."""
-    if not instance.pk:  # Object is being created, not updated
-        return
-    try:
-        old_instance = sender.objects.get(pk=instance.pk)
-        if old_instance.image and old_instance.image.name != instance.image.name:
-            delete_file_if_exists(old_instance.image)
-    except sender.DoesNotExist:
-        pass  # Old instance not found, nothing to delete (shouldn't happen with instance.pk check)
+    delete_replaced_files(instance)
 
 
 @receiver(pre_save, sender=ProjectImage)
 def delete_old_project_gallery_image_on_update(sender, instance, **kwargs):
     """Delete the old gallery image file when a new one is uploaded for ProjectImage."""
-    if not instance.pk:
-        return
-    try:
-        old_instance = sender.objects.get(pk=instance.pk)
-        if old_instance.image and old_instance.image.name != instance.image.name:
-            delete_file_if_exists(old_instance.image)
-    except sender.DoesNotExist:
-        pass
+    delete_replaced_files(instance)
 
 
 @receiver(pre_save, sender=Certification)
 def delete_old_certification_image_on_update(sender, instance, **kwargs):
     """Delete the old image file when a new one is uploaded for Certification."""
-    if not instance.pk:
-        return
-    try:
-        old_instance = sender.objects.get(pk=instance.pk)
-        if old_instance.image and old_instance.image.name != instance.image.name:
-            delete_file_if_exists(old_instance.image)
-    except sender.DoesNotExist:
-        pass
+    delete_replaced_files(instance)
 
 
 @receiver(pre_save, sender=Achievement)
 def delete_old_achievement_image_on_update(sender, instance, **kwargs):
     """Delete the old image file when a new one is uploaded for Achievement."""
-    if not instance.pk:
-        return
-    try:
-        old_instance = sender.objects.get(pk=instance.pk)
-        if old_instance.image and old_instance.image.name != instance.image.name:
-            delete_file_if_exists(old_instance.image)
-    except sender.DoesNotExist:
-        pass
+    delete_replaced_files(instance)
 
 
 @receiver(pre_save, sender=ExperiencePhoto)
 def delete_old_experience_photo_on_update(sender, instance, **kwargs):
     """Delete the old image file when a new one is uploaded for ExperiencePhoto."""
-    if not instance.pk:
-        return
-    try:
-        old_instance = sender.objects.get(pk=instance.pk)
-        if old_instance.image and old_instance.image.name != instance.image.name:
-            delete_file_if_exists(old_instance.image)
-    except sender.DoesNotExist:
-        pass
+    delete_replaced_files(instance)
 
 
 @receiver(pre_save, sender=Resume)
@@ -247,11 +255,4 @@ def delete_old_resume_file_on_update(sender, instance, **kwargs):
     # and the ChromaDB signal already handles deleting other resume nodes.
     # This pre_save ensures the *previous file for this specific instance* is deleted
     # if a new one is uploaded.
-    if not instance.pk:
-        return
-    try:
-        old_instance = sender.objects.get(pk=instance.pk)
-        if old_instance.pdf_file and old_instance.pdf_file.name != instance.pdf_file.name:
-            delete_file_if_exists(old_instance.pdf_file)
-    except sender.DoesNotExist:
-        pass
+    delete_replaced_files(instance)
@@ -1,18 +1,73 @@
 # api/tests.py
+import asyncio
+import json
+import multiprocessing
 import os
 import shutil
-from io import BytesIO
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
+import numpy as np
+import pypdf
+from asgiref.sync import async_to_sync
 from django.conf import settings
+from django.contrib.auth.models import User
 from django.core import mail
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
 from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
 from PIL import Image
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from .models import Achievement, Certification, Experience, Project, Publication, Tag
+from core.asgi import application as asgi_application
+
+from . import chat_store, clients, embedding_cache, index_jobs, index_telemetry, metrics, semantic_cache
+from .chatbot import CHAT_MODEL, astream_chat_events, get_prompt_stats, get_special_context, pack_context
+from .chromadb_utils import (
+    add_or_update_node,
+    aembed_text,
+    batch_documents,
+    delete_node,
+    delete_nodes_of_type,
+    embed_text,
+    get_collection,
+    get_collection_name,
+    write_nodes,
+)
+from .documents import Document
+from .embeddings import ONNXEmbeddingProvider
+from .indexing import TokenBucket, build_documents
+from .management.commands.benchmark import clean_html_soup, rich_text_body
+from .models import (
+    Achievement,
+    Certification,
+    ChatMessage,
+    ChatSession,
+    Experience,
+    ExperiencePhoto,
+    IndexedDocument,
+    IndexJob,
+    IndexVersion,
+    Project,
+    ProjectImage,
+    Publication,
+    Resume,
+    Tag,
+)
+from .tokens import count_tokens
+from .utils import clean_html, extract_pdf_text
+from .vector_store import LocalCollection
 
 # Define the temporary media root path
 # This should be outside the TestCase class definition but can use settings.BASE_DIR
@@ -28,6 +83,26 @@ def generate_photo_file():
     return SimpleUploadedFile(file.name, file.read(), content_type="image/png")
 
 
+def generate_pdf_bytes(page_texts):
+    """Builds a minimal PDF with one line of text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objects)} 0 R /Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    pdf, offsets = b"%PDF-1.4\n", []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{obj}\nendobj\n".encode()
+    xref = f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n" + "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    trailer = f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{len(pdf)}\n%%EOF\n"
+    return pdf + (xref + trailer).encode()
+
+
 # Apply the override for MEDIA_ROOT to the entire test class
 @override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
 class APITests(TestCase):
@@ -193,3 +268,921 @@ class APITests(TestCase):
         self.assertEqual(sent_email.from_email, settings.DEFAULT_FROM_EMAIL)
 
         self.assertIn(settings.ADMIN_EMAIL, sent_email.to)
+
+    def test_project_list_query_count_does_not_grow_with_projects(self):
+        for i in range(5):
+            project = Project.objects.create(title=f"Project {i}", description="More", image="projects/banners/x.png", display_order=2)
+            project.tags.add(self.tag, Tag.objects.create(name=f"Tag {i}"))
+            ProjectImage.objects.create(project=project, image="projects/gallery/b.png", display_order=2)
+            ProjectImage.objects.create(project=project, image="projects/gallery/a.png", display_order=1)
+
+        with self.assertNumQueries(4):  # count, page, tags, gallery images
+            response = self.client.get(reverse("project-list"), {"page_size": 100})
+        self.assertEqual(len(response.data["results"]), 6)
+        project = next(result for result in response.data["results"] if result["title"] == "Project 0")
+        self.assertEqual([image["display_order"] for image in project["gallery_images"]], [1, 2])
+        self.assertEqual(sorted(project["tags"]), ["Tag 0", "Test Tag"])
+
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("project-list"), {"tag": "test tag", "page_size": 100})
+        self.assertEqual(response.data["count"], 6)
+
+    def test_experience_list_query_count_does_not_grow_with_experiences(self):
+        for i in range(5):
+            experience = Experience.objects.create(company_name=f"Company {i}", start_date="2023-01-01", work_details="Work", display_order=2)
+            ExperiencePhoto.objects.create(experience=experience, image="experience/memories/b.png", display_order=2)
+            ExperiencePhoto.objects.create(experience=experience, image="experience/memories/a.png", display_order=1)
+
+        with self.assertNumQueries(3):  # count, page, photos
+            response = self.client.get(reverse("experience-list"), {"page_size": 100})
+        self.assertEqual(len(response.data["results"]), 6)
+        self.assertEqual([photo["display_order"] for photo in response.data["results"][1]["photos"]], [1, 2])
+
+    @override_settings(API_CACHE_ENABLED=True)
+    def test_responses_are_cached_until_a_model_they_are_built_from_changes(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        url = reverse("project-list")
+        first = self.client.get(url, {"page_size": 10})
+        with self.assertNumQueries(0):  # parameters the view ignores (and blank ones) share the entry
+            response = self.client.get(url, {"page_size": "10", "tag": "", "_": "123"})
+        self.assertEqual(response.data, first.data)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.name = "Renamed Tag"
+            self.tag.save()
+        self.assertEqual(self.client.get(url, {"page_size": 10}).data["results"][0]["tags"], ["Renamed Tag"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.tags.clear()
+        self.assertEqual(self.client.get(url, {"page_size": 10}).data["results"][0]["tags"], [])
+
+        detail_url = reverse("project-detail", args=[self.project.id])
+        self.client.get(detail_url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(detail_url).data["title"], "Test Project")
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.get(pk=self.project.pk).delete()
+        self.assertEqual(self.client.get(detail_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(url, {"page_size": 10}).data["count"], 0)
+
+    def reorder_in_admin(self, model, updated_items):
+        """Posts a drag-and-drop reorder of the admin changelist of ``model``."""
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+        url = reverse(f"admin:api_{model._meta.model_name}_sortable_update")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {"updatedItems": updated_items}, format="json")
+        self.client.logout()
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+
+    @override_settings(API_CACHE_ENABLED=True)
+    def test_admin_reorders_invalidate_cached_responses(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        other = Project.objects.create(title="Other Project", description="Another project", display_order=2)
+        url = reverse("project-list")
+        self.assertEqual([project["title"] for project in self.client.get(url).data["results"]], ["Test Project", "Other Project"])
+
+        self.reorder_in_admin(Project, [[other.pk, 1], [self.project.pk, 2]])
+        self.assertEqual([project["title"] for project in self.client.get(url).data["results"]], ["Other Project", "Test Project"])
+
+    def test_unchanged_responses_are_not_modified(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        url = reverse("publication-list")
+        response = self.client.get(url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.client.get(url, {"page": 2}, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_404_NOT_FOUND)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.publication.title = "Renamed Publication"
+            self.publication.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        # Even within the same second as the previous response
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, status.HTTP_200_OK)
+        self.assertGreater(parse_http_date(response["Last-Modified"]), parse_http_date(last_modified))
+        self.assertEqual(response.data["results"][0]["title"], "Renamed Publication")
+
+    def test_admin_reorders_move_the_validators(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        other = Project.objects.create(title="Other Project", description="Another project", display_order=2)
+        url = reverse("project-list")
+        response = self.client.get(url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        self.reorder_in_admin(Project, [[other.pk, 1], [self.project.pk, 2]])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual([project["title"] for project in response.data["results"]], ["Other Project", "Test Project"])
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, status.HTTP_200_OK)
+
+    def test_saves_do_not_reload_the_row_for_file_cleanup(self):
+        project = Project.objects.get(pk=self.project.pk)
+        project.display_order = 5
+        with self.assertNumQueries(1):
+            project.save()
+        self.assertTrue(os.path.isfile(project.image.path))
+
+    def test_replacing_a_file_deletes_the_old_one_without_a_query(self):
+        project = Project.objects.get(pk=self.project.pk)
+        old_path = project.image.path
+        project.image = generate_photo_file()
+        with self.assertNumQueries(1):
+            project.save()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.isfile(project.image.path))
+
+
+class ChatbotTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        buffer = chat_store.get_buffer()
+        buffer.ack(len(buffer))
+
+    @mock.patch("api.chatbot.aquery_nodes", return_value={"documents": [["Some context"]]})
+    @mock.patch("api.chatbot.agenerate_answer", return_value="Hello world")
+    def test_chatbot_answers_query(self, mock_generate_answer, mock_query_nodes):
+        response = self.client.post(reverse("chatbot"), {"query": "Who are you?"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["answer"], "Hello world")
+        self.assertIn("Some context", mock_generate_answer.call_args.args[0])
+        self.assertEqual(get_prompt_stats()["prompts"], 1)
+
+        # Messages are written behind the request
+        self.assertFalse(ChatMessage.objects.exists())
+        chat_store.flush()
+
+        # Both sides of the conversation are saved, in order, on the returned session
+        messages = ChatMessage.objects.filter(session_id=response.data["session_id"])
+        self.assertEqual([m.sender for m in messages], ["user", "bot"])
+
+    @mock.patch("api.chatbot.aquery_nodes", return_value={"documents": [["Some context"]]})
+    @mock.patch("api.chatbot.astream_answer")
+    def test_chatbot_streams_answer(self, mock_stream_answer, mock_query_nodes):
+        async def fake_stream(prompt):
+            for delta in ["Hello", " world"]:
+                yield delta
+
+        async def read_stream(response):
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        mock_stream_answer.side_effect = fake_stream
+        response = self.client.post(reverse("chatbot"), {"query": "Who are you?", "stream": True}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        frames = async_to_sync(read_stream)(response).decode().strip().split("\n\n")
+
+        # The session ID is sent in the first frame, followed by one frame per delta
+        self.assertTrue(frames[0].startswith("event: session"))
+        self.assertIn('"content": "Hello"', frames[1])
+        self.assertIn('"content": " world"', frames[2])
+        self.assertTrue(frames[-1].startswith("event: done"))
+
+        # The full answer is saved as a single bot message
+        chat_store.flush()
+        bot_messages = ChatMessage.objects.filter(sender="bot")
+        self.assertEqual(bot_messages.count(), 1)
+        self.assertEqual(bot_messages.get().message, "Hello world")
+
+    @mock.patch("api.chatbot.aquery_nodes", return_value={"documents": [["Some context"]]})
+    @mock.patch("api.chatbot.astream_answer")
+    def test_streamed_query_is_saved_when_the_client_leaves_after_the_session_frame(self, mock_stream_answer, mock_query_nodes):
+        async def read_session_frame():
+            events = astream_chat_events("Who are you?", None)
+            frame = await anext(events)
+            await events.aclose()
+            return frame
+
+        self.assertTrue(async_to_sync(read_session_frame)().startswith("event: session"))
+        chat_store.flush()
+        self.assertEqual(list(ChatMessage.objects.values_list("sender", "message")), [("user", "Who are you?")])
+        mock_stream_answer.assert_not_called()
+
+    @mock.patch("api.chatbot.aquery_nodes", return_value={"documents": [["Some context"]]})
+    @mock.patch("api.chatbot.aembed_text")
+    @mock.patch("api.chatbot.agenerate_answer", return_value="Python, Django and ML.")
+    def test_chatbot_reuses_answer_for_similar_question(self, mock_generate_answer, mock_embed_text, mock_query_nodes):
+        mock_embed_text.side_effect = [[1.0, 0.0, 0.0], [0.99, 0.05, 0.0], [0.99, 0.05, 0.0]]
+
+        self.client.post(reverse("chatbot"), {"query": "What are his skills?"}, format="json")
+        response = self.client.post(reverse("chatbot"), {"query": "what are his skills"}, format="json")
+
+        self.assertEqual(response.data["answer"], "Python, Django and ML.")
+        self.assertEqual(mock_generate_answer.call_count, 1)
+        self.assertEqual(semantic_cache.get_stats()["hits"], 1)
+
+        # Changing the underlying content invalidates the cached answers
+        Publication.objects.create(
+            title="New Publication",
+            authors="John Doe",
+            conference="TestConf",
+            publication_url="https://example.com",
+            published_date="2025-01-01",
+        )
+        self.client.post(reverse("chatbot"), {"query": "what are his skills"}, format="json")
+        self.assertEqual(mock_generate_answer.call_count, 2)
+
+    @override_settings(SEMANTIC_CACHE_MAX_ENTRIES=48)
+    def test_concurrent_semantic_cache_stores_are_all_kept(self):
+        def vector(i):
+            return [float(i == j) for j in range(40)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: semantic_cache.store(vector(i), f"Answer {i}", 100), range(40)))
+        self.assertEqual([semantic_cache.lookup(vector(i)) for i in range(40)], [f"Answer {i}" for i in range(40)])
+
+        # Beyond the limit, the oldest entries are evicted
+        for i in range(10):
+            semantic_cache.store(vector(i), f"New answer {i}", 100)
+        self.assertEqual(semantic_cache.lookup(vector(0)), "New answer 0")
+        self.assertEqual(len(semantic_cache._load_entries()), 48)
+
+    @override_settings(CACHES={"default": {"BACKEND": "django_redis.cache.RedisCache", "LOCATION": "redis://127.0.0.1:6379/1", "KEY_PREFIX": "test"}})
+    def test_metrics_are_incremented_in_one_redis_round_trip(self):
+        with mock.patch("django_redis.get_redis_connection") as mock_connection:
+            metrics.incr_many({"chatbot.prompts": 1, "chatbot.prompt_tokens": 250})
+        pipeline = mock_connection.return_value.pipeline.return_value
+        self.assertEqual(
+            pipeline.incrby.call_args_list, [mock.call("test:1:metrics:chatbot.prompts", 1), mock.call("test:1:metrics:chatbot.prompt_tokens", 250)]
+        )
+        pipeline.execute.assert_called_once_with()
+
+    def test_buffered_messages_are_flushed_once_and_in_order(self):
+        session_id = uuid.uuid4()
+        chat_store.enqueue_message(session_id, "user", "Hi")
+        chat_store.enqueue_message(session_id, "bot", "Hello!")
+        records = chat_store.get_buffer().peek(10)
+
+        with self.assertNumQueries(4):  # SAVEPOINT, one bulk insert per table, RELEASE
+            self.assertEqual(chat_store.flush(), 2)
+
+        # Replaying the same records (e.g. after a crash before the ack) does not duplicate them
+        chat_store.write_records(records)
+        session = ChatSession.objects.get(id=session_id)
+        self.assertEqual([(m.sender, m.message) for m in session.messages.all()], [("user", "Hi"), ("bot", "Hello!")])
+
+    def test_an_invalid_buffered_message_is_dead_lettered(self):
+        session_id = uuid.uuid4()
+        buffer = chat_store.get_buffer()
+        buffer.dead_letters.clear()
+        chat_store.enqueue_message(session_id, "user", "Hi")
+        buffer.append(
+            {"id": str(uuid.uuid4()), "session_id": "not-a-uuid", "sender": "user", "message": "Lost", "created_at": timezone.now().isoformat()}
+        )
+        chat_store.enqueue_message(session_id, "bot", "Hello!")
+
+        self.assertEqual(chat_store.flush(), 3)
+        self.assertEqual(len(buffer), 0)
+        session = ChatSession.objects.get(id=session_id)
+        self.assertEqual([m.message for m in session.messages.all()], ["Hi", "Hello!"])
+        self.assertEqual([record["message"] for record in buffer.dead_letters], ["Lost"])
+        self.assertIn("error", buffer.dead_letters[0])
+
+    @override_settings(CHATBOT_MIN_DOCUMENT_TOKENS=64)
+    def test_pack_context_fills_budget_in_relevance_order(self):
+        special_context = ["He works as an ML Engineer."]
+        documents = ["alpha " * 50, "beta " * 500, "gamma"]
+        budget = count_tokens(special_context[0], CHAT_MODEL) + count_tokens(documents[0], CHAT_MODEL) + 80
+
+        context, stats = pack_context(special_context, documents, budget=budget)
+
+        self.assertTrue(context.startswith("He works as an ML Engineer."))
+        self.assertIn("beta", context)
+        self.assertNotIn("gamma", context)
+        self.assertEqual((stats["documents_used"], stats["documents_truncated"], stats["documents_dropped"]), (1, 1, 1))
+        self.assertEqual(stats["context_tokens"], budget)
+
+    def test_special_context_is_served_from_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Experience.objects.create(company_name="Acme", job_title="ML Engineer", start_date="2024-01-01", is_current=True, work_details="Details")
+
+        with self.assertNumQueries(0):
+            special_context = get_special_context()
+        self.assertIn("ML Engineer at Acme", special_context[0])
+
+        # Changing an Experience rebuilds the snapshot
+        with self.captureOnCommitCallbacks(execute=True):
+            Experience.objects.update(job_title="AI Team Lead")
+            Experience.objects.get().save()
+        self.assertIn("AI Team Lead at Acme", get_special_context()[0])
+
+    @override_settings(OPENAI_API_KEY="test-key")
+    @mock.patch("api.clients.AsyncOpenAI")
+    def test_lifespan_startup_warms_up_the_async_client_of_the_serving_loop(self, mock_async_openai):
+        mock_async_openai.return_value.models.list = mock.AsyncMock()
+        mock_async_openai.return_value.close = mock.AsyncMock()
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        async def serve():
+            await asgi_application({"type": "lifespan"}, receive, send)
+            return clients.get_async_openai_client()
+
+        self.assertIs(async_to_sync(serve)(), mock_async_openai.return_value)
+        mock_async_openai.assert_called_once()
+        mock_async_openai.return_value.models.list.assert_awaited_once()
+        self.assertEqual(sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"])
+
+    @mock.patch("api.clients.AsyncOpenAI", side_effect=lambda **kwargs: mock.Mock(close=mock.AsyncMock()))
+    def test_async_clients_are_kept_per_event_loop_and_closed_with_it(self, mock_async_openai):
+        async def get_client():
+            client = clients.get_async_openai_client()
+            self.assertIs(clients.get_async_openai_client(), client)
+            return client
+
+        # Like async_to_sync under WSGI: every call runs, then closes, an event loop of its own
+        first, second = asyncio.run(get_client()), asyncio.run(get_client())
+        self.assertIsNot(first, second)
+        first.close.assert_awaited_once()
+        second.close.assert_awaited_once()
+        self.assertEqual(len(clients._async_openai_clients), 0)
+
+
+@override_settings(OPENAI_API_KEY="test-key")
+class EmbeddingCacheTests(TestCase):
+    def setUp(self):
+        metrics.flush()
+        cache.clear()
+        embedding_cache.local_cache.clear()
+
+    @mock.patch("api.clients.get_openai_client")
+    def test_embed_text_reuses_cached_vector(self, mock_openai):
+        mock_openai.return_value.embeddings.create.return_value.data = [mock.Mock(embedding=[0.5, 0.25, -1.0])]
+
+        self.assertEqual(embed_text("Hello"), [0.5, 0.25, -1.0])
+        # A local hit does not touch the shared cache, not even for its counter
+        with mock.patch("api.embedding_cache.cache") as mock_cache, mock.patch("api.metrics.cache") as mock_metrics_cache:
+            self.assertEqual(embed_text("Hello"), [0.5, 0.25, -1.0])
+        self.assertEqual(mock_cache.method_calls + mock_metrics_cache.method_calls, [])
+        self.assertEqual(mock_openai.return_value.embeddings.create.call_count, 1)
+
+        # A fresh process still finds the vector in the shared tier
+        embedding_cache.local_cache.clear()
+        self.assertEqual(embed_text("Hello"), [0.5, 0.25, -1.0])
+        self.assertEqual(mock_openai.return_value.embeddings.create.call_count, 1)
+
+        stats = embedding_cache.get_stats()
+        self.assertEqual((stats["local_hits"], stats["shared_hits"], stats["misses"]), (1, 1, 1))
+
+    @mock.patch("api.clients.get_openai_client")
+    def test_embed_text_failure_is_logged_and_recorded(self, mock_openai):
+        mock_openai.return_value.embeddings.create.side_effect = RuntimeError("provider down")
+        telemetry = index_telemetry.IndexTelemetry("test")
+
+        with self.assertLogs("api.chromadb_utils", "ERROR") as logs:
+            self.assertIsNone(embed_text("Hello", telemetry=telemetry))
+        self.assertIn("provider down", logs.output[0])
+        self.assertEqual(telemetry.failures, [{"stage": "embed", "doc_ids": [], "error": "provider down"}])
+        self.assertEqual(metrics.get_counters("embeddings.failures")["embeddings.failures"], 1)
+
+    @mock.patch("api.clients.get_async_openai_client")
+    def test_async_embedding_failure_is_counted_off_the_event_loop(self, mock_async_openai):
+        mock_async_openai.return_value.embeddings.create = mock.AsyncMock(side_effect=RuntimeError("provider down"))
+        counted_in = []
+
+        async def embed():
+            with mock.patch("api.metrics.incr", side_effect=lambda name: counted_in.append(threading.get_ident())):
+                return await aembed_text("Hello"), threading.get_ident()
+
+        with self.assertLogs("api.chromadb_utils", "ERROR"):
+            embedding, loop_thread = async_to_sync(embed)()
+        self.assertIsNone(embedding)
+        self.assertEqual(len(counted_in), 1)
+        self.assertNotEqual(counted_in[0], loop_thread)
+
+    def test_local_cache_evicts_least_recently_used_by_size(self):
+        lru = embedding_cache.LocalLRUCache(max_bytes=8)
+        lru.set("a", b"1234")
+        lru.set("b", b"5678")
+        lru.get("a")
+        lru.set("c", b"9012")
+
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.get("a"), b"1234")
+        self.assertEqual(lru.current_bytes, 8)
+
+
+def indexed_parents():
+    return {metadata["parent_id"] for metadata in get_collection().get()["metadatas"]}
+
+
+@override_settings(OPENAI_API_KEY="test-key")
+class IndexContentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        embedding_cache.local_cache.clear()
+        # The active collection version pointer must not outlive the test's database rows
+        self.addCleanup(cache.clear)
+
+    def test_batch_documents_respects_count_and_token_limits(self):
+        documents = [Document(f"doc-{i}", "word " * 40, {}) for i in range(5)]
+        self.assertEqual([len(batch) for batch in batch_documents(documents, max_count=2, max_tokens=10_000)], [2, 2, 1])
+        self.assertEqual([len(batch) for batch in batch_documents(documents, max_count=10, max_tokens=count_tokens("word " * 40, "x") * 3)], [3, 2])
+
+    @mock.patch("api.clients.get_openai_client")
+    def test_index_content_embeds_and_upserts_in_batches(self, mock_openai):
+        create = mock_openai.return_value.embeddings.create
+        create.side_effect = lambda input, model: mock.Mock(data=[mock.Mock(embedding=[float(len(text)), 1.0]) for text in input])
+        for i in range(5):
+            Certification.objects.create(name=f"Cert {i}", issuing_organization="Org", issue_date="2024-01-01")
+        create.reset_mock()
+        embedding_cache.local_cache.clear()
+        cache.clear()
+
+        call_command("index_content", "--reindex", "--batch-size", "4", stdout=StringIO())
+
+        # 3 static documents + 5 certifications, embedded in two requests
+        self.assertEqual(create.call_count, 2)
+        self.assertEqual(len(indexed_parents()), 8)
+
+    @mock.patch("api.clients.get_openai_client")
+    def test_incremental_index_only_embeds_changes_and_removes_orphans(self, mock_openai):
+        create = mock_openai.return_value.embeddings.create
+        create.side_effect = lambda input, model: mock.Mock(data=[mock.Mock(embedding=[float(len(text)), 1.0]) for text in input])
+        kept, changed = (Certification.objects.create(name=f"Cert {i}", issuing_organization="Org", issue_date="2024-01-01") for i in range(2))
+        call_command("index_content", "--reindex", stdout=StringIO())
+        self.assertEqual(len(indexed_parents()), 5)
+
+        # Bypass the signals, as if content had changed while the indexer was not running
+        Certification.objects.filter(pk=changed.pk).update(issuing_organization="Another Org")
+        get_collection().upsert(
+            ids=["certification-deleted#chunk-0", "certification-legacy"],
+            embeddings=[[1.0, 1.0], [1.0, 1.0]],
+            documents=["Stale", "Written before chunking"],
+            metadatas=[{"type": "certification", "parent_id": "certification-deleted", "chunk": 0, "chunks": 1}, {"type": "certification"}],
+        )
+        chunk_count = get_collection().count()
+        embedding_cache.local_cache.clear()
+        cache.clear()
+        create.reset_mock()
+
+        out = StringIO()
+        call_command("index_content", "--dry-run", stdout=out)
+        self.assertIn(f"1 changed: certification-{changed.pk}", out.getvalue())
+        self.assertIn("1 orphaned: certification-deleted", out.getvalue())
+        self.assertIn("1 unchunked legacy entries", out.getvalue())
+        self.assertEqual(get_collection().count(), chunk_count)
+
+        call_command("index_content", "--incremental", stdout=StringIO())
+        self.assertEqual(create.call_count, 1)
+        self.assertEqual(create.call_args.kwargs["input"], ["Certification: Cert 1\nIssued by: Another Org"])
+        self.assertEqual(get_collection().get(ids=["certification-deleted#chunk-0", "certification-legacy"])["ids"], [])
+        self.assertEqual(get_collection().count(), chunk_count - 2)
+        self.assertEqual(IndexedDocument.objects.count(), 5)
+        self.assertTrue(IndexedDocument.objects.filter(doc_id=f"certification-{kept.pk}").exists())
+
+    @mock.patch("api.clients.get_openai_client")
+    def test_index_content_reports_timings_tokens_cost_and_failures(self, mock_openai):
+        create = mock_openai.return_value.embeddings.create
+        create.side_effect = lambda input, model: mock.Mock(data=[mock.Mock(embedding=[float(len(text)), 1.0]) for text in input])
+        certification = Certification.objects.create(name="Cert", issuing_organization="Org", issue_date="2024-01-01")
+        cache.clear()
+
+        out, err = StringIO(), StringIO()
+        call_command("index_content", "--json", "-", stdout=out, stderr=err)
+        summary = json.loads(out.getvalue())
+        self.assertIn("Content indexing complete!", err.getvalue())
+        self.assertEqual(summary["documents"], 4)
+        self.assertEqual(summary["failures"], [])
+        usage = summary["models"]["text-embedding-3-small"]
+        self.assertEqual(usage["billed_tokens"], summary["tokens"])
+        self.assertAlmostEqual(usage["estimated_cost_usd"], summary["tokens"] * 0.02 / 1_000_000, places=6)
+        document = next(d for d in summary["slowest"] if d["doc_id"] == f"certification-{certification.pk}")
+        self.assertEqual(document["type"], "certification")
+        self.assertGreater(document["tokens"], 0)
+        self.assertGreater(document["embed_ms"], 0)
+
+        embedding_cache.local_cache.clear()
+        cache.clear()
+        create.side_effect = RuntimeError("OpenAI is down")
+        summary_path = os.path.join(tempfile.mkdtemp(), "summary.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(summary_path), ignore_errors=True)
+        call_command("index_content", "--json", summary_path, stdout=StringIO())
+        with open(summary_path, encoding="utf-8") as f:
+            failures = json.load(f)["failures"]
+        self.assertEqual(failures[0]["stage"], "embed")
+        self.assertIn("OpenAI is down", failures[0]["error"])
+
+        stats = index_telemetry.get_stats()
+        self.assertEqual(stats["index_content"]["runs"], 1)
+        self.assertEqual(stats["index_content"]["failures"], 1)
+        self.assertEqual(stats["embedding_failures"], 1)
+
+    @mock.patch("api.clients.get_openai_client")
+    def test_reindex_builds_a_new_version_and_switches_once_complete(self, mock_openai):
+        create = mock_openai.return_value.embeddings.create
+        create.side_effect = lambda input, model: mock.Mock(data=[mock.Mock(embedding=[float(len(text)), 1.0]) for text in input])
+        Certification.objects.create(name="Cert", issuing_organization="Org", issue_date="2024-01-01")
+        call_command("index_content", "--reindex", stdout=StringIO())
+        first = IndexVersion.objects.get(state="active")
+        self.assertEqual(get_collection_name(), first.name)
+        self.assertEqual(len(indexed_parents()), 4)
+
+        # While the next version is built, readers keep seeing the complete active one
+        served = []
+
+        def write_and_observe(chunks, vectors, collection):
+            served.append((get_collection_name(), len(indexed_parents())))
+            return write_nodes(chunks, vectors, collection)
+
+        with mock.patch("api.management.commands.index_content.write_nodes", side_effect=write_and_observe):
+            call_command("index_content", "--reindex", stdout=StringIO())
+        self.assertEqual(served[0], (first.name, 4))
+        second = IndexVersion.objects.get(state="active")
+        self.assertNotEqual(second.name, first.name)
+        self.assertEqual(get_collection_name(), second.name)
+        self.assertEqual(len(indexed_parents()), 4)
+        # The previous version is kept for rollback, the unversioned collection was dropped
+        self.assertEqual(list(IndexVersion.objects.filter(state="retired").values_list("name", flat=True)), [first.name])
+
+        # Rolling back waits for other processes to switch, then catches up with changes made since
+        Certification.objects.create(name="Added later", issuing_organization="Org", issue_date="2024-02-01")
+        with self.settings(INDEX_VERSION_CHECK_INTERVAL=2.0), mock.patch("time.sleep") as mock_sleep:
+            call_command("index_content", "--rollback", stdout=StringIO())
+        mock_sleep.assert_called_once_with(3.0)
+        self.assertEqual(get_collection_name(), first.name)
+        self.assertEqual(len(indexed_parents()), 5)
+
+        # A failed build is discarded and the active version keeps serving
+        embedding_cache.local_cache.clear()
+        cache.clear()
+        create.side_effect = RuntimeError("OpenAI is down")
+        with self.assertRaises(CommandError):
+            call_command("index_content", "--reindex", stdout=StringIO())
+        self.assertEqual(get_collection_name(), first.name)
+        self.assertEqual(IndexVersion.objects.count(), 2)
+
+    @override_settings(INDEX_CHUNK_SIZE=20, INDEX_CHUNK_OVERLAP=0)
+    @mock.patch("api.clients.get_openai_client")
+    def test_long_documents_are_chunked_and_replaced_as_a_whole(self, mock_openai):
+        mock_openai.return_value.embeddings.create.side_effect = lambda input, model: mock.Mock(data=[mock.Mock(embedding=[1.0, 0.0]) for _ in input])
+        paragraphs = [f"Paragraph {i} of the resume. " * 4 for i in range(5)]
+
+        add_or_update_node("resume-1", "\n\n".join(paragraphs), {"type": "resume", "title": "CV"})
+        chunks = get_collection().get(where={"parent_id": "resume-1"})
+        self.assertGreater(len(chunks["ids"]), 1)
+        self.assertIn("resume-1#chunk-0", chunks["ids"])
+        self.assertTrue(all(metadata["title"] == "CV" for metadata in chunks["metadatas"]))
+
+        add_or_update_node("resume-1", "Short resume.", {"type": "resume", "title": "CV"})
+        self.assertEqual(get_collection().get(where={"parent_id": "resume-1"})["documents"], ["Short resume."])
+
+        delete_node("resume-1")
+        self.assertEqual(get_collection().get(where={"parent_id": "resume-1"})["ids"], [])
+
+    def test_build_documents_extracts_in_worker_processes(self):
+        projects = [Project(title=f"Project {i}", description=f"<p>Built <b>thing {i}</b></p>") for i in range(5)]
+        static = Document("static-skills", "Skills", {"type": "skills"})
+
+        documents = list(build_documents([static, *projects], workers=2))
+
+        self.assertEqual(len(documents), 6)
+        self.assertEqual(documents[0], static)
+        contents = {document.doc_id: document.content for document in documents}
+        self.assertEqual(contents[f"project-{projects[3].pk}"], "Project Title: Project 3\nDescription: Built thing 3")
+
+    def test_pdf_text_is_extracted_once_per_page_and_cached_by_content(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        data = generate_pdf_bytes(["Page one", "Page two", "Page three"])
+        for name in ("cv.pdf", "cv_copy.pdf"):
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(data)
+        cache_dir = os.path.join(directory, "cache")
+
+        with mock.patch.object(pypdf.PageObject, "extract_text", autospec=True, side_effect=pypdf.PageObject.extract_text) as extract_text:
+            text = extract_pdf_text(os.path.join(directory, "cv.pdf"), cache_dir=cache_dir)
+            self.assertEqual(text, "Page one\nPage two\nPage three")
+            self.assertEqual(extract_text.call_count, 3)
+
+            # Same content under another path: served from the cache without parsing
+            with mock.patch("api.utils.pypdf.PdfReader") as reader:
+                self.assertEqual(extract_pdf_text(os.path.join(directory, "cv_copy.pdf"), cache_dir=cache_dir), text)
+            reader.assert_not_called()
+
+    def test_large_pdfs_are_extracted_in_worker_processes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, "cv.pdf")
+        with open(path, "wb") as f:
+            f.write(generate_pdf_bytes([f"Page {number}" for number in range(5)]))
+
+        with mock.patch("api.utils.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as pool:
+            text = extract_pdf_text(path, workers=2, parallel_min_pages=4)
+        pool.assert_called_once()
+        self.assertEqual(text, "\n".join(f"Page {number}" for number in range(5)))
+
+    def test_pdf_text_cache_drops_least_recently_used_texts_beyond_its_size(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        cache_dir = os.path.join(directory, "cache")
+        paths = []
+        for number in range(3):
+            paths.append(os.path.join(directory, f"cv{number}.pdf"))
+            with open(paths[-1], "wb") as f:
+                f.write(generate_pdf_bytes([f"Resume {number}"]))
+
+        # Each text is 8 bytes: the cache keeps two, and reading the first one makes it the most recent
+        extract_pdf_text(paths[0], cache_dir=cache_dir, cache_max_bytes=16)
+        time.sleep(0.01)
+        extract_pdf_text(paths[1], cache_dir=cache_dir, cache_max_bytes=16)
+        time.sleep(0.01)
+        extract_pdf_text(paths[0], cache_dir=cache_dir, cache_max_bytes=16)
+        time.sleep(0.01)
+        extract_pdf_text(paths[2], cache_dir=cache_dir, cache_max_bytes=16)
+
+        cached = sorted(path.read_text() for path in Path(cache_dir).iterdir())
+        self.assertEqual(cached, ["Resume 0", "Resume 2"])
+
+    def test_build_documents_workers_parse_pdfs_without_a_pool_of_their_own(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with open(os.path.join(media_root, "cv.pdf"), "wb") as f:
+            f.write(generate_pdf_bytes([f"Page {number}" for number in range(5)]))
+
+        pdf_settings = {"PDF_TEXT_CACHE_DIR": os.path.join(media_root, "cache"), "PDF_EXTRACT_WORKERS": 2, "PDF_EXTRACT_PARALLEL_PAGES": 4}
+        with (
+            self.settings(MEDIA_ROOT=media_root, **pdf_settings),
+            mock.patch("api.indexing.ProcessPoolExecutor", lambda max_workers, mp_context: ThreadPoolExecutor(max_workers)),
+            mock.patch("api.utils.ProcessPoolExecutor") as pdf_pool,
+        ):
+            documents = list(build_documents([Resume(pk=1, title="CV", pdf_file="cv.pdf")], workers=2))
+
+        pdf_pool.assert_not_called()
+        self.assertEqual(documents[0].content, "\n".join(f"Page {number}" for number in range(5)))
+
+    def test_clean_html_matches_beautifulsoup_output(self):
+        bodies = [
+            rich_text_body(3),
+            "<!DOCTYPE html><html><head><title>Page</title><style>p { margin: 0 }</style></head><body><p>Hello</p></body></html>",
+            "<p>Fish &amp; chips &lt;3 &nbsp; caf&eacute; &#8212; done</p><!-- a comment --><p>Multi  column   text</p>",
+            "<div>Unclosed <b>bold <i>italic</div><script type='text/javascript'>var a = '<p>not text</p>';</script>Tail",
+            "   \n\n<p>\n  Indented\n\n  lines  </p>\n",
+            "Plain text without tags",
+            "<p><strong>Python</strong>  <em>Django</em></p>",
+            "<table><tr><td>a</td>  <td>b</td></tr></table>",
+            "<p>a</p>\t\t<p>b</p><p>c</p> \n <p>d</p>",
+            "<pre><code>x</code>   <code>y</code></pre><textarea>  \t </textarea>",
+        ]
+        for body in bodies:
+            self.assertEqual(clean_html(body), clean_html_soup(body), body)
+
+    def test_token_bucket_waits_for_refill(self):
+        bucket = TokenBucket(per_minute=600)  # 10 tokens per second
+        bucket.acquire(600)
+        started = time.monotonic()
+        bucket.acquire(2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+
+
+@override_settings(OPENAI_API_KEY="test-key", INDEX_JOB_DEBOUNCE=60)
+class IndexJobTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        embedding_cache.local_cache.clear()
+
+    def make_due(self):
+        IndexJob.objects.update(run_after=timezone.now())
+
+    @mock.patch("api.clients.get_openai_client")
+    def test_saves_are_coalesced_and_indexed_by_the_worker(self, mock_openai):
+        create = mock_openai.return_value.embeddings.create
+        create.side_effect = lambda input, model: mock.Mock(data=[mock.Mock(embedding=[1.0, 0.0]) for _ in input])
+        with self.captureOnCommitCallbacks(execute=True):
+            certification = Certification.objects.create(name="Cert", issuing_organization="Org", issue_date="2024-01-01")
+        with self.captureOnCommitCallbacks(execute=True):
+            certification.name = "Renamed Cert"
+            certification.save()
+
+        # Nothing is embedded on the save path, and the two saves share one job
+        self.assertEqual(create.call_count, 0)
+        self.assertEqual(IndexJob.objects.count(), 1)
+        self.assertEqual(index_jobs.process(), 0)
+
+        self.make_due()
+        self.assertEqual(index_jobs.process(), 1)
+        self.assertEqual(create.call_count, 1)
+        doc_id = f"certification-{certification.pk}"
+        self.assertEqual(get_collection().get(where={"parent_id": doc_id})["documents"], ["Certification: Renamed Cert\nIssued by: Org"])
+        self.assertFalse(IndexJob.objects.exists())
+        self.assertEqual(index_telemetry.get_stats()["index_jobs"]["documents"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            certification.delete()
+        self.make_due()
+        self.assertEqual(index_jobs.process(), 1)
+        self.assertEqual(get_collection().get(where={"parent_id": doc_id})["ids"], [])
+        self.assertFalse(IndexedDocument.objects.filter(doc_id=doc_id).exists())
+
+    @mock.patch("api.clients.get_openai_client")
+    def test_failed_jobs_are_retried_later(self, mock_openai):
+        mock_openai.return_value.embeddings.create.side_effect = RuntimeError("OpenAI is down")
+        with self.captureOnCommitCallbacks(execute=True):
+            Certification.objects.create(name="Cert", issuing_organization="Org", issue_date="2024-01-01")
+        self.make_due()
+
+        self.assertEqual(index_jobs.process(), 0)
+        job = IndexJob.objects.get()
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_after, timezone.now())
+
+    @override_settings(INDEX_JOB_MAX_ATTEMPTS=2)
+    @mock.patch("api.clients.get_openai_client")
+    def test_a_poison_job_does_not_hold_back_its_batch(self, mock_openai):
+        def embed(input, model):
+            if any("Poison" in text for text in input):
+                raise ValueError("Invalid input")
+            return mock.Mock(data=[mock.Mock(embedding=[1.0, 0.0]) for _ in input])
+
+        create = mock_openai.return_value.embeddings.create
+        create.side_effect = embed
+        with self.captureOnCommitCallbacks(execute=True):
+            poison = Certification.objects.create(name="Poison", issuing_organization="Org", issue_date="2024-01-01")
+            healthy = Certification.objects.create(name="Healthy", issuing_organization="Org", issue_date="2024-01-01")
+        self.make_due()
+
+        self.assertEqual(index_jobs.process(), 1)
+        self.assertIn(f"certification-{healthy.pk}", indexed_parents())
+        job = IndexJob.objects.get()
+        self.assertEqual((job.doc_id, job.attempts, job.failed_at), (f"certification-{poison.pk}", 1, None))
+        self.assertEqual(index_telemetry.get_stats()["index_jobs"]["failures"], 1)
+
+        # Given up on after INDEX_JOB_MAX_ATTEMPTS, keeping the error, until the next save
+        self.make_due()
+        self.assertEqual(index_jobs.process(), 0)
+        job.refresh_from_db()
+        self.assertIsNotNone(job.failed_at)
+        self.assertIn("Invalid input", job.last_error)
+        self.make_due()
+        calls = create.call_count
+        self.assertEqual(index_jobs.process(), 0)
+        self.assertEqual(create.call_count, calls)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            poison.name = "Fixed"
+            poison.save()
+        self.make_due()
+        self.assertEqual(index_jobs.process(), 1)
+        self.assertFalse(IndexJob.objects.exists())
+
+    @mock.patch("api.documents.extract_pdf_text", return_value="Latest resume text")
+    @mock.patch("api.clients.get_openai_client")
+    def test_resume_sync_drops_older_resumes_with_one_delete(self, mock_openai, mock_extract):
+        mock_openai.return_value.embeddings.create.side_effect = lambda input, model: mock.Mock(data=[mock.Mock(embedding=[1.0, 0.0]) for _ in input])
+        get_collection().upsert(
+            ids=["resume-old-1#chunk-0", "resume-old-2#chunk-0", "project-1#chunk-0"],
+            embeddings=[[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]],
+            documents=["Old resume", "Older resume", "Project"],
+            metadatas=[
+                {"type": "resume", "id": "old-1", "parent_id": "resume-old-1"},
+                {"type": "resume", "id": "old-2", "parent_id": "resume-old-2"},
+                {"type": "project", "id": "1", "parent_id": "project-1"},
+            ],
+        )
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with self.settings(MEDIA_ROOT=media_root), self.captureOnCommitCallbacks(execute=True):
+            resume = Resume.objects.create(title="CV", pdf_file=SimpleUploadedFile("cv.pdf", b"%PDF-1.4"))
+        self.assertEqual(IndexJob.objects.count(), 1)
+
+        self.make_due()
+        with self.settings(MEDIA_ROOT=media_root), mock.patch("api.index_jobs.delete_nodes_of_type", wraps=delete_nodes_of_type) as mock_delete:
+            self.assertEqual(index_jobs.process(), 1)
+        mock_delete.assert_called_once_with("resume", exclude_id=str(resume.pk))
+        self.assertEqual({parent for parent in indexed_parents() if parent.startswith("resume-")}, {f"resume-{resume.pk}"})
+        self.assertIn("project-1", indexed_parents())
+
+        # A newer resume without text is not indexed, and does not drop the indexed one
+        mock_extract.return_value = ""
+        with self.settings(MEDIA_ROOT=media_root), self.captureOnCommitCallbacks(execute=True):
+            Resume.objects.create(title="Empty CV", pdf_file=SimpleUploadedFile("empty.pdf", b"%PDF-1.4"))
+        self.make_due()
+        with self.settings(MEDIA_ROOT=media_root), mock.patch("api.index_jobs.delete_nodes_of_type") as mock_delete:
+            self.assertEqual(index_jobs.process(), 1)
+        mock_delete.assert_not_called()
+        self.assertIn(f"resume-{resume.pk}", indexed_parents())
+
+    def test_saves_of_non_indexed_fields_are_not_queued(self):
+        for order in range(3):
+            Achievement.objects.create(title=f"Award {order}", description="Won it", date="2024-01-01", display_order=order)
+        IndexJob.objects.all().delete()
+        semantic_cache.store([1.0, 0.0], "Several.", 100)
+
+        # A reorder (e.g. from the admin) touches neither the index nor cached answers
+        with self.captureOnCommitCallbacks(execute=True):
+            for achievement in Achievement.objects.all():
+                achievement.display_order += 10
+                achievement.save()
+            Achievement.objects.first().save(update_fields=["display_order"])
+        self.assertFalse(IndexJob.objects.exists())
+        self.assertIsNotNone(semantic_cache.lookup([1.0, 0.0]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            achievement = Achievement.objects.first()
+            achievement.title = "Renamed Award"
+            achievement.save()
+        self.assertEqual(list(IndexJob.objects.values_list("doc_id", flat=True)), [f"achievement-{achievement.pk}"])
+        self.assertIsNone(semantic_cache.lookup([1.0, 0.0]))
+
+
+class ONNXEmbeddingProviderTests(TestCase):
+    def test_embed_mean_pools_normalizes_and_batches(self):
+        provider = ONNXEmbeddingProvider("/models/test-model", batch_size=2)
+        tokenizer = mock.Mock()
+        tokenizer.encode_batch.side_effect = lambda texts: [
+            mock.Mock(ids=[101, 7, 102], attention_mask=[1, 1, 0 if text == "short" else 1]) for text in texts
+        ]
+        session = mock.Mock()
+        session.get_inputs.return_value = [mock.Mock(), mock.Mock()]
+        session.get_inputs.return_value[0].name, session.get_inputs.return_value[1].name = "input_ids", "attention_mask"
+        # Token embeddings of shape (batch, tokens, 2); the third token is padding for "short"
+        session.run.side_effect = lambda outputs, feed: [np.tile([[[3.0, 0.0], [3.0, 0.0], [0.0, 4.0]]], (len(feed["input_ids"]), 1, 1))]
+        provider._session, provider._tokenizer = session, tokenizer
+
+        vectors = provider.embed(["short", "long", "long"])
+
+        self.assertEqual(provider.name, "onnx:test-model")
+        self.assertEqual(session.run.call_count, 2)
+        np.testing.assert_allclose(vectors[0], [1.0, 0.0], atol=1e-6)
+        np.testing.assert_allclose(vectors[1], [0.832050, 0.554700], atol=1e-6)
+
+
+class LocalVectorStoreTests(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path, ignore_errors=True)
+        self.collection = LocalCollection(self.path)
+        self.collection.upsert(
+            ids=["project_1", "project_2", "resume_1"],
+            embeddings=[[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]],
+            documents=["Project one", "Project two", "Resume"],
+            metadatas=[{"type": "project", "id": 1}, {"type": "project", "id": 2}, {"type": "resume", "id": 1}],
+        )
+
+    def test_query_returns_nearest_documents(self):
+        results = self.collection.query(query_embeddings=[[0.9, 0.1]], n_results=2)
+        self.assertEqual(results["ids"], [["project_1", "resume_1"]])
+        self.assertAlmostEqual(results["distances"][0][0], 0.02, places=5)
+
+        results = self.collection.query(query_embeddings=[[0.9, 0.1]], n_results=5, where={"type": "project"})
+        self.assertEqual(results["ids"], [["project_1", "project_2"]])
+
+    def test_other_handles_see_writes(self):
+        reader = LocalCollection(self.path)
+        self.assertEqual(reader.count(), 3)
+
+        self.collection.upsert(ids=["project_2"], embeddings=[[0.9, 0.1]], documents=["Project two, edited"], metadatas=[{"type": "project", "id": 2}])
+        self.collection.delete(where={"$and": [{"type": "resume"}, {"id": {"$ne": 2}}]})
+
+        self.assertEqual(reader.count(), 2)
+        self.assertEqual(reader.get(ids=["project_2"])["documents"], ["Project two, edited"])
+
+    def test_readers_in_other_processes_survive_concurrent_writes(self):
+        def write(path, rounds):
+            collection = LocalCollection(path)
+            for i in range(rounds):
+                collection.upsert(ids=[f"extra_{i % 5}"], embeddings=[[float(i), 1.0]], documents=[f"Extra {i}"])
+
+        writer = multiprocessing.get_context("fork").Process(target=write, args=(self.path, 300))
+        writer.start()
+        self.addCleanup(writer.join)
+        reader = LocalCollection(self.path)
+        while writer.is_alive():
+            reader._stamp = None  # Reload on every query, like a reader in another process racing each write
+            self.assertEqual(len(reader.query(query_embeddings=[[1.0, 0.0]], n_results=3)["ids"][0]), 3)
+        writer.join()
+        self.assertEqual(writer.exitcode, 0)
+        self.assertEqual(reader.count(), 8)
+        self.assertEqual(len(list(Path(self.path).glob("vectors-*.f32"))), 2)
+
+    def test_reader_of_a_replaced_sidecar_retries_with_the_new_one(self):
+        reader = LocalCollection(self.path)
+        stale = (Path(self.path) / "index.json").read_text()
+        self.collection.upsert(ids=["project_3"], embeddings=[[0.5, 0.5]])
+        self.collection.upsert(ids=["project_4"], embeddings=[[0.4, 0.6]])
+
+        read_text = Path.read_text
+        reads = iter([stale])
+        with mock.patch.object(Path, "read_text", autospec=True, side_effect=lambda path: next(reads, None) or read_text(path)):
+            self.assertEqual(reader.count(), 5)
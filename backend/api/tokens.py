@@ -0,0 +1,41 @@
+# backend/api/tokens.py
+
+import functools
+import logging
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+# Rough average used when an encoding cannot be loaded (tiktoken downloads its BPE files on first use)
+APPROX_CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model):
+    """Returns the tiktoken encoding for a model, or ``None`` if it cannot be loaded."""
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding for {model}, estimating token counts instead: {e}")
+        return None
+
+
+def count_tokens(text, model):
+    """Counts the tokens of ``text`` for the given model."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return -(-len(text) // APPROX_CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text, max_tokens, model):
+    """Truncates ``text`` to at most ``max_tokens`` tokens for the given model."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return text[: max_tokens * APPROX_CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
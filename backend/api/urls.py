@@ -7,6 +7,7 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     AchievementViewSet,
     CertificationViewSet,
+    ChatbotMetricsView,
     ChatbotView,
     ContactMessageViewSet,
     ExperiencePhotoViewSet,
@@ -32,4 +33,5 @@ urlpatterns = [
     path("v1/", include(router.urls)),
     path("v1/visitor-count/", VisitorCountView.as_view(), name="visitor-count"),
     path("v1/chatbot/", ChatbotView.as_view(), name="chatbot"),
+    path("v1/chatbot/metrics/", ChatbotMetricsView.as_view(), name="chatbot-metrics"),
 ]
@@ -1,30 +1,222 @@
 # backend/api/utils.py
 
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
 import pypdf
-from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+
+def _extract_pages(data, start, stop):
+    """Extracts the text of pages ``start`` to ``stop`` (exclusive) of a PDF, with the seconds each page took."""
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    pages = []
+    for page in reader.pages[start:stop]:
+        started = time.perf_counter()
+        pages.append((page.extract_text() or "", time.perf_counter() - started))
+    return pages
+
+
+def _read_cached_text(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        # Pruning drops the least recently used texts first
+        os.utime(path)
+        return text
+    except FileNotFoundError:
+        return None
+
+
+def _write_cached_text(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
 
 
-def extract_pdf_text(pdf_path):
-    """Extracts text from a PDF file at the given path."""
+def _prune_cache(cache_dir, max_bytes):
+    """Deletes the least recently used texts of ``cache_dir`` until it holds at most ``max_bytes``."""
+    entries = []
+    for entry in os.scandir(cache_dir):
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:  # Pruned by another process meanwhile
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def extract_pdf_text(pdf_path, cache_dir=None, workers=1, parallel_min_pages=20, cache_max_bytes=None):
+    """
+    Extracts text from a PDF file at the given path.
+
+    With ``cache_dir``, the text is cached there under the SHA-256 of the file
+    content, so an unchanged PDF is parsed only once whatever its path; the
+    least recently used texts are dropped beyond ``cache_max_bytes``. PDFs of
+    at least ``parallel_min_pages`` pages are split into page ranges parsed by
+    ``workers`` processes.
+    """
     try:
-        reader = pypdf.PdfReader(pdf_path)
-        return "\n".join(page.extract_text() for page in reader.pages if page.extract_text())
+        with open(pdf_path, "rb") as f:
+            data = f.read()
+        cache_path = os.path.join(cache_dir, f"{hashlib.sha256(data).hexdigest()}.txt") if cache_dir else None
+        if cache_path:
+            text = _read_cached_text(cache_path)
+            if text is not None:
+                logger.debug(f"Using cached text of {pdf_path}")
+                return text
+
+        started = time.perf_counter()
+        page_count = len(pypdf.PdfReader(io.BytesIO(data)).pages)
+        if workers > 1 and page_count >= parallel_min_pages:
+            # Spawned, not forked: callers may hold open connections and run threads
+            step = -(-page_count // workers)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = [pool.submit(_extract_pages, data, start, start + step) for start in range(0, page_count, step)]
+                pages = [page for future in futures for page in future.result()]
+        else:
+            pages = _extract_pages(data, 0, page_count)
+
+        for number, (_, seconds) in enumerate(pages, start=1):
+            logger.debug(f"Extracted page {number}/{page_count} of {pdf_path} in {seconds * 1000:.1f} ms")
+        logger.info(f"Extracted {page_count} pages of {pdf_path} in {time.perf_counter() - started:.2f}s")
+
+        text = "\n".join(page_text for page_text, _ in pages if page_text)
+        if cache_path:
+            _write_cached_text(cache_path, text)
+            if cache_max_bytes:
+                _prune_cache(cache_dir, cache_max_bytes)
+        return text
     except Exception as e:
         print(f"Error reading PDF {pdf_path}: {e}")
         return ""
 
 
+class _TextExtractor(HTMLParser):
+    """
+    Collects the text of an HTML document, skipping the content of script and style elements.
+
+    Like BeautifulSoup, a whitespace-only text node between two tags becomes a
+    single newline (if it contains one) or space, except inside pre and textarea.
+    """
+
+    SKIPPED_TAGS = {"script", "style"}
+    PRESERVED_TAGS = {"pre", "textarea"}
+    WHITESPACE = " \n\t\x0c\r"
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.pending = []
+        self.skipped_depth = 0
+        self.preserved_depth = 0
+
+    def flush(self):
+        """Ends the current text node."""
+        if self.pending:
+            data = "".join(self.pending)
+            self.pending = []
+            if not self.preserved_depth and not data.strip(self.WHITESPACE):
+                data = "\n" if "\n" in data else " "
+            self.parts.append(data)
+
+    def handle_starttag(self, tag, attrs):
+        self.flush()
+        if tag in self.SKIPPED_TAGS:
+            self.skipped_depth += 1
+        elif tag in self.PRESERVED_TAGS:
+            self.preserved_depth += 1
+
+    def handle_endtag(self, tag):
+        self.flush()
+        if tag in self.SKIPPED_TAGS and self.skipped_depth:
+            self.skipped_depth -= 1
+        elif tag in self.PRESERVED_TAGS and self.preserved_depth:
+            self.preserved_depth -= 1
+
+    def handle_data(self, data):
+        if not self.skipped_depth:
+            self.pending.append(data)
+
+    def handle_comment(self, data):
+        self.flush()
+
+    def handle_decl(self, decl):
+        self.flush()
+
+    def handle_pi(self, data):
+        self.flush()
+
+    def unknown_decl(self, data):
+        self.flush()
+        # <![CDATA[...]]> sections are text nodes, as in BeautifulSoup's get_text()
+        if data.startswith("CDATA["):
+            self.handle_data(data[6:])
+            self.flush()
+
+    def close(self):
+        super().close()
+        self.flush()
+
+
+def _html_to_text(html_content):
+    extractor = _TextExtractor()
+    extractor.feed(html_content)
+    extractor.close()
+    lines = []
+    # Strip every line, break multi-headlines (double spaces) into a line each, drop blank lines
+    for line in "".join(extractor.parts).splitlines():
+        for phrase in line.strip().split("  "):
+            phrase = phrase.strip()
+            if phrase:
+                lines.append(phrase)
+    return "\n".join(lines)
+
+
+CLEAN_HTML_CACHE_SIZE = 512
+_clean_html_cache = OrderedDict()
+_clean_html_lock = threading.Lock()
+
+
 def clean_html(html_content):
-    """Strips HTML tags and returns clean text."""
-    soup = BeautifulSoup(html_content, "html.parser")
-    # Remove script and style elements
-    for script_or_style in soup(["script", "style"]):
-        script_or_style.decompose()
-    # Get text
-    text = soup.get_text()
-    # Break into lines and remove leading/trailing space on each
-    lines = (line.strip() for line in text.splitlines())
-    # Break multi-headlines into a line each
-    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-    # Drop blank lines
-    return "\n".join(chunk for chunk in chunks if chunk)
+    """
+    Strips HTML tags and returns clean text.
+
+    Results are memoized (least recently used first out) by a hash of the
+    HTML, so unchanged rich-text bodies are parsed once per process.
+    """
+    if not html_content:
+        return ""
+    key = hashlib.blake2b(html_content.encode("utf-8"), digest_size=16).digest()
+    with _clean_html_lock:
+        text = _clean_html_cache.get(key)
+        if text is not None:
+            _clean_html_cache.move_to_end(key)
+            return text
+
+    text = _html_to_text(html_content)
+    with _clean_html_lock:
+        _clean_html_cache[key] = text
+        if len(_clean_html_cache) > CLEAN_HTML_CACHE_SIZE:
+            _clean_html_cache.popitem(last=False)
+    return text
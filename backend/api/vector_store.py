@@ -0,0 +1,239 @@
+# backend/api/vector_store.py
+
+import fcntl
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+SIDECAR_NAME = "index.json"
+LOCK_NAME = ".lock"
+
+
+def _matches(metadata, where):
+    """Evaluates a Chroma-style ``where`` filter ($eq, $ne, $gt, $gte, $lt, $lte, $in, $nin, $and, $or) against one metadata dict."""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+        else:
+            value = metadata.get(key)
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for operator, operand in condition.items():
+                if operator == "$eq" and value != operand:
+                    return False
+                if operator == "$ne" and value == operand:
+                    return False
+                if operator in ("$gt", "$gte", "$lt", "$lte") and (value is None or not _compare(operator, value, operand)):
+                    return False
+                if operator == "$in" and value not in operand:
+                    return False
+                if operator == "$nin" and value in operand:
+                    return False
+    return True
+
+
+def _compare(operator, value, operand):
+    if operator == "$gt":
+        return value > operand
+    if operator == "$gte":
+        return value >= operand
+    if operator == "$lt":
+        return value < operand
+    return value <= operand
+
+
+class LocalCollection:
+    """
+    An in-process vector index with the subset of the Chroma collection API used by the app.
+
+    Vectors live in a float32 matrix file that readers memory-map read-only, so
+    every gunicorn worker shares the same pages; ids, documents and metadata
+    live in a JSON sidecar. Writers take a file lock, write a new matrix file
+    and atomically swap the sidecar, so readers always see a complete index
+    and pick up changes on their next query. Search is an exact, vectorized
+    NumPy scan, which is faster than an ANN index at portfolio scale.
+    Distances are squared L2, the Chroma default.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stamp = None
+        empty = {"version": 0, "dim": 0, "vectors": None, "ids": [], "documents": [], "metadatas": []}
+        self._state = (empty, np.zeros((0, 0), dtype=np.float32))
+
+    # --- Storage ---
+
+    def _load(self):
+        """Returns ``(index, vectors)``, re-reading the sidecar and re-mapping the matrix if they changed."""
+        sidecar = self.path / SIDECAR_NAME
+        for attempt in range(2):
+            try:
+                stat = sidecar.stat()
+            except FileNotFoundError:
+                return self._state
+            stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            if stamp == self._stamp:
+                return self._state
+            with self._lock:
+                if stamp == self._stamp:
+                    return self._state
+                index = json.loads(sidecar.read_text())
+                try:
+                    if index["ids"]:
+                        vectors = np.memmap(self.path / index["vectors"], dtype=np.float32, mode="r", shape=(len(index["ids"]), index["dim"]))
+                    else:
+                        vectors = np.zeros((0, index["dim"]), dtype=np.float32)
+                except FileNotFoundError:
+                    # Writers swapped the index twice since its sidecar was read: read the new one
+                    if attempt:
+                        raise
+                    continue
+                self._state, self._stamp = (index, vectors), stamp
+                return self._state
+
+    @contextmanager
+    def _write(self):
+        """Yields a mutable copy of the index under an exclusive lock, then persists it atomically."""
+        with open(self.path / LOCK_NAME, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            index, vectors = self._load()
+            data = {
+                "ids": list(index["ids"]),
+                "documents": list(index["documents"]),
+                "metadatas": list(index["metadatas"]),
+                "vectors": list(np.array(vectors)),
+            }
+            yield data
+
+            version = index["version"] + 1
+            vectors_name = f"vectors-{version}.f32"
+            matrix = np.asarray(data["vectors"], dtype=np.float32)
+            dim = matrix.shape[1] if matrix.size else index["dim"]
+            matrix.tofile(self.path / vectors_name)
+            new_index = {
+                "version": version,
+                "dim": dim,
+                "vectors": vectors_name,
+                "ids": data["ids"],
+                "documents": data["documents"],
+                "metadatas": data["metadatas"],
+            }
+            tmp = self.path / f"{SIDECAR_NAME}.tmp"
+            tmp.write_text(json.dumps(new_index))
+            os.replace(tmp, self.path / SIDECAR_NAME)
+
+            # The previous matrix is kept for readers in other processes that read the old
+            # sidecar but have not mapped its matrix yet; older ones stay alive for readers
+            # that already mapped them (unlinked files remain readable) until they reload
+            for old in self.path.glob("vectors-*.f32"):
+                if int(old.stem.split("-")[1]) < version - 1:
+                    old.unlink(missing_ok=True)
+
+    # --- Chroma collection API ---
+
+    def count(self):
+        index, _ = self._load()
+        return len(index["ids"])
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [{}] * len(ids)
+        with self._write() as data:
+            positions = {doc_id: i for i, doc_id in enumerate(data["ids"])}
+            for doc_id, embedding, document, metadata in zip(ids, embeddings, documents, metadatas):
+                vector = np.asarray(embedding, dtype=np.float32)
+                if doc_id in positions:
+                    i = positions[doc_id]
+                    data["vectors"][i], data["documents"][i], data["metadatas"][i] = vector, document, metadata
+                else:
+                    positions[doc_id] = len(data["ids"])
+                    data["ids"].append(doc_id)
+                    data["vectors"].append(vector)
+                    data["documents"].append(document)
+                    data["metadatas"].append(metadata)
+
+    def delete(self, ids=None, where=None):
+        """Deletes the entries matching both ``ids`` and ``where`` (whichever are given), like Chroma."""
+        if ids is None and not where:
+            return
+        wanted = set(ids) if ids is not None else None
+        with self._write() as data:
+            keep = [
+                i
+                for i, (doc_id, metadata) in enumerate(zip(data["ids"], data["metadatas"]))
+                if not ((wanted is None or doc_id in wanted) and (not where or _matches(metadata, where)))
+            ]
+            for field in ("ids", "documents", "metadatas", "vectors"):
+                data[field] = [data[field][i] for i in keep]
+
+    def get(self, ids=None, where=None, include=None):
+        index, _ = self._load()
+        wanted = set(ids) if ids is not None else None
+        rows = [
+            i
+            for i, (doc_id, metadata) in enumerate(zip(index["ids"], index["metadatas"]))
+            if (wanted is None or doc_id in wanted) and (not where or _matches(metadata, where))
+        ]
+        return {
+            "ids": [index["ids"][i] for i in rows],
+            "documents": [index["documents"][i] for i in rows],
+            "metadatas": [index["metadatas"][i] for i in rows],
+        }
+
+    def query(self, query_embeddings, n_results=10, where=None):
+        index, vectors = self._load()
+        rows = np.arange(len(index["ids"]))
+        if where:
+            rows = np.array([i for i in rows if _matches(index["metadatas"][i], where)], dtype=int)
+
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for embedding in query_embeddings:
+            if not len(rows):
+                for field in results:
+                    results[field].append([])
+                continue
+            query = np.asarray(embedding, dtype=np.float32)
+            candidates = vectors[rows]
+            distances = np.einsum("ij,ij->i", candidates, candidates) - 2 * (candidates @ query) + query @ query
+            k = min(n_results, len(rows))
+            nearest = np.argpartition(distances, k - 1)[:k]
+            nearest = nearest[np.argsort(distances[nearest])]
+            results["ids"].append([index["ids"][rows[i]] for i in nearest])
+            results["documents"].append([index["documents"][rows[i]] for i in nearest])
+            results["metadatas"].append([index["metadatas"][rows[i]] for i in nearest])
+            results["distances"].append([float(distances[i]) for i in nearest])
+        return results
+
+
+_collections = {}
+_collections_lock = threading.Lock()
+
+
+def get_local_collection(name):
+    """Returns the process-wide handle of a local collection stored under ``VECTOR_STORE_PATH``."""
+    collection = _collections.get(name)
+    if collection is None:
+        with _collections_lock:
+            collection = _collections.get(name)
+            if collection is None:
+                collection = _collections[name] = LocalCollection(Path(settings.VECTOR_STORE_PATH) / name)
+    return collection
+
+
+def drop_local_collection(name):
+    """Deletes a local collection from disk and forgets its handle."""
+    with _collections_lock:
+        _collections.pop(name, None)
+    shutil.rmtree(Path(settings.VECTOR_STORE_PATH) / name, ignore_errors=True)
@@ -1,32 +1,35 @@
 import logging
 
+from asgiref.sync import async_to_sync
 from django.conf import settings
 from django.core.mail import send_mail
-from django.db.models import F
+from django.db.models import F, Prefetch
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema
-from openai import OpenAI
 from rest_framework import status, viewsets
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .chromadb_utils import query_nodes
+from . import embedding_cache, index_telemetry, semantic_cache
+from .chatbot import answer_query, astream_chat_events, get_prompt_stats
 from .models import (
     Achievement,
     Certification,
-    ChatMessage,
-    ChatSession,
     ContactMessage,
     DailyVisitorCount,
     Experience,
     ExperiencePhoto,
     Project,
+    ProjectImage,
     Publication,
     Resume,
     Tag,
     TotalVisitorCount,
 )
+from .response_cache import CachedResponseMixin
 from .serializers import (
     AchievementSerializer,
     CertificationSerializer,
@@ -59,17 +62,20 @@ class ExperienceResultsPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     schema_tags = ["Portfolio Management - Tags"]
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
-    queryset = Project.objects.all()
+class ProjectViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    # Tags and gallery images of a whole page are loaded with one query each
+    queryset = Project.objects.prefetch_related("tags", Prefetch("gallery_images", queryset=ProjectImage.objects.order_by("display_order", "id")))
     serializer_class = ProjectSerializer
     pagination_class = StandardResultsPagination
     schema_tags = ["Portfolio Management - Projects"]
+    cache_models = (Project, Tag, ProjectImage)
+    cache_query_params = ("page", "page_size", "tag", "is_featured")
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -87,21 +93,21 @@ class ProjectViewSet(viewsets.ModelViewSet):
         return queryset.order_by("display_order", "-created_at")
 
 
-class PublicationViewSet(viewsets.ReadOnlyModelViewSet):
+class PublicationViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Publication.objects.all()
     serializer_class = PublicationSerializer
     pagination_class = StandardResultsPagination
     schema_tags = ["Portfolio Management - Publications"]
 
 
-class CertificationViewSet(viewsets.ReadOnlyModelViewSet):
+class CertificationViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Certification.objects.all()
     serializer_class = CertificationSerializer
     pagination_class = StandardResultsPagination
     schema_tags = ["Portfolio Management - Certifications"]
 
 
-class AchievementViewSet(viewsets.ReadOnlyModelViewSet):
+class AchievementViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Achievement.objects.all()
     serializer_class = AchievementSerializer
     pagination_class = StandardResultsPagination
@@ -148,22 +154,24 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
 
-class ResumeViewSet(viewsets.ModelViewSet):
+class ResumeViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Resume.objects.all()
     serializer_class = ResumeSerializer
     http_method_names = ["get", "post", "head", "options", "delete"]
     schema_tags = ["Contact & Admin"]
 
 
-class ExperienceViewSet(viewsets.ModelViewSet):
-    queryset = Experience.objects.all()
+class ExperienceViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    # Photos of a whole page are loaded with one query
+    queryset = Experience.objects.prefetch_related(Prefetch("photos", queryset=ExperiencePhoto.objects.order_by("display_order", "id")))
     serializer_class = ExperienceSerializer
     pagination_class = ExperienceResultsPagination
+    cache_models = (Experience, ExperiencePhoto)
     http_method_names = ["get", "post", "head", "options"]
     schema_tags = ["Portfolio Management - Experiences"]
 
 
-class ExperiencePhotoViewSet(viewsets.ModelViewSet):
+class ExperiencePhotoViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = ExperiencePhoto.objects.all()
     serializer_class = ExperiencePhotoSerializer
     http_method_names = ["get", "post", "head", "options", "delete"]
@@ -210,6 +218,9 @@ class ChatbotView(APIView):
     """
     Handles chatbot queries by retrieving context from ChromaDB
     and generating a response using OpenAI's GPT model.
+
+    Send ``"stream": true`` in the request body to receive the answer as
+    Server-Sent Events instead of a single JSON response.
     """
 
     authentication_classes = []
@@ -220,85 +231,44 @@ class ChatbotView(APIView):
     def post(self, request, *args, **kwargs):
         query = request.data.get("query")
         session_id = request.data.get("session_id")
+        stream = str(request.data.get("stream", "")).lower() in ("true", "1")
 
         if not query:
             return Response({"error": "Query parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            # --- Session Handling ---
-            if session_id:
-                try:
-                    session = ChatSession.objects.get(id=session_id)
-                except ChatSession.DoesNotExist:
-                    # If frontend provides an invalid/old session ID, create a new one
-                    session = ChatSession.objects.create()
-            else:
-                session = ChatSession.objects.create()
-
-            # Save the user's message
-            ChatMessage.objects.create(session=session, sender="user", message=query)
-
-            # --- Smart Context Injection ---
-            special_context = []
-
-            # 1. Handle "Latest Experience"
-            latest_experience = Experience.objects.order_by("-is_current", "-start_date").first()
-            if latest_experience:
-                special_context.append(
-                    f"Md Mushfiqur Rahman's most recent professional experience is as a "
-                    f"{latest_experience.job_title} at {latest_experience.company_name}."
-                )
-
-            # 2. Handle "Publications" list
-            publications = Publication.objects.all()
-            if publications.exists():
-                pub_titles = ", ".join([f'"{p.title}"' for p in publications])
-                special_context.append(f"He has the following publications: {pub_titles}.")
-
-            # 3. Retrieve general context from ChromaDB
-            results = query_nodes(query, n_results=4)
-            retrieved_context = "\n\n".join(results["documents"][0]) if results.get("documents") and results["documents"][0] else ""
-
-            # Combine all context
-            final_context = "\n\n".join(special_context) + "\n\n" + retrieved_context
-            final_context = final_context.strip()
-
-            if not final_context:
-                final_context = "No relevant information found in the knowledge base."
-
-            # --- Updated Prompt with Privacy Guardrails ---
-            prompt = (
-                f"You are a helpful AI assistant for Md Mushfiqur Rahman's personal portfolio website. "
-                f"Your tone should be professional, friendly, and concise. "
-                f"Answer the user's question based ONLY on the following context. "
-                f"If you are asked for a personal phone number, physical address, \
-                or any other private contact detail not explicitly listed in the context, \
-                you MUST politely refuse and state that the best way to connect is via the professional links like email or LinkedIn."
-                f"If the context doesn't contain the answer to a general question, \
-                state that you don't have that specific information and suggest they ask about his skills, projects, or experience.\n\n"
-                f"Do NOT answer anything that is not related to Md Mushfiqur Rahman's personal portfolio website and personal information.\n\n"
-                f"Use bullet points to answer the question when possible.\n\n"
-                f"---CONTEXT---\n{final_context}\n\n"
-                f"---QUESTION---\n{query}\n\n"
-                f"---ANSWER---\n"
-            )
-
-            # 4. Call OpenAI API
-            client = OpenAI(api_key=settings.OPENAI_API_KEY)
-            completion = client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=512,
-                temperature=0.2,
-            )
-            answer = completion.choices[0].message.content
+        if stream:
+            # Served natively by the ASGI handler as an async iterator
+            response = StreamingHttpResponse(astream_chat_events(query, session_id), content_type="text/event-stream")
+            response["Cache-Control"] = "no-cache"
+            response["X-Accel-Buffering"] = "no"  # Disable proxy buffering so tokens are flushed immediately
+            return response
 
-            # Save the bot's response
-            ChatMessage.objects.create(session=session, sender="bot", message=answer)
+        try:
+            # Session handling, context injection, the LLM call and message persistence
+            # run as one async pipeline with the independent steps overlapped.
+            answer, session_id = async_to_sync(answer_query)(query, session_id)
 
             # --- Return the answer AND the session_id ---
-            return Response({"answer": answer, "session_id": str(session.id)}, status=status.HTTP_200_OK)
+            return Response({"answer": answer, "session_id": str(session_id)}, status=status.HTTP_200_OK)
 
         except Exception as e:
             print(f"Chatbot error: {e}")
             return Response({"error": "An internal error occurred while processing your request."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ChatbotMetricsView(APIView):
+    """Exposes the chatbot and knowledge-base indexing performance counters to admin users."""
+
+    permission_classes = [IsAdminUser]
+    schema_tags = ["Chatbot"]
+
+    def get(self, request, *args, **kwargs):
+        return Response(
+            {
+                "semantic_cache": semantic_cache.get_stats(),
+                "embedding_cache": embedding_cache.get_stats(),
+                "prompt": get_prompt_stats(),
+                "indexing": index_telemetry.get_stats(),
+            },
+            status=status.HTTP_200_OK,
+        )
@@ -12,6 +12,20 @@ DEBUG = config("DEBUG", default=False, cast=bool)
 # Load the OpenAI API Key from the .env file
 OPENAI_API_KEY = config("OPENAI_API_KEY", default="")
 
+# Pooled OpenAI/ChromaDB clients (built once per worker process, see api/clients.py)
+OPENAI_TIMEOUT = config("OPENAI_TIMEOUT", default=30.0, cast=float)
+OPENAI_CONNECT_TIMEOUT = config("OPENAI_CONNECT_TIMEOUT", default=5.0, cast=float)
+OPENAI_MAX_RETRIES = config("OPENAI_MAX_RETRIES", default=2, cast=int)
+OPENAI_MAX_CONNECTIONS = config("OPENAI_MAX_CONNECTIONS", default=20, cast=int)
+CHROMA_TIMEOUT = config("CHROMA_TIMEOUT", default=10.0, cast=float)
+CHROMA_CONNECT_TIMEOUT = config("CHROMA_CONNECT_TIMEOUT", default=3.0, cast=float)
+CHROMA_POOL_SIZE = config("CHROMA_POOL_SIZE", default=10, cast=int)
+
+# Vector store backend: "chroma" (the HTTP server) or "local" (an in-process,
+# memory-mapped index under VECTOR_STORE_PATH, see api/vector_store.py)
+VECTOR_STORE_BACKEND = config("VECTOR_STORE_BACKEND", default="chroma")
+VECTOR_STORE_PATH = config("VECTOR_STORE_PATH", default=str(BASE_DIR / "vector_store"))
+
 ALLOWED_HOSTS = config(
     "ALLOWED_HOSTS",
     default="127.0.0.1,localhost,0.0.0.0",
@@ -62,9 +76,8 @@ INSTALLED_APPS = [
     "ckeditor_uploader",
 ]
 
-# CORRECT MIDDLEWARE ORDER FOR SITE-WIDE CACHING
+# API responses are cached per viewset (see api/response_cache.py), not site-wide
 MIDDLEWARE = [
-    "django.middleware.cache.UpdateCacheMiddleware",  # MUST BE FIRST
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -73,7 +86,6 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "django.middleware.cache.FetchFromCacheMiddleware",  # MUST BE LAST
 ]
 
 TEMPLATES = [
@@ -162,8 +174,84 @@ CACHES = {
     }
 }
 
-# This setting is required for the caching middleware to work
-CACHE_MIDDLEWARE_SECONDS = 60 * 5  # Cache for 5 minutes (300 seconds)
+# Cached list/detail responses of the read API. Entries are invalidated as soon as a model
+# they were built from is saved or deleted, so they can be kept for hours.
+API_CACHE_ENABLED = config("API_CACHE_ENABLED", default=True, cast=bool)
+API_CACHE_TTL = config("API_CACHE_TTL", default=60 * 60 * 6, cast=int)  # 6 hours
+
+# Semantic answer cache for the chatbot: a question within this cosine distance of
+# a previously answered one is served from the cache. Cleared whenever content changes.
+SEMANTIC_CACHE_ENABLED = config("SEMANTIC_CACHE_ENABLED", default=True, cast=bool)
+SEMANTIC_CACHE_MAX_DISTANCE = config("SEMANTIC_CACHE_MAX_DISTANCE", default=0.08, cast=float)
+SEMANTIC_CACHE_MAX_ENTRIES = config("SEMANTIC_CACHE_MAX_ENTRIES", default=256, cast=int)
+SEMANTIC_CACHE_TTL = config("SEMANTIC_CACHE_TTL", default=60 * 60 * 24, cast=int)  # 1 day
+
+# Token budget for the context (special context + retrieved documents) in chatbot prompts.
+# Documents that do not fit are truncated, or dropped if fewer tokens than the minimum remain.
+CHATBOT_CONTEXT_TOKEN_BUDGET = config("CHATBOT_CONTEXT_TOKEN_BUDGET", default=1500, cast=int)
+CHATBOT_MIN_DOCUMENT_TOKENS = config("CHATBOT_MIN_DOCUMENT_TOKENS", default=64, cast=int)
+
+# Write-behind persistence of chatbot messages (see api/chat_store.py): messages are
+# buffered in Redis and bulk-inserted by `manage.py flush_chat_messages --loop`.
+CHAT_FLUSH_BATCH_SIZE = config("CHAT_FLUSH_BATCH_SIZE", default=500, cast=int)
+CHAT_FLUSH_INTERVAL = config("CHAT_FLUSH_INTERVAL", default=2.0, cast=float)  # seconds
+
+# Embedding backend: "openai" (text-embedding-3-small over the API) or "onnx" (a local
+# sentence-embedding model run on CPU; EMBEDDING_ONNX_MODEL_PATH holds model.onnx and tokenizer.json)
+EMBEDDING_BACKEND = config("EMBEDDING_BACKEND", default="openai")
+EMBEDDING_ONNX_MODEL_PATH = config("EMBEDDING_ONNX_MODEL_PATH", default=str(BASE_DIR / "models" / "all-MiniLM-L6-v2"))
+EMBEDDING_ONNX_THREADS = config("EMBEDDING_ONNX_THREADS", default=1, cast=int)  # per worker process
+EMBEDDING_ONNX_BATCH_SIZE = config("EMBEDDING_ONNX_BATCH_SIZE", default=32, cast=int)
+EMBEDDING_ONNX_MAX_LENGTH = config("EMBEDDING_ONNX_MAX_LENGTH", default=256, cast=int)
+
+# Batches used when indexing many documents at once (one embeddings request and one
+# upsert per batch); the token limit keeps requests under the OpenAI per-request cap
+EMBEDDING_BATCH_SIZE = config("EMBEDDING_BATCH_SIZE", default=100, cast=int)
+EMBEDDING_BATCH_MAX_TOKENS = config("EMBEDDING_BATCH_MAX_TOKENS", default=100_000, cast=int)
+
+# Documents are indexed as chunks of at most INDEX_CHUNK_SIZE tokens, overlapping by
+# INDEX_CHUNK_OVERLAP tokens (changing either re-embeds everything on the next incremental run)
+INDEX_CHUNK_SIZE = config("INDEX_CHUNK_SIZE", default=400, cast=int)
+INDEX_CHUNK_OVERLAP = config("INDEX_CHUNK_OVERLAP", default=60, cast=int)
+
+# Content saves queue an index job that `manage.py process_index_jobs --loop` runs once the
+# object has not been saved again for INDEX_JOB_DEBOUNCE seconds (see api/index_jobs.py)
+INDEX_JOB_DEBOUNCE = config("INDEX_JOB_DEBOUNCE", default=5.0, cast=float)
+INDEX_JOB_BATCH_SIZE = config("INDEX_JOB_BATCH_SIZE", default=50, cast=int)
+INDEX_JOB_INTERVAL = config("INDEX_JOB_INTERVAL", default=2.0, cast=float)
+INDEX_JOB_RETRY_MAX_DELAY = config("INDEX_JOB_RETRY_MAX_DELAY", default=600.0, cast=float)
+INDEX_JOB_MAX_ATTEMPTS = config("INDEX_JOB_MAX_ATTEMPTS", default=10, cast=int)
+
+# Blue/green collection rebuilds (see api/index_versions.py): processes re-read the active collection
+# version every INDEX_VERSION_CHECK_INTERVAL seconds; INDEX_VERSIONS_KEPT retired versions are kept for rollback
+INDEX_VERSION_CHECK_INTERVAL = config("INDEX_VERSION_CHECK_INTERVAL", default=5.0, cast=float)
+INDEX_VERSIONS_KEPT = config("INDEX_VERSIONS_KEPT", default=1, cast=int)
+
+# Resume PDF text extraction (see api/utils.py): the text is cached on disk by file content hash, up to
+# PDF_TEXT_CACHE_MAX_BYTES (least recently used texts are dropped first), and PDFs of at least
+# PDF_EXTRACT_PARALLEL_PAGES pages are parsed by PDF_EXTRACT_WORKERS processes
+PDF_TEXT_CACHE_DIR = config("PDF_TEXT_CACHE_DIR", default=str(BASE_DIR / "cache" / "pdf_text"))
+PDF_TEXT_CACHE_MAX_BYTES = config("PDF_TEXT_CACHE_MAX_BYTES", default=50 * 1024 * 1024, cast=int)
+PDF_EXTRACT_WORKERS = config("PDF_EXTRACT_WORKERS", default=2, cast=int)
+PDF_EXTRACT_PARALLEL_PAGES = config("PDF_EXTRACT_PARALLEL_PAGES", default=20, cast=int)
+
+# Parallel indexing (see api/indexing.py): INDEX_WORKERS extraction processes and concurrent
+# embedding requests, throttled to the OpenAI quota of the account; 429s are retried with jitter
+INDEX_WORKERS = config("INDEX_WORKERS", default=4, cast=int)
+EMBEDDING_REQUESTS_PER_MINUTE = config("EMBEDDING_REQUESTS_PER_MINUTE", default=3000, cast=int)
+EMBEDDING_TOKENS_PER_MINUTE = config("EMBEDDING_TOKENS_PER_MINUTE", default=1_000_000, cast=int)
+EMBEDDING_RATE_LIMIT_RETRIES = config("EMBEDDING_RATE_LIMIT_RETRIES", default=5, cast=int)
+EMBEDDING_RETRY_BASE_DELAY = config("EMBEDDING_RETRY_BASE_DELAY", default=1.0, cast=float)
+EMBEDDING_RETRY_MAX_DELAY = config("EMBEDDING_RETRY_MAX_DELAY", default=30.0, cast=float)
+
+# Two-tier embedding cache: an in-process LRU (bounded in bytes) in front of Redis
+EMBEDDING_CACHE_ENABLED = config("EMBEDDING_CACHE_ENABLED", default=True, cast=bool)
+EMBEDDING_CACHE_LOCAL_MAX_BYTES = config("EMBEDDING_CACHE_LOCAL_MAX_BYTES", default=32 * 1024 * 1024, cast=int)  # 32 MB
+EMBEDDING_CACHE_TTL = config("EMBEDDING_CACHE_TTL", default=60 * 60 * 24 * 30, cast=int)  # 30 days
+
+# Hot-path counters (e.g. embedding cache hits) are buffered per process and written at most
+# every METRICS_FLUSH_INTERVAL seconds (see api/metrics.py)
+METRICS_FLUSH_INTERVAL = config("METRICS_FLUSH_INTERVAL", default=10.0, cast=float)
 
 # Email Backend Configuration (for sending contact form notifications)
 # For development, you might use 'console.EmailBackend' or 'filebased.EmailBackend'
@@ -1,7 +1,7 @@
 import os
+import tempfile
 
 from .settings import *  # noqa: F403
-from .settings import MIDDLEWARE
 
 CACHES = {
     "default": {
@@ -9,22 +9,29 @@ CACHES = {
     }
 }
 
+# Tests flush buffered chat messages explicitly instead of using the background flusher
+CHAT_FLUSH_INTERVAL = 0
+
+# Use the in-process vector index so tests do not need a ChromaDB server
+VECTOR_STORE_BACKEND = "local"
+VECTOR_STORE_PATH = tempfile.mkdtemp(prefix="vector_store_")
+
+# Index in-process; the extraction process pool has its own test
+INDEX_WORKERS = 1
+
+# Always resolve the active collection version (tests roll the database back between cases)
+INDEX_VERSION_CHECK_INTERVAL = 0
+
+# Keep extracted PDF text out of the source tree
+PDF_TEXT_CACHE_DIR = tempfile.mkdtemp(prefix="pdf_text_")
+
 # Use a memory backend for email in tests
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 DEFAULT_FROM_EMAIL = "test@example.com"
 ADMIN_EMAIL = "admin@example.com"
 
-
-# Optionally disable caching middleware for tests
-MIDDLEWARE = [
-    mw
-    for mw in MIDDLEWARE
-    if mw
-    not in [
-        "django.middleware.cache.UpdateCacheMiddleware",
-        "django.middleware.cache.FetchFromCacheMiddleware",
-    ]
-]
+# The shared cache outlives each test's database; response caching has its own tests
+API_CACHE_ENABLED = False
 
 DATABASES = {
     "default": {
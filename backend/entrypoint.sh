@@ -13,8 +13,8 @@ python manage.py migrate --noinput
 # Optionally collect static files if they need runtime updates
 python manage.py collectstatic --noinput
 
-# Index content on chromadb
-python manage.py index_content --reindex
+# Index new or changed content on chromadb (and drop deleted content); unchanged documents are not re-embedded
+python manage.py index_content --incremental
 
 # Start Gunicorn (CMD arguments are passed via exec)
 exec "$@"
@@ -1,3 +1,12 @@
 timeout = 90
 workers = 4
+# Serve core.asgi so the chatbot pipeline runs its I/O concurrently on an event loop
+worker_class = "uvicorn.workers.UvicornWorker"
 bind = "0.0.0.0:8000"
+
+
+def post_worker_init(worker):
+    """Opens the OpenAI/vector store connections before the worker takes traffic."""
+    from api.chromadb_utils import warm_up
+
+    warm_up()
@@ -1,10 +1,29 @@
 import { useState, useRef, useEffect } from "react";
-import axios from "axios";
 import "./css/ChatbotWidget.css";
 
 const INACTIVITY_TIMEOUT = 5 * 60 * 1000; // 5 minutes
 const LOCAL_STORAGE_KEY = 'chatbotSessionId';
 
+class ChatbotError extends Error {
+  status: number;
+
+  constructor(status: number) {
+    super(`Chatbot request failed with status ${status}`);
+    this.status = status;
+  }
+}
+
+// Parses a single Server-Sent Events frame ("event: ...\ndata: ...")
+const parseSseFrame = (frame: string) => {
+  let event = "message";
+  let data = "";
+  for (const line of frame.split("\n")) {
+    if (line.startsWith("event:")) event = line.slice(6).trim();
+    else if (line.startsWith("data:")) data += line.slice(5).trim();
+  }
+  return { event, data: data ? JSON.parse(data) : {} };
+};
+
 const ChatbotWidget = () => {
   const [isOpen, setIsOpen] = useState(false);
   const [messages, setMessages] = useState<{ text: string; sender: "user" | "bot" }[]>([]);
@@ -61,26 +80,55 @@ const ChatbotWidget = () => {
     setLoading(true);
 
     try {
-      const res = await axios.post(
-        `${import.meta.env.VITE_API_URL}chatbot/`,
-        {
+      const res = await fetch(`${import.meta.env.VITE_API_URL}chatbot/`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+        body: JSON.stringify({
           query: userMessage.text,
           session_id: sessionId, // Send current session ID (or null if new)
-        }
-      );
-      const botMessage = { text: res.data.answer, sender: "bot" as const };
-      setMessages((prev) => [...prev, botMessage]);
+          stream: true,
+        }),
+      });
+      if (!res.ok || !res.body) {
+        throw new ChatbotError(res.status);
+      }
 
-      // If this was a new session, save the new session ID
-      if (sessionId !== res.data.session_id) {
-        const newSessionId = res.data.session_id;
-        setSessionId(newSessionId);
-        localStorage.setItem(LOCAL_STORAGE_KEY, newSessionId);
+      // Read the Server-Sent Events stream and append each delta to the bot message
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let started = false;
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const frames = buffer.split("\n\n");
+        buffer = frames.pop() ?? "";
+        for (const frame of frames) {
+          const { event, data } = parseSseFrame(frame);
+          if (event === "session") {
+            // If this was a new session, save the new session ID
+            if (sessionId !== data.session_id) {
+              setSessionId(data.session_id);
+              localStorage.setItem(LOCAL_STORAGE_KEY, data.session_id);
+            }
+          } else if (event === "delta") {
+            if (!started) {
+              started = true;
+              setLoading(false);
+              setMessages((prev) => [...prev, { text: data.content, sender: "bot" as const }]);
+            } else {
+              setMessages((prev) => [...prev.slice(0, -1), { ...prev[prev.length - 1], text: prev[prev.length - 1].text + data.content }]);
+            }
+          } else if (event === "error") {
+            throw new ChatbotError(500);
+          }
+        }
       }
     } catch (error) {
       console.error("Chatbot API error:", error);
       let errorMessageText = "Sorry, I encountered an error. Please try again later.";
-      if (axios.isAxiosError(error) && error.response?.status === 429) {
+      if (error instanceof ChatbotError && error.status === 429) {
           errorMessageText = "You've reached the daily message limit. Please try again tomorrow.";
       }
       const errorMessage = {